@@ -9,8 +9,21 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from app.startup import load_application
+from core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+django_application = load_application('asgi', get_asgi_application)
+
+from book.sse import book_stream  # noqa: E402
+
+BOOK_STREAM_PATH = '/api/book/stream/'
+
+
+async def application(scope, receive, send):
+    """Serve the book event stream, and everything else with Django."""
+    if scope['type'] == 'http' and scope['path'] == BOOK_STREAM_PATH:
+        await book_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,59 @@
+"""
+Gunicorn settings for running the app in production.
+
+WSGI:  gunicorn -c app/gunicorn.conf.py app.wsgi
+ASGI:  SERVER_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+       gunicorn -c app/gunicorn.conf.py app.asgi
+
+Every value can be overridden with the SERVER_* environment variables.
+"""
+import gc
+import multiprocessing
+import os
+import time
+
+
+started = time.perf_counter()
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get('SERVER_BIND', '0.0.0.0:8000')
+worker_class = os.environ.get('SERVER_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('SERVER_WORKERS', cpu_count * 2 + 1))
+# Threads only apply to the gthread worker; async workers ignore them.
+threads = int(os.environ.get('SERVER_THREADS', 4))
+
+# Import Django, the apps and the URLconf once in the master so forked
+# workers share those pages copy-on-write.
+preload_app = True
+
+# Recycle workers after a number of requests, staggered by the jitter so
+# they do not all restart at once.
+max_requests = int(os.environ.get('SERVER_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('SERVER_MAX_REQUESTS_JITTER', 200))
+timeout = int(os.environ.get('SERVER_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('SERVER_KEEPALIVE', 5))
+
+# Worker heartbeat files on tmpfs, avoiding stalls on slow container disks.
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('SERVER_ACCESS_LOG')
+errorlog = '-'
+
+
+def when_ready(server):
+    """Report startup time once the preloaded app is ready to fork."""
+    from app.startup import timings
+
+    # Keep the preloaded objects out of the collector so its bookkeeping
+    # does not write to, and so copy, pages shared with the workers.
+    gc.freeze()
+
+    for name, seconds in timings.items():
+        server.log.info('Loaded %s application in %.3fs', name, seconds)
+    server.log.info(
+        'Ready in %.3fs with %s %s workers',
+        time.perf_counter() - started,
+        workers,
+        worker_class,
+    )
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,8 +31,14 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# The role of this process. 'api' serves HTTP requests; 'worker' (one-off
+# and background commands) and 'migrate' (schema changes) skip the apps,
+# middleware and URLs only requests need, so they start faster.
+PROCESS_ROLE = os.environ.get('DJANGO_PROCESS_ROLE', 'api')
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Admin modules are registered lazily, when the URLconf is loaded.
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -43,20 +50,53 @@ INSTALLED_APPS = [
     'core',
     'user',
     'book',
+    'health',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.AccessLogMiddleware',
+    'core.middleware.MemoryProfileMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.CsrfViewMiddleware',
+    'core.middleware.AuthenticationMiddleware',
+    'core.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Token authenticated API routes. The session, CSRF, authentication and
+# messages middleware are skipped for them; the admin keeps them.
+SESSIONLESS_PATH_PREFIXES = ['/api/']
+
+# Apps without models that only matter when serving requests.
+REQUEST_ONLY_APPS = [
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'drf_spectacular',
+    'health',
+]
+
 ROOT_URLCONF = 'app.urls'
 
+if PROCESS_ROLE != 'api':
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if app not in REQUEST_ONLY_APPS
+    ]
+    MIDDLEWARE = []
+    # Loading no views keeps the URL system checks from importing them.
+    ROOT_URLCONF = 'app.urls_empty'
+    # The admin requires the request-only apps and middleware, which this
+    # process never uses.
+    SILENCED_SYSTEM_CHECKS = [
+        'admin.E406',
+        'admin.E408',
+        'admin.E409',
+        'admin.E410',
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -86,9 +126,28 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Persistent connections are opt-in: under ASGI every sync view
+        # runs in its own thread, each of which would keep a connection.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
 }
 
+# Databases an owner's books are spread over, see core.sharding. Each host
+# in BOOK_SHARD_HOSTS adds a shard with the default database settings.
+# The default database stays first: it keeps the ids of existing books.
+for index, host in enumerate(
+    filter(None, os.environ.get('BOOK_SHARD_HOSTS', '').split(',')),
+    start=1,
+):
+    DATABASES[f'book_shard_{index}'] = dict(DATABASES['default'], HOST=host)
+
+BOOK_SHARDS = list(DATABASES) if len(DATABASES) > 1 else []
+
+DATABASE_ROUTERS = ['core.sharding.ShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -127,6 +186,33 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'static'
+
+# Writes a .gz and, with brotli installed, a .br copy of each compressible
+# file on collectstatic, for the web server to send as is.
+STATICFILES_STORAGE = 'core.storage.PrecompressedStaticFilesStorage'
+
+# Responses smaller than this are not worth compressing.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CONTENT_TYPES = [
+    'application/json',
+    'application/javascript',
+    'application/vnd.oai.openapi',
+    'application/vnd.oai.openapi+json',
+    'application/x-ndjson',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+]
+# Levels for compressing responses per request, kept low for latency.
+# Static files are compressed once with the highest levels instead.
+COMPRESSION_LEVELS = {
+    'br': 4,
+    'gzip': 6,
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -137,4 +223,136 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserBucketThrottle',
+        'core.throttling.ScopedBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '600/min',
+        'token': '10/min',
+        'create': '5/min',
+        'book_import': '20/hour',
+    },
+}
+
+# Where throttle buckets are kept: LocalMemoryStore (per process),
+# CacheStore (the default cache) or DatabaseStore. CacheStore only limits
+# across workers with a cache they share, like memcached or Redis, set in
+# CACHES; the default local memory cache is per process. DatabaseStore
+# rows are deleted by `manage.py clear_throttle_buckets`.
+THROTTLE_STORE = os.environ.get(
+    'THROTTLE_STORE',
+    'core.throttling.CacheStore',
+)
+
+# Number of rows fetched per server-side cursor round trip when streaming
+# book exports.
+BOOK_EXPORT_CHUNK_SIZE = 2000
+
+# Number of rows validated and written per transaction by book imports.
+BOOK_IMPORT_CHUNK_SIZE = 1000
+
+# Unavailable books not updated for this long are moved to the archive
+# table by `manage.py archive_books`.
+BOOK_ARCHIVE_AFTER = timedelta(days=90)
+
+# Similar books stored per book by `manage.py build_book_neighbors`, and
+# returned at most by the similar books endpoint.
+BOOK_NEIGHBORS_K = 20
+
+# Book vectors saved by full `build_book_neighbors` runs, so that
+# incremental runs only vectorize new books.
+BOOK_VECTORS_PATH = Path(
+    os.environ.get('BOOK_VECTORS_PATH', BASE_DIR / 'book_vectors.npz')
+)
+
+# Most books a single bulk update or delete may select.
+BOOK_BULK_MAX_IDS = 1000
+
+# Number of changes returned per page of the book change feed.
+BOOK_CHANGES_PAGE_SIZE = 500
+
+# Deletions and archivals older than this are purged from the book change
+# feed by `manage.py compact_book_changes`; clients with older cursors
+# resync.
+BOOK_CHANGE_RETENTION = timedelta(days=30)
+
+# Events a book stream subscriber may fall behind by before its stream is
+# closed, seconds between keep-alive comments on idle streams, and seconds
+# before reconnecting a lost LISTEN connection.
+BOOK_STREAM_QUEUE_SIZE = 100
+BOOK_STREAM_HEARTBEAT_SECONDS = 15
+BOOK_STREAM_RECONNECT_SECONDS = 2
+
+# Directory holding the OpenAPI schema written by `manage.py build_schema`.
+# When it is missing the schema is generated once per process on demand.
+SCHEMA_PREBUILT_DIR = BASE_DIR / 'schema'
+
+# Directory holding the plans of the hot book queries saved by
+# `manage.py check_query_plans`, and the relative change of estimated cost
+# it reports.
+QUERY_PLAN_BASELINE_DIR = BASE_DIR / 'query_plans'
+QUERY_PLAN_COST_THRESHOLD = 0.5
+
+# Admin changelists of unfiltered tables estimated to hold more rows than
+# this use the PostgreSQL planner estimate instead of COUNT(*).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Statement timeout of the readiness probe query, and how long its result is
+# reused before the database is probed again.
+HEALTH_CHECK_TIMEOUT_MS = 500
+READINESS_CACHE_SECONDS = 2
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.logs.JsonFormatter',
+        },
+    },
+    'handlers': {
+        # Records are written by a background thread, so logging never
+        # blocks the request threads on I/O.
+        'console': {
+            'class': 'core.logs.QueueStreamHandler',
+            'formatter': 'json',
+            'stream': 'ext://sys.stdout',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('LOG_LEVEL', 'WARNING'),
+    },
+    'loggers': {
+        'access': {
+            'handlers': ['console'],
+            'level': os.environ.get('ACCESS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
+
+# Fraction of requests to each route (by URL name) written to the access
+# log. Unlisted routes are always logged, as are server errors.
+ACCESS_LOG_SAMPLE_RATES = {
+    'health:healthz': 0.01,
+    'health:readyz': 0.01,
+    'book:book-list': 0.1,
+}
+
+# Fraction of requests to each route (by URL name), and to unlisted routes,
+# traced by core.middleware.MemoryProfileMiddleware. Tracing makes a
+# request several times slower, so it is off unless enabled. Each process
+# reports its stats at /status/memory/.
+MEMORY_PROFILE_SAMPLE_RATES = {}
+MEMORY_PROFILE_SAMPLE_RATE = float(
+    os.environ.get('MEMORY_PROFILE_SAMPLE_RATE', 0)
+)
+
+# Lifetime of the signed access tokens and of the refresh tokens they are
+# issued from, and how often each process reloads the revoked refresh
+# tokens.
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=15)
+REFRESH_TOKEN_LIFETIME = timedelta(days=30)
+TOKEN_REVOCATION_CACHE_SECONDS = 30
@@ -0,0 +1,62 @@
+"""
+Django settings for running the test suite.
+
+Used by `manage.py test` unless DJANGO_SETTINGS_MODULE says otherwise.
+Set TEST_DB=sqlite to run against an in-memory SQLite database instead
+of Postgres, for machines without a database service.
+"""
+import os
+
+from app.settings import *  # noqa: F401,F403
+
+# Hashing with the production PBKDF2 iterations dominates the time of tests
+# that create users; test passwords need no protection.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+# The second database is used by the tests of book sharding, which enable
+# it with override_settings(BOOK_SHARDS=...).
+if os.environ.get('TEST_DB') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+        'book_shard_1': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    }
+else:
+    # Test processes are short lived, keep no idle connections around.
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # noqa: F405
+    DATABASES['book_shard_1'] = dict(  # noqa: F405
+        DATABASES['default'],  # noqa: F405
+        TEST={'NAME': 'test_book_shard_1'},
+    )
+
+# Run test classes in this many processes, 0 for one per CPU. Each process
+# gets its own copy of the test database.
+TEST_RUNNER = 'core.tests.runner.ParallelDiscoverRunner'
+TEST_PARALLEL = int(os.environ.get('TEST_PARALLEL', 0))
+
+# Tests check log records with assertLogs, nothing needs to be written out.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'null': {
+            'class': 'logging.NullHandler',
+        },
+    },
+    'root': {
+        'handlers': ['null'],
+    },
+    'loggers': {
+        'access': {
+            'handlers': ['null'],
+            'propagate': False,
+        },
+    },
+}
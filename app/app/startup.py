@@ -0,0 +1,28 @@
+"""
+Process startup helpers shared by the WSGI and ASGI entrypoints.
+"""
+import time
+
+
+timings = {}
+
+
+def load_application(name, get_application):
+    """Build the application, warm it up and record how long it took."""
+    started = time.perf_counter()
+    application = get_application()
+    warm_up()
+    timings[name] = time.perf_counter() - started
+    return application
+
+
+def warm_up():
+    """
+    Import everything the first request would, so that workers forked
+    from a preloading master share it instead of loading it each.
+    """
+    from django.urls import get_resolver
+
+    # Populating the resolver imports every view, serializer and model
+    # module referenced by the URLconf.
+    get_resolver().reverse_dict
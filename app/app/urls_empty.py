@@ -0,0 +1,5 @@
+"""
+URLconf of processes that do not serve requests.
+"""
+
+urlpatterns = []
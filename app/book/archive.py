@@ -0,0 +1,81 @@
+"""
+Moving long unavailable books out of the book table.
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from core.models import ArchivedBook, Book, BookChange
+from book.changes import record_changes
+from book.counters import apply_deltas, count_deltas
+
+
+ARCHIVED_FIELDS = [
+    'id',
+    'owner_id',
+    'title',
+    'author_id',
+    'genre_id',
+    'condition_id',
+    'pickup_location',
+    'is_available',
+    'updated_at',
+]
+
+
+def archive_batch(updated_before, batch_size, using=DEFAULT_DB_ALIAS):
+    """
+    Move one batch of books unavailable since before `updated_before` to
+    the archive table of their database and return how many were moved.
+
+    Rows locked by requests are skipped and picked up by a later run, so
+    archiving never waits on, or holds up, the API.
+    """
+    with transaction.atomic(using=using):
+        rows = list(
+            Book.objects.using(using).filter(
+                is_available=False,
+                updated_at__lt=updated_before,
+            )
+            .order_by('updated_at')
+            .select_for_update(skip_locked=True)
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        ArchivedBook.objects.using(using).bulk_create(
+            [ArchivedBook(**row) for row in rows]
+        )
+        by_owner = {}
+        for row in rows:
+            by_owner.setdefault(row['owner_id'], []).append(row)
+        # Owners are locked in id order, so concurrent runs cannot deadlock.
+        for owner_id, owner_rows in sorted(by_owner.items()):
+            record_changes(
+                owner_id,
+                [row['id'] for row in owner_rows],
+                BookChange.ARCHIVED,
+                using,
+            )
+            apply_deltas(owner_id, count_deltas(removed=[
+                (row['genre_id'], row['is_available']) for row in owner_rows
+            ]), using)
+        Book.objects.using(using).filter(
+            id__in=[row['id'] for row in rows],
+        ).delete()
+    return len(rows)
+
+
+def archive_books(
+    updated_before,
+    batch_size=1000,
+    max_batches=None,
+    using=DEFAULT_DB_ALIAS,
+):
+    """Archive books in batches, yielding the count of each batch."""
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(updated_before, batch_size, using)
+        if not moved:
+            return
+        batches += 1
+        yield moved
@@ -0,0 +1,84 @@
+"""
+Bulk updates and deletes of an owner's books.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Book, BookChange, Genre, Condition
+from core.sharding import ensure_replicated, shard_for_owner
+from book.changes import record_changes
+from book.counters import apply_deltas, count_deltas
+from book.events import publish_books
+
+
+LOOKUPS = {
+    'genre': Genre,
+    'condition': Condition,
+}
+
+
+def results(ids, found, status):
+    """Return the per-id results of a bulk operation."""
+    return [
+        {'id': book_id, 'status': status if book_id in found else 'not_found'}
+        for book_id in dict.fromkeys(ids)
+    ]
+
+
+def bulk_update_books(owner, ids, changes):
+    """Apply the same changes to an owner's books with a single UPDATE."""
+    values = dict(changes, updated_at=timezone.now())
+    for field, model in LOOKUPS.items():
+        if field in values:
+            values[field], _ = model.objects.get_or_create(
+                name=values[field]['name'],
+            )
+
+    using = shard_for_owner(owner.pk)
+    with transaction.atomic(using=using):
+        books = Book.objects.using(using).filter(owner=owner, id__in=ids)
+        before = {
+            book_id: (genre_id, is_available)
+            for book_id, genre_id, is_available in books.select_for_update()
+            .values_list('id', 'genre_id', 'is_available')
+        }
+        found = set(before)
+        if found:
+            for field, model in LOOKUPS.items():
+                if field in values:
+                    ensure_replicated(model, [values[field].pk], using)
+            books.update(**values)
+            record_changes(owner.pk, sorted(found), BookChange.UPDATED)
+            apply_deltas(owner.pk, count_deltas(
+                removed=before.values(),
+                added=[
+                    (
+                        values['genre'].id if 'genre' in values else genre_id,
+                        values.get('is_available', is_available),
+                    )
+                    for genre_id, is_available in before.values()
+                ],
+            ))
+            publish_books(
+                books.filter(is_available=True)
+                .select_related('author', 'genre', 'condition')
+            )
+    return results(ids, found, 'updated')
+
+
+def bulk_delete_books(owner, ids):
+    """Delete an owner's books with a single DELETE."""
+    using = shard_for_owner(owner.pk)
+    with transaction.atomic(using=using):
+        books = Book.objects.using(using).filter(owner=owner, id__in=ids)
+        before = {
+            book_id: (genre_id, is_available)
+            for book_id, genre_id, is_available in books.select_for_update()
+            .values_list('id', 'genre_id', 'is_available')
+        }
+        found = set(before)
+        if found:
+            record_changes(owner.pk, sorted(found), BookChange.DELETED)
+            apply_deltas(owner.pk, count_deltas(removed=before.values()))
+            books.delete()
+    return results(ids, found, 'deleted')
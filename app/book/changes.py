@@ -0,0 +1,149 @@
+"""
+Change log of books, read by clients to sync incrementally.
+
+Every create, update and delete of a book appends a BookChange in the same
+transaction. Change ids are allocated on insert, not on commit, so the
+writing transaction locks the owner's row: concurrent writes of an
+owner then commit in the order of their change ids, and a client never
+reads past a change that commits later. Writes to existing books lock
+the books first and the owner second, so they cannot deadlock.
+
+Clients keep the `cursor` of the last page they read and pass it back
+as `since`.
+"""
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Exists, Max, OuterRef, Q
+
+from core.models import Book, BookChange, BookChangeCompaction
+from core.sharding import shard_for_id, shard_for_owner
+
+
+class CursorExpired(Exception):
+    """The changes after a cursor have been partly removed by compaction."""
+
+
+def lock_owner(owner_id, using):
+    """Lock an owner's row until the end of the current transaction."""
+    list(
+        get_user_model()._base_manager.using(using).filter(
+            pk=owner_id,
+        ).select_for_update().values_list('pk', flat=True)
+    )
+
+
+def record_changes(owner_id, book_ids, action, using=None):
+    """Append a change for each book id. Call inside the write transaction."""
+    using = using or shard_for_owner(owner_id)
+    lock_owner(owner_id, using)
+    BookChange.objects.using(using).bulk_create([
+        BookChange(owner_id=owner_id, book_id=book_id, action=action)
+        for book_id in book_ids
+    ])
+
+
+def purged_through(owner, using=None):
+    """Return the highest change sequence of an owner removed by compaction."""
+    using = using or shard_for_owner(owner.pk)
+    # Runs recorded before marks were kept per owner apply to every owner.
+    return BookChangeCompaction.objects.using(using).filter(
+        Q(owner=owner) | Q(owner__isnull=True),
+    ).aggregate(
+        seq=Max('purged_through'),
+    )['seq'] or 0
+
+
+def latest_cursor(owner):
+    """Return the sequence of the latest change of an owner."""
+    changes = BookChange.objects.using(shard_for_owner(owner.pk))
+    return changes.filter(owner=owner).aggregate(
+        seq=Max('id'),
+    )['seq'] or 0
+
+
+def read_changes(owner, since, limit):
+    """
+    Return up to `limit` changes of an owner after `since`, with the books
+    they refer to, as (changes, books by id, has more).
+
+    Raises CursorExpired if changes after `since` may have been purged,
+    or were read from another shard before the owner was moved.
+    """
+    using = shard_for_owner(owner.pk)
+    if since < purged_through(owner, using) or (
+        since and shard_for_id(since) != using
+    ):
+        raise CursorExpired(since)
+
+    changes = list(
+        BookChange.objects.using(using).filter(owner=owner, id__gt=since)
+        .order_by('id')[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    book_ids = {
+        change.book_id for change in changes
+        if change.action in (BookChange.CREATED, BookChange.UPDATED)
+    }
+    books = Book.objects.using(using).filter(
+        owner=owner,
+        id__in=book_ids,
+    ).select_related(
+        'author',
+        'genre',
+        'condition',
+    ).in_bulk() if book_ids else {}
+    return changes, books, has_more
+
+
+def superseded_changes(using=DEFAULT_DB_ALIAS):
+    """Return changes followed by a later change of the same book."""
+    later = BookChange.objects.using(using).filter(
+        owner=OuterRef('owner'),
+        book_id=OuterRef('book_id'),
+        id__gt=OuterRef('id'),
+    )
+    return BookChange.objects.using(using).filter(Exists(later))
+
+
+def delete_in_batches(queryset, batch_size):
+    """
+    Delete a queryset in batches, returning the count and the highest id
+    deleted of each owner.
+    """
+    # The ids are selected once, so the query filtering them runs once.
+    rows = list(queryset.order_by('id').values_list('id', 'owner_id'))
+    highest = {}
+    for change_id, owner_id in rows:
+        highest[owner_id] = change_id
+    for start in range(0, len(rows), batch_size):
+        BookChange.objects.using(queryset.db).filter(
+            id__in=[row[0] for row in rows[start:start + batch_size]],
+        ).delete()
+    return len(rows), highest
+
+
+def compact(deleted_before, batch_size=1000, using=DEFAULT_DB_ALIAS):
+    """
+    Remove superseded changes, and deletions and archivals older than
+    `deleted_before`, from one database.
+
+    A client only needs the latest change of each book, so dropping older
+    ones never changes what a sync ends up with. Dropping old removals
+    does, so the highest purged sequence of each owner is recorded and
+    that owner's older cursors are rejected.
+    Returns the number of superseded and purged changes.
+    """
+    superseded, _ = delete_in_batches(superseded_changes(using), batch_size)
+
+    tombstones = BookChange.objects.using(using).filter(
+        action__in=[BookChange.DELETED, BookChange.ARCHIVED],
+        created_at__lt=deleted_before,
+    )
+    purged, highest = delete_in_batches(tombstones, batch_size)
+    BookChangeCompaction.objects.using(using).bulk_create([
+        BookChangeCompaction(owner_id=owner_id, purged_through=seq)
+        for owner_id, seq in highest.items()
+    ])
+    return superseded, purged
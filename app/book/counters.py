@@ -0,0 +1,118 @@
+"""
+Per owner and genre book counts, kept up to date by every book write.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from core.models import Book, BookCount
+from core.sharding import shard_for_owner
+
+
+def count_deltas(removed=(), added=()):
+    """
+    Return {genre id: (total change, available change)} for books removed
+    and added, each given as (genre id, is available) pairs. An updated
+    book is removed as it was and added as it is.
+    """
+    total, available = Counter(), Counter()
+    for sign, books in ((-1, removed), (1, added)):
+        for genre_id, is_available in books:
+            total[genre_id] += sign
+            available[genre_id] += sign if is_available else 0
+    return {
+        genre_id: (total[genre_id], available[genre_id])
+        for genre_id in total
+    }
+
+
+def apply_deltas(owner_id, deltas, using=None):
+    """
+    Add deltas to an owner's counts with UPDATE ... SET n = n + delta, so
+    concurrent writes never lose each other's changes. Call inside the
+    write transaction.
+    """
+    manager = BookCount.objects.db_manager(
+        using or shard_for_owner(owner_id),
+    )
+    for genre_id, (total, available) in deltas.items():
+        if not total and not available:
+            continue
+        counts = manager.filter(owner_id=owner_id, genre_id=genre_id)
+        changes = {
+            'total': F('total') + total,
+            'available': F('available') + available,
+        }
+        if counts.update(**changes):
+            continue
+        _, created = manager.get_or_create(
+            owner_id=owner_id,
+            genre_id=genre_id,
+            defaults={'total': total, 'available': available},
+        )
+        if not created:
+            counts.update(**changes)
+
+
+def actual_counts(owner_ids, using):
+    """Return {(owner id, genre id): (total, available)} counted from books."""
+    rows = Book.objects.using(using).filter(owner_id__in=owner_ids).values(
+        'owner_id',
+        'genre_id',
+    ).annotate(
+        total=Count('id'),
+        available=Count('id', filter=Q(is_available=True)),
+    ).order_by()
+    return {
+        (row['owner_id'], row['genre_id']): (row['total'], row['available'])
+        for row in rows
+    }
+
+
+def reconcile(owner_ids):
+    """
+    Recount the books of some owners and fix counts that drifted.
+    Returns the number of counts fixed.
+
+    The owners' counts are locked first, so writes running meanwhile wait
+    and then apply their change on top of the recount.
+    """
+    by_shard = {}
+    for owner_id in owner_ids:
+        by_shard.setdefault(shard_for_owner(owner_id), []).append(owner_id)
+    return sum(
+        reconcile_shard(shard_owner_ids, using)
+        for using, shard_owner_ids in by_shard.items()
+    )
+
+
+def reconcile_shard(owner_ids, using):
+    """Recount the books of owners whose books are all on one shard."""
+    fixed = 0
+    with transaction.atomic(using=using):
+        stored = {
+            (count.owner_id, count.genre_id): count
+            for count in BookCount.objects.using(using).filter(
+                owner_id__in=owner_ids,
+            ).select_for_update()
+        }
+        actual = actual_counts(owner_ids, using)
+        for key in set(stored) | set(actual):
+            total, available = actual.get(key, (0, 0))
+            count = stored.get(key)
+            if count is None:
+                # apply_deltas may have added the row since it was read.
+                BookCount.objects.using(using).update_or_create(
+                    owner_id=key[0],
+                    genre_id=key[1],
+                    defaults={'total': total, 'available': available},
+                )
+            elif (count.total, count.available) != (total, available):
+                count.total = total
+                count.available = available
+                count.save(update_fields=['total', 'available'])
+            else:
+                continue
+            fixed += 1
+    return fixed
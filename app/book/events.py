@@ -0,0 +1,198 @@
+"""
+Events for books becoming available, fanned out to stream subscribers.
+
+On PostgreSQL events are sent with NOTIFY, which is delivered only once the
+writing transaction commits, and each ASGI worker holds one LISTEN
+connection per book shard feeding its BookEventHub. Other databases only
+reach subscribers of the process that wrote the book.
+"""
+import asyncio
+import json
+import logging
+from functools import partial
+
+import psycopg2
+from psycopg2 import extensions
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from core.sharding import shard_aliases
+from book.serializers import BookSerializer
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'book_available'
+
+
+def book_event(book):
+    """Return the event sent for a book."""
+    event = dict(BookSerializer(book).data)
+    event['owner_id'] = book.owner_id
+    return event
+
+
+def publish_books(books):
+    """Publish events for the available books of a write transaction."""
+    for book in books:
+        if not book.is_available:
+            continue
+        event = book_event(book)
+        # The connection of the book's shard, in the write transaction.
+        using = book._state.db or DEFAULT_DB_ALIAS
+        connection = connections[using]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT pg_notify(%s, %s)',
+                    [CHANNEL, json.dumps(event)],
+                )
+        else:
+            transaction.on_commit(
+                partial(hub.publish_threadsafe, event),
+                using=using,
+            )
+
+
+class Subscriber:
+    """Bounded queue of events matching a subscriber's filters."""
+
+    def __init__(self, user_id, genres=(), location=None, maxsize=100):
+        self.user_id = user_id
+        self.genres = {genre.lower() for genre in genres}
+        self.location = location.lower() if location else None
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def matches(self, event):
+        """Return whether an event passes the subscriber's filters."""
+        if event['owner_id'] == self.user_id:
+            return False
+        if self.genres and event['genre']['name'].lower() not in self.genres:
+            return False
+        return (
+            self.location is None or
+            self.location in event['pickup_location'].lower()
+        )
+
+    def offer(self, event):
+        """
+        Queue an event without waiting. A subscriber that has fallen a
+        full queue behind is marked overflowed and gets no more events,
+        so one slow client cannot hold up the others or grow memory.
+        """
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class BookEventHub:
+    """Fan out book events to the subscribers of this process."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.loop = None
+        self.listeners = []
+
+    def subscribe(self, subscriber):
+        """Add a subscriber, listening for events if not yet listening."""
+        self.loop = asyncio.get_running_loop()
+        self.subscribers.add(subscriber)
+        if not self.listeners and self.uses_notify():
+            self.listeners = [
+                PostgresListener(self, alias) for alias in shard_aliases()
+            ]
+            for listener in self.listeners:
+                listener.start()
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber, stopping to listen after the last one."""
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self.listeners:
+            for listener in self.listeners:
+                listener.stop()
+            self.listeners = []
+
+    def uses_notify(self):
+        return connections['default'].vendor == 'postgresql'
+
+    def publish(self, event):
+        """Offer an event to every matching subscriber."""
+        for subscriber in list(self.subscribers):
+            if subscriber.matches(event):
+                subscriber.offer(event)
+
+    def publish_threadsafe(self, event):
+        """Publish an event from a thread other than the event loop's."""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.publish, event)
+
+
+class PostgresListener:
+    """
+    LISTEN on a dedicated connection driven by the event loop, publishing
+    notifications to the hub and reconnecting after connection errors.
+    """
+
+    def __init__(self, hub, alias=DEFAULT_DB_ALIAS):
+        self.hub = hub
+        self.alias = alias
+        self.conn = None
+        self.fileno = None
+        self.stopped = False
+
+    def start(self):
+        if self.stopped:
+            return
+        try:
+            self.connect()
+        except psycopg2.Error:
+            logger.exception('Could not listen for book events')
+            self.retry()
+
+    def connect(self):
+        params = connections[self.alias].get_connection_params()
+        self.conn = psycopg2.connect(**params)
+        self.conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self.conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        self.fileno = self.conn.fileno()
+        self.hub.loop.add_reader(self.fileno, self.read)
+
+    def read(self):
+        try:
+            self.conn.poll()
+        except psycopg2.Error:
+            logger.exception('Lost the book events connection')
+            self.close()
+            self.retry()
+            return
+        while self.conn.notifies:
+            notify = self.conn.notifies.pop(0)
+            self.hub.publish(json.loads(notify.payload))
+
+    def retry(self):
+        if not self.stopped:
+            self.hub.loop.call_later(
+                settings.BOOK_STREAM_RECONNECT_SECONDS,
+                self.start,
+            )
+
+    def close(self):
+        if self.fileno is not None:
+            self.hub.loop.remove_reader(self.fileno)
+            self.fileno = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def stop(self):
+        self.stopped = True
+        self.close()
+
+
+hub = BookEventHub()
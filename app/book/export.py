@@ -0,0 +1,73 @@
+"""
+Streaming export of books as CSV or NDJSON.
+"""
+import csv
+import json
+
+
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('title', 'title'),
+    ('author', 'author__name'),
+    ('genre', 'genre__name'),
+    ('condition', 'condition__name'),
+    ('pickup_location', 'pickup_location'),
+    ('is_available', 'is_available'),
+]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object that hands back what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset, chunk_size):
+    """Yield flat export rows using a server-side cursor."""
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def _batched(lines, batch_size):
+    """Join encoded lines into fewer, larger chunks for the response."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_csv(queryset, chunk_size):
+    """Yield the CSV export of a queryset chunk by chunk."""
+    writer = csv.writer(Echo())
+    header = writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    lines = (writer.writerow(row) for row in iter_rows(queryset, chunk_size))
+
+    yield header
+    yield from _batched(lines, chunk_size)
+
+
+def stream_ndjson(queryset, chunk_size):
+    """Yield the NDJSON export of a queryset chunk by chunk."""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    lines = (
+        json.dumps(dict(zip(names, row))) + '\n'
+        for row in iter_rows(queryset, chunk_size)
+    )
+
+    yield from _batched(lines, chunk_size)
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
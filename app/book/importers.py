@@ -0,0 +1,177 @@
+"""
+Streaming import of books from CSV or NDJSON files.
+"""
+import csv
+import json
+import os
+
+from django.db import transaction
+
+from core.fingerprints import book_fingerprint
+from core.models import Author, Genre, Condition, Book, BookChange
+from core.sharding import ensure_replicated, shard_for_owner
+from book.changes import lock_owner, record_changes
+from book.counters import apply_deltas, count_deltas
+from book.serializers import BookDetailSerializer
+
+
+FORMATS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+LOOKUPS = [
+    ('author', Author),
+    ('genre', Genre),
+    ('condition', Condition),
+]
+
+
+# Uploads are read as UTF-8, skipping the byte order mark Excel writes.
+ENCODING = 'utf-8-sig'
+
+
+def detect_format(filename):
+    """Return the import format for a file name, or None if unknown."""
+    _, extension = os.path.splitext(filename.lower())
+    return FORMATS.get(extension)
+
+
+def read_rows(stream, file_format):
+    """Yield raw rows from a text stream one at a time."""
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {}
+
+
+def row_to_data(row):
+    """Convert a flat import row to BookDetailSerializer input."""
+    data = {
+        'title': row.get('title'),
+        'pickup_location': row.get('pickup_location'),
+    }
+    for field, _ in LOOKUPS:
+        data[field] = {'name': row.get(field)}
+    if row.get('is_available') not in (None, ''):
+        data['is_available'] = row['is_available']
+    return data
+
+
+def resolve_names(model, names):
+    """Return a name to id mapping, creating missing objects in bulk."""
+    ids = dict(model.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        model.objects.bulk_create([model(name=name) for name in missing])
+        ids.update(
+            model.objects.filter(name__in=missing).values_list('name', 'id')
+        )
+    return ids
+
+
+class BookImporter:
+    """Validate and write book rows in chunked transactions."""
+
+    def __init__(self, owner, chunk_size=1000, start_row=0, progress=None):
+        self.owner = owner
+        self.chunk_size = chunk_size
+        self.start_row = start_row
+        self.progress = progress
+        self.created = 0
+        self.errors = []
+        self.last_row = start_row
+
+    def run(self, rows):
+        """Import rows and return a summary of the run."""
+        chunk = []
+        number = self.start_row
+        for number, row in enumerate(rows, start=1):
+            if number <= self.start_row:
+                continue
+            serializer = BookDetailSerializer(data=row_to_data(row))
+            if serializer.is_valid():
+                chunk.append(serializer.validated_data)
+            else:
+                self.errors.append(
+                    {'row': number, 'errors': serializer.errors}
+                )
+            if number - self.last_row >= self.chunk_size:
+                self._write_chunk(chunk, number)
+                chunk = []
+        if number > self.last_row:
+            self._write_chunk(chunk, number)
+
+        return {
+            'created': self.created,
+            'errors': self.errors,
+            'last_row': self.last_row,
+        }
+
+    def _write_chunk(self, chunk, last_row):
+        """Write one chunk of validated rows and report progress."""
+        # Lookups are committed on the default database before they are
+        # copied to the owner's shard along with the books.
+        with transaction.atomic():
+            ids = {
+                field: resolve_names(
+                    model,
+                    {data[field]['name'] for data in chunk},
+                )
+                for field, model in LOOKUPS
+            }
+        using = shard_for_owner(self.owner.pk)
+        with transaction.atomic(using=using):
+            for field, model in LOOKUPS:
+                ensure_replicated(model, ids[field].values(), using)
+            books = [
+                Book(
+                    owner=self.owner,
+                    title=data['title'],
+                    author_id=ids['author'][data['author']['name']],
+                    fingerprint=book_fingerprint(
+                        data['title'],
+                        ids['author'][data['author']['name']],
+                    ),
+                    genre_id=ids['genre'][data['genre']['name']],
+                    condition_id=ids['condition'][data['condition']['name']],
+                    pickup_location=data['pickup_location'],
+                    is_available=data.get('is_available', True),
+                )
+                for data in chunk
+            ]
+            # The lock also keeps other books of the owner from being
+            # inserted between these.
+            lock_owner(self.owner.pk, using)
+            Book.objects.using(using).bulk_create(books)
+            book_ids = [book.pk for book in books]
+            if books and None in book_ids:
+                # Backends without INSERT ... RETURNING leave the keys
+                # unset, read back the owner's newest ids instead.
+                book_ids = Book.objects.using(using).filter(
+                    owner=self.owner,
+                ).order_by('-id').values_list('id', flat=True)[:len(books)]
+            record_changes(
+                self.owner.pk,
+                sorted(book_ids),
+                BookChange.CREATED,
+                using,
+            )
+            apply_deltas(self.owner.pk, count_deltas(
+                added=[(book.genre_id, book.is_available) for book in books],
+            ))
+
+        self.created += len(books)
+        self.last_row = last_row
+        if self.progress:
+            self.progress(self.last_row, self.created)
@@ -0,0 +1,65 @@
+"""
+Django command to move long unavailable books to the archive table.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.sharding import shard_aliases
+from book.archive import archive_books
+
+
+class Command(BaseCommand):
+    """Django command to archive unavailable books in batches."""
+    help = (
+        'Move books unavailable and unchanged for longer than '
+        'BOOK_ARCHIVE_AFTER to the archive table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=float,
+            default=settings.BOOK_ARCHIVE_AFTER / timedelta(days=1),
+            help='Days a book has to be unavailable to be archived.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of books moved per transaction.',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches.',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between batches to limit load.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        updated_before = timezone.now() - timedelta(
+            days=options['older_than_days'],
+        )
+        total = 0
+        for using in shard_aliases():
+            for moved in archive_books(
+                updated_before,
+                options['batch_size'],
+                options['max_batches'],
+                using,
+            ):
+                total += moved
+                self.stdout.write(f'Archived {moved} books ({total} total)')
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} books.'))
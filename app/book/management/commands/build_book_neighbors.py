@@ -0,0 +1,47 @@
+"""
+Django command to precompute similar books.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from book.similarity import build_all, refresh_new
+
+
+class Command(BaseCommand):
+    """Django command to store the most similar books of each book."""
+    help = (
+        'Compute neighbors for books created since the last run, or for '
+        'all books with --full. Run --full periodically, as incremental '
+        'runs keep the vectors and scores of existing books.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute the neighbors of every book.',
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=settings.BOOK_NEIGHBORS_K,
+            help='Number of neighbors stored per book.',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=256,
+            help='Books scored per matrix product, bounding memory use.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        started = time.perf_counter()
+        build = build_all if options['full'] else refresh_new
+        saved = build(options['k'], options['block_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Saved neighbors of {saved} books in '
+            f'{time.perf_counter() - started:.1f}s.'
+        ))
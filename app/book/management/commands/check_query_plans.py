@@ -0,0 +1,84 @@
+"""
+Django command to check the plans of hot queries against baselines.
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from book.plans import (
+    HOT_QUERIES,
+    PlansUnsupported,
+    compare,
+    explain,
+    sample_book,
+    summarize,
+)
+
+
+class Command(BaseCommand):
+    """Django command to explain hot queries and compare their plans."""
+    help = (
+        'EXPLAIN the hot book queries against a seeded database and report '
+        'plans that changed since their saved baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--baseline-dir',
+            type=Path,
+            default=settings.QUERY_PLAN_BASELINE_DIR,
+            help='Directory the plan baselines are kept in.',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE, executing the queries.',
+        )
+        parser.add_argument(
+            '--cost-threshold',
+            type=float,
+            default=settings.QUERY_PLAN_COST_THRESHOLD,
+            help='Relative change of estimated cost reported.',
+        )
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Save the current plans as the new baselines.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        sample = sample_book()
+        if sample is None:
+            raise CommandError('No books to plan queries for, seed first.')
+
+        baseline_dir = options['baseline_dir']
+        baseline_dir.mkdir(parents=True, exist_ok=True)
+        regressions = 0
+        for name, build in HOT_QUERIES.items():
+            try:
+                plan = explain(build(sample), analyze=options['analyze'])
+            except PlansUnsupported as error:
+                raise CommandError(
+                    f'Query plans are only checked on PostgreSQL, not {error}.'
+                )
+            current = summarize(plan)
+            path = baseline_dir / f'{name}.json'
+            if options['update'] or not path.exists():
+                path.write_text(json.dumps(current, indent=2) + '\n')
+                self.stdout.write(f'{name}: saved baseline {path}')
+                continue
+
+            baseline = json.loads(path.read_text())
+            problems = compare(baseline, current, options['cost_threshold'])
+            for problem in problems:
+                self.stdout.write(self.style.ERROR(f'{name}: {problem}'))
+            if not problems:
+                self.stdout.write(f'{name}: unchanged')
+            regressions += bool(problems)
+
+        if regressions:
+            raise CommandError(f'{regressions} query plans changed.')
+        self.stdout.write(self.style.SUCCESS('Query plans checked!'))
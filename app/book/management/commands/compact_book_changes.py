@@ -0,0 +1,49 @@
+"""
+Django command to compact the book change feed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.sharding import shard_aliases
+from book.changes import compact
+
+
+class Command(BaseCommand):
+    """Django command to remove superseded and expired book changes."""
+    help = (
+        'Remove book changes followed by a later change of the same book, '
+        'and deletions older than the retention period.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=float,
+            default=settings.BOOK_CHANGE_RETENTION / timedelta(days=1),
+            help='Age after which deletions are purged.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of changes deleted per query.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        deleted_before = timezone.now() - timedelta(
+            days=options['retention_days'],
+        )
+        for using in shard_aliases():
+            superseded, purged = compact(
+                deleted_before,
+                options['batch_size'],
+                using,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Removed {superseded} superseded and {purged} expired '
+                f'changes from {using}.'
+            ))
@@ -0,0 +1,83 @@
+"""
+Django command to backfill book fingerprints and report duplicates.
+"""
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+
+from core.fingerprints import book_fingerprint
+from core.models import Book
+from core.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    """Django command to find books an owner listed more than once."""
+    help = (
+        'Fill in missing book fingerprints, then list the books each owner '
+        'listed more than once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of books read and updated per query.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options['batch_size']
+        filled = sum(
+            self.backfill(using, batch_size) for using in shard_aliases()
+        )
+        self.stdout.write(f'Filled in {filled} book fingerprints.')
+
+        duplicates = sum(
+            self.report(using, batch_size) for using in shard_aliases()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Found {duplicates} duplicated books.'
+        ))
+
+    def report(self, using, batch_size):
+        """List the duplicated books on one database."""
+        duplicates = 0
+        books = Book.objects.using(using).exclude(fingerprint='').order_by(
+            'owner_id',
+            'fingerprint',
+            'id',
+        ).values_list('owner_id', 'fingerprint', 'id', 'title')
+        for (owner_id, _), group in groupby(
+            books.iterator(chunk_size=batch_size),
+            key=lambda book: book[:2],
+        ):
+            group = list(group)
+            if len(group) > 1:
+                duplicates += 1
+                ids = ', '.join(str(book[2]) for book in group)
+                self.stdout.write(
+                    f'Owner {owner_id}: "{group[0][3]}" listed as {ids}'
+                )
+        return duplicates
+
+    def backfill(self, using, batch_size):
+        """Fill in the fingerprints of books saved before they existed."""
+        books = Book.objects.using(using).filter(fingerprint='').only(
+            'id',
+            'title',
+            'author_id',
+        )
+        filled = 0
+        batch = []
+        for book in books.iterator(chunk_size=batch_size):
+            book.fingerprint = book_fingerprint(book.title, book.author_id)
+            batch.append(book)
+            if len(batch) == batch_size:
+                Book.objects.using(using).bulk_update(batch, ['fingerprint'])
+                filled += len(batch)
+                batch = []
+        if batch:
+            Book.objects.using(using).bulk_update(batch, ['fingerprint'])
+            filled += len(batch)
+        return filled
@@ -0,0 +1,102 @@
+"""
+Django command to import books from a CSV or NDJSON file.
+"""
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from book.importers import (
+    ENCODING,
+    BookImporter,
+    detect_format,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    """Django command to bulk import books for a user."""
+    help = 'Import books for a user from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument(
+            '--owner',
+            required=True,
+            help='Email of the user who will own the books.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='File format, detected from the extension by default.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.BOOK_IMPORT_CHUNK_SIZE,
+            help='Rows written per transaction.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording the last committed row, used to resume.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        file_format = options['format'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError('Unable to detect the file format.')
+
+        try:
+            owner = get_user_model().objects.get(email=options['owner'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["owner"]} does not exist.')
+
+        checkpoint = options['checkpoint']
+        start_row = self._read_checkpoint(checkpoint)
+        if start_row:
+            self.stdout.write(f'Resuming after row {start_row}...')
+
+        def progress(last_row, created):
+            if checkpoint:
+                self._write_checkpoint(checkpoint, last_row)
+            self.stdout.write(
+                f'Committed rows up to {last_row}, {created} books created.'
+            )
+
+        importer = BookImporter(
+            owner=owner,
+            chunk_size=options['chunk_size'],
+            start_row=start_row,
+            progress=progress,
+        )
+        with open(options['path'], encoding=ENCODING, newline='') as stream:
+            try:
+                result = importer.run(read_rows(stream, file_format))
+            except UnicodeDecodeError:
+                raise CommandError(
+                    'The file is not valid UTF-8 text, rows up to '
+                    f'{importer.last_row} were imported.'
+                )
+
+        for error in result['errors']:
+            self.stderr.write(f'Row {error["row"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result["created"]} books, '
+            f'{len(result["errors"])} rows rejected.'
+        ))
+
+    def _read_checkpoint(self, path):
+        """Return the last committed row recorded in a checkpoint file."""
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+
+    def _write_checkpoint(self, path, last_row):
+        """Atomically record the last committed row."""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as checkpoint:
+            checkpoint.write(str(last_row))
+        os.replace(tmp_path, path)
@@ -0,0 +1,181 @@
+"""
+Django command to measure the memory of book lists by serializer path.
+"""
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.fingerprints import book_fingerprint
+from core.models import ArchivedBook, Author, Book, Condition, Genre
+from core.sharding import ensure_replicated, shard_aliases, shard_for_owner
+from book.archive import ARCHIVED_FIELDS
+
+# Query parameters of the book list, by the serializer path they take.
+PATHS = [
+    ('nested', {}),
+    ('primary keys', {'expand': ''}),
+    ('sparse', {'fields': 'id,title'}),
+    ('with archived', {'include_archived': 'true'}),
+]
+
+
+class Command(BaseCommand):
+    """Django command to profile the book list at scale."""
+    help = (
+        "List an owner's books through each serializer path and report "
+        'the peak memory of each. Books created for the run are rolled '
+        'back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--books',
+            type=int,
+            default=10000,
+            help='Number of books created for a profiling owner.',
+        )
+        parser.add_argument(
+            '--archived',
+            type=int,
+            default=1000,
+            help='Number of those books archived.',
+        )
+        parser.add_argument(
+            '--email',
+            default=None,
+            help='List the books of this user instead.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Number of lists per path, the lowest peak is reported.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['archived'] > options['books']:
+            raise CommandError('Cannot archive more books than created.')
+
+        databases = {DEFAULT_DB_ALIAS, *shard_aliases()}
+        with ExitStack() as stack:
+            for using in sorted(databases):
+                stack.enter_context(transaction.atomic(using=using))
+            try:
+                owner = self.get_owner(options)
+                results = self.profile(owner, options['repeat'])
+            finally:
+                for using in databases:
+                    transaction.set_rollback(True, using=using)
+
+        for label, (peak, size, seconds) in results.items():
+            self.stdout.write(
+                f'{label:>14}: {peak / 2 ** 20:8.1f} MiB peak, '
+                f'{size / 2 ** 20:7.1f} MiB response, '
+                f'{seconds * 1000:8.1f} ms traced'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Profiled {len(results)} serializer paths.'
+        ))
+
+    def get_owner(self, options):
+        """Return the user whose books are listed."""
+        if options['email']:
+            try:
+                return get_user_model().objects.get(email=options['email'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'No user {options["email"]}.')
+
+        owner = get_user_model().objects.create_user(
+            email='profile-book-list@example.com',
+        )
+        self.create_books(owner, options['books'], options['archived'])
+        return owner
+
+    def create_books(self, owner, number, archived):
+        """Create books, some archived, with a spread of lookups."""
+        using = shard_for_owner(owner.pk)
+        authors = [
+            Author.objects.get_or_create(name=f'Profile Author {index}')[0]
+            for index in range(50)
+        ]
+        genres = [
+            Genre.objects.get_or_create(name=f'Profile Genre {index}')[0]
+            for index in range(10)
+        ]
+        condition = Condition.objects.get_or_create(name='Good')[0]
+        ensure_replicated(get_user_model(), [owner.pk], using)
+        ensure_replicated(Author, [author.pk for author in authors], using)
+        ensure_replicated(Genre, [genre.pk for genre in genres], using)
+        ensure_replicated(Condition, [condition.pk], using)
+
+        books = []
+        for index in range(number):
+            author = authors[index % len(authors)]
+            title = f'Profile Book {index}'
+            books.append(Book(
+                owner=owner,
+                title=title,
+                author=author,
+                genre=genres[index % len(genres)],
+                condition=condition,
+                pickup_location=f'Shelf {index % 100}',
+                is_available=index % 3 != 0,
+                fingerprint=book_fingerprint(title, author.pk),
+            ))
+        Book.objects.using(using).bulk_create(books, batch_size=1000)
+
+        rows = list(
+            Book.objects.using(using).filter(owner=owner).order_by(
+                'id',
+            ).values(*ARCHIVED_FIELDS)[:archived]
+        )
+        ArchivedBook.objects.using(using).bulk_create(
+            [ArchivedBook(**row) for row in rows],
+            batch_size=1000,
+        )
+        Book.objects.using(using).filter(
+            id__in=[row['id'] for row in rows],
+        ).delete()
+
+    def profile(self, owner, repeat):
+        """Return peak bytes, response bytes and seconds of each path."""
+        client = APIClient()
+        client.force_authenticate(owner)
+        url = reverse('book:book-list')
+        results = {}
+        # Keep the middleware from tracing, or compressing, the lists.
+        with override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            MEMORY_PROFILE_SAMPLE_RATES={},
+            MEMORY_PROFILE_SAMPLE_RATE=0,
+            COMPRESSION_MIN_SIZE=float('inf'),
+        ):
+            for label, params in PATHS:
+                results[label] = min(
+                    self.measure(client, url, params)
+                    for _ in range(max(repeat, 1))
+                )
+        return results
+
+    def measure(self, client, url, params):
+        """Return peak bytes, response bytes and seconds of one list."""
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            res = client.get(url, params)
+            seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+        if res.status_code != 200:
+            raise CommandError(f'{url} returned {res.status_code}.')
+        return peak, len(res.content), seconds
@@ -0,0 +1,69 @@
+"""
+Django command to move owners' books to the shard they belong on.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.sharding import shard_aliases, shard_for_owner
+from book.rebalance import misplaced_owners, move_owner
+
+
+class Command(BaseCommand):
+    """Django command to move books after BOOK_SHARDS changed."""
+    help = (
+        'Move the books of owners placed on another shard by BOOK_SHARDS. '
+        'Run once every process uses the new BOOK_SHARDS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drain',
+            action='append',
+            default=[],
+            help='Database removed from BOOK_SHARDS to move books off.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows inserted per query.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the owners that would be moved.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        unknown = set(options['drain']) - set(connections)
+        if unknown:
+            raise CommandError(f'Unknown databases: {", ".join(unknown)}.')
+
+        owners = books = 0
+        for source in shard_aliases() + options['drain']:
+            for owner_id in misplaced_owners(source):
+                target = shard_for_owner(owner_id)
+                owners += 1
+                if options['dry_run']:
+                    self.stdout.write(
+                        f'Owner {owner_id}: {source} -> {target}'
+                    )
+                    continue
+                moved = move_owner(
+                    owner_id,
+                    source,
+                    target,
+                    options['batch_size'],
+                )
+                books += moved
+                self.stdout.write(
+                    f'Owner {owner_id}: moved {moved} books from {source} '
+                    f'to {target}'
+                )
+
+        if options['dry_run']:
+            message = f'{owners} owners to move.'
+        else:
+            message = f'Moved {books} books of {owners} owners.'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,38 @@
+"""
+Django command to fix drift in the maintained book counts.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from book.counters import reconcile
+
+
+class Command(BaseCommand):
+    """Django command to recount books per owner and genre."""
+    help = 'Recount the books of every owner and fix counts that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of owners recounted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        owner_ids = get_user_model().objects.order_by('id').values_list(
+            'id',
+            flat=True,
+        )
+        batch_size = options['batch_size']
+        last_id = 0
+        fixed = 0
+        while True:
+            batch = list(owner_ids.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            fixed += reconcile(batch)
+            last_id = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Fixed {fixed} book counts.'))
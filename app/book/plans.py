@@ -0,0 +1,106 @@
+"""
+Query plans of the hot book queries, and checks against saved baselines.
+"""
+import json
+
+from django.db import connection
+from django.db.models import Q
+
+from core.models import Book, BookChange, Genre
+
+
+def owner_book_list(sample):
+    """The book list of an owner."""
+    return Book.objects.filter(owner_id=sample.owner_id).order_by('-id')
+
+
+def lookup_by_name(sample):
+    """The lookup of get_or_create of a genre by name."""
+    return Genre.objects.filter(name=sample.genre.name)[:21]
+
+
+def available_by_author_or_genre(sample):
+    """Available books of other owners by author or genre."""
+    return Book.objects.filter(
+        Q(author_id=sample.author_id) | Q(genre_id=sample.genre_id),
+        is_available=True,
+    ).exclude(owner_id=sample.owner_id).select_related(
+        'author',
+        'genre',
+        'condition',
+    ).order_by('-id')[:10]
+
+
+def owner_changes(sample):
+    """A page of the change feed of an owner."""
+    return BookChange.objects.filter(
+        owner_id=sample.owner_id,
+        id__gt=0,
+    ).order_by('id')[:501]
+
+
+HOT_QUERIES = {
+    'owner_book_list': owner_book_list,
+    'lookup_by_name': lookup_by_name,
+    'available_by_author_or_genre': available_by_author_or_genre,
+    'owner_changes': owner_changes,
+}
+
+
+class PlansUnsupported(Exception):
+    """Raised when the database cannot explain queries as JSON."""
+
+
+def sample_book():
+    """Return the book whose owner, author and genre fill the queries."""
+    return Book.objects.select_related('genre').order_by('id').first()
+
+
+def explain(queryset, analyze=False):
+    """Return the root node of the JSON plan of a queryset."""
+    if connection.vendor != 'postgresql':
+        raise PlansUnsupported(connection.vendor)
+    options = {'analyze': True} if analyze else {}
+    plan = json.loads(queryset.explain(format='json', **options))
+    return plan[0]['Plan']
+
+
+def plan_nodes(node):
+    """Return the nodes of a plan depth first, as readable strings."""
+    label = node['Node Type']
+    target = node.get('Index Name') or node.get('Relation Name')
+    if target:
+        label = f'{label} on {target}'
+    nodes = [label]
+    for child in node.get('Plans', []):
+        nodes += plan_nodes(child)
+    return nodes
+
+
+def summarize(plan):
+    """Return the parts of a plan compared against the baseline."""
+    return {
+        'nodes': plan_nodes(plan),
+        'total_cost': plan['Total Cost'],
+        'plan': plan,
+    }
+
+
+def compare(baseline, current, cost_threshold):
+    """
+    Return the regressions of a plan against its baseline: a change of
+    its nodes, or of its estimated cost by more than `cost_threshold` as
+    a fraction of the baseline cost.
+    """
+    problems = []
+    if baseline['nodes'] != current['nodes']:
+        problems.append(
+            'plan changed from [{}] to [{}]'.format(
+                ', '.join(baseline['nodes']),
+                ', '.join(current['nodes']),
+            )
+        )
+    before, after = baseline['total_cost'], current['total_cost']
+    if abs(after - before) > cost_threshold * max(before, 1):
+        problems.append(f'estimated cost changed from {before} to {after}')
+    return problems
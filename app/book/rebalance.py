@@ -0,0 +1,105 @@
+"""
+Moving owners' books to the shard BOOK_SHARDS places them on.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core.models import (
+    ArchivedBook,
+    Author,
+    Book,
+    BookChange,
+    BookCount,
+    Condition,
+    Genre,
+)
+from core.sharding import ensure_replicated, reserve_id_range, shard_for_owner
+from book.counters import reconcile_shard
+
+# Lookups referenced by moved rows, by foreign key column.
+LOOKUPS = {
+    'author_id': Author,
+    'genre_id': Genre,
+    'condition_id': Condition,
+}
+
+
+def misplaced_owners(using):
+    """Return the ids of owners with rows on a database not their shard."""
+    owner_ids = set()
+    for model in (Book, ArchivedBook, BookCount, BookChange):
+        owner_ids.update(
+            model.objects.using(using).values_list(
+                'owner_id',
+                flat=True,
+            ).distinct()
+        )
+    return sorted(
+        owner_id for owner_id in owner_ids
+        if shard_for_owner(owner_id) != using
+    )
+
+
+def _copy(model, rows, target, batch_size):
+    """Insert rows with their ids, skipping rows copied by an earlier run."""
+    fields = [field.attname for field in model._meta.concrete_fields]
+    objs = [model(**{name: row[name] for name in fields}) for row in rows]
+    model.objects.using(target).bulk_create(
+        objs,
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    # bulk_create set the auto_now fields, put back the moved values.
+    for obj, row in zip(objs, rows):
+        for name in fields:
+            setattr(obj, name, row[name])
+    return objs
+
+
+def move_owner(owner_id, source, target, batch_size=1000):
+    """
+    Move an owner's books and archived books from `source` to `target`
+    with their ids, and return the number of books moved.
+
+    Rows are committed on the target before they are deleted from the
+    source, so an interrupted move is finished by running it again. The
+    owner's change feed is dropped: its cursors belong to the source's id
+    range, so clients get a 410 and fetch their books again. Counts are
+    recomputed on the target, and neighbor lists by the next run of
+    `manage.py build_book_neighbors`.
+    """
+    books = list(
+        Book.objects.using(source).filter(owner_id=owner_id).values()
+    )
+    archived = list(
+        ArchivedBook.objects.using(source).filter(owner_id=owner_id).values()
+    )
+
+    with transaction.atomic(using=target):
+        ensure_replicated(get_user_model(), [owner_id], target)
+        for column, model in LOOKUPS.items():
+            ensure_replicated(
+                model,
+                {row[column] for row in books + archived},
+                target,
+            )
+        copied = _copy(Book, books, target, batch_size)
+        Book.objects.using(target).bulk_update(
+            copied,
+            ['updated_at'],
+            batch_size=batch_size,
+        )
+        copied = _copy(ArchivedBook, archived, target, batch_size)
+        ArchivedBook.objects.using(target).bulk_update(
+            copied,
+            ['archived_at'],
+            batch_size=batch_size,
+        )
+        reserve_id_range(target)
+
+    with transaction.atomic(using=source):
+        for model in (Book, ArchivedBook, BookCount, BookChange):
+            model.objects.using(source).filter(owner_id=owner_id).delete()
+
+    reconcile_shard([owner_id], target)
+    return len(books)
@@ -1,5 +1,9 @@
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from core.models import Book, Author, Genre, Condition
+from core.fingerprints import book_fingerprint
+from core.models import Book, BookChange, Author, Genre, Condition
+from core.sharding import ensure_replicated, shard_for_owner
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -29,7 +33,27 @@ class ConditionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class BookSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Serialize only the `fields` given, rendering the relations listed in
+    `expand_fields` that are not in `expand` as primary keys.
+    """
+    expand_fields = ['author', 'genre', 'condition']
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is not None:
+            for name in self.expand_fields:
+                if name in self.fields and name not in expand:
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(
+                        read_only=True,
+                    )
+
+
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for books."""
 
     author = AuthorSerializer()
@@ -61,7 +85,7 @@ class BookSerializer(serializers.ModelSerializer):
         return book
 
 
-class BookDetailSerializer(serializers.ModelSerializer):
+class BookDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for detailed book view."""
 
     author = AuthorSerializer()
@@ -78,11 +102,15 @@ class BookDetailSerializer(serializers.ModelSerializer):
         genre_data = validated_data.pop('genre')
         condition_data = validated_data.pop('condition')
 
+        using = shard_for_owner(validated_data['owner'].pk)
         author, _ = Author.objects.get_or_create(name=author_data['name'])
+        self.check_duplicate(validated_data, author, using)
         genre, _ = Genre.objects.get_or_create(name=genre_data['name'])
         condition, _ = Condition.objects.get_or_create(name=condition_data['name'])
+        for lookup in (author, genre, condition):
+            ensure_replicated(type(lookup), [lookup.pk], using)
 
-        book = Book.objects.create(
+        book = Book.objects.db_manager(using).create(
             author=author,
             genre=genre,
             condition=condition,
@@ -91,26 +119,119 @@ class BookDetailSerializer(serializers.ModelSerializer):
 
         return book
 
+    def check_duplicate(self, validated_data, author, using):
+        """Reject a book the owner already listed."""
+        duplicate = Book.objects.using(using).filter(
+            owner=validated_data['owner'],
+            fingerprint=book_fingerprint(validated_data['title'], author.id),
+        ).values_list('id', flat=True).first()
+        if duplicate is not None:
+            raise serializers.ValidationError(
+                {'title': [f'You already listed this book (id {duplicate}).']},
+                code='duplicate',
+            )
+
     def update(self, instance, validated_data):
         """Update a book instance."""
         author_data = validated_data.pop('author', None)
         genre_data = validated_data.pop('genre', None)
         condition_data = validated_data.pop('condition', None)
 
+        update_fields = list(validated_data)
+
         if author_data:
             author, _ = Author.objects.get_or_create(name=author_data['name'])
             instance.author = author
+            update_fields.append('author')
 
         if genre_data:
             genre, _ = Genre.objects.get_or_create(name=genre_data['name'])
             instance.genre = genre
+            update_fields.append('genre')
 
         if condition_data:
             condition, _ = Condition.objects.get_or_create(name=condition_data['name'])
             instance.condition = condition
+            update_fields.append('condition')
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
+        using = instance._state.db
+        for field in ('author', 'genre', 'condition'):
+            if field in update_fields:
+                lookup = getattr(instance, field)
+                ensure_replicated(type(lookup), [lookup.pk], using)
+
+        # Write only the columns in the request, not the whole row.
+        if update_fields:
+            instance.save(update_fields=update_fields + ['updated_at'])
         return instance
+
+
+class BookBulkChangesSerializer(serializers.Serializer):
+    """Serializer for the changes applied by a bulk update."""
+
+    is_available = serializers.BooleanField(required=False)
+    pickup_location = serializers.CharField(max_length=255, required=False)
+    genre = GenreSerializer(required=False)
+    condition = ConditionSerializer(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('No changes were given.')
+        return attrs
+
+
+class BookBulkDeleteSerializer(serializers.Serializer):
+    """Serializer for the books selected by a bulk delete."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.BOOK_BULK_MAX_IDS,
+    )
+
+
+class BookBulkUpdateSerializer(BookBulkDeleteSerializer):
+    """Serializer for the books and changes of a bulk update."""
+
+    changes = BookBulkChangesSerializer()
+
+
+class BookBulkResultSerializer(serializers.Serializer):
+    """Serializer for the result of a bulk update or delete."""
+
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(
+        choices=['updated', 'deleted', 'not_found'],
+    )
+
+
+class BookChangeSerializer(serializers.ModelSerializer):
+    """
+    Serializer for book changes. `book` is the current state of the book,
+    null for deletions and archivals, and for books removed since the
+    change.
+    """
+
+    seq = serializers.IntegerField(source='id', read_only=True)
+    book = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BookChange
+        fields = ['seq', 'action', 'book_id', 'created_at', 'book']
+        read_only_fields = fields
+
+    @extend_schema_field(BookSerializer(allow_null=True))
+    def get_book(self, change):
+        book = self.context['books'].get(change.book_id)
+        return None if book is None else BookSerializer(book).data
+
+
+class BookChangesSerializer(serializers.Serializer):
+    """Serializer for a page of book changes."""
+
+    changes = BookChangeSerializer(many=True)
+    cursor = serializers.IntegerField()
+    has_more = serializers.BooleanField()
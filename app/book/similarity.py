@@ -0,0 +1,376 @@
+"""
+Offline computation of similar books.
+
+Each book is a sparse vector of its author, its genre and the tf-idf
+weighted tokens of its title, normalized so that the dot product of two
+books is their cosine similarity. Scores against the available books
+are computed a block of rows at a time and the top K kept per book.
+
+A full build saves the vectors and the token frequencies they were
+weighted with, so that incremental runs only vectorize the books created
+since. Availability and title changes of existing books, and the token
+weights, are only refreshed by the next full build.
+"""
+import json
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from django.conf import settings
+from django.db import transaction
+
+from core.models import Book, BookNeighbors
+from core.sharding import shard_aliases
+
+
+TOKEN_RE = re.compile(r'\w{2,}')
+
+# Share of each book vector given to each kind of feature.
+AUTHOR_WEIGHT = 1.0
+GENRE_WEIGHT = 0.6
+TITLE_WEIGHT = 0.8
+
+BOOK_FIELDS = ['id', 'author_id', 'genre_id', 'title', 'is_available']
+
+
+def tokenize(title):
+    """Return the distinct lowercase word tokens of a title."""
+    return set(TOKEN_RE.findall(title.lower()))
+
+
+class Vectorizer:
+    """Feature columns and title token frequencies of the vectors."""
+
+    def __init__(self, features=None, frequency=None, total=0):
+        # Column of each ('author', id), ('genre', id) and ('token', str).
+        self.features = features or {}
+        self.frequency = Counter(frequency or {})
+        self.total = total
+
+    @classmethod
+    def fit(cls, rows):
+        """Return a vectorizer weighting tokens by their rows' frequency."""
+        frequency = Counter(
+            token for row in rows for token in tokenize(row[3])
+        )
+        return cls(frequency=frequency, total=len(rows))
+
+    def column(self, feature):
+        return self.features.setdefault(feature, len(self.features))
+
+    def transform(self, rows):
+        """Return the normalized vectors of rows, adding new features."""
+        total = max(self.total, 1)
+        data, indices, indptr = [], [], [0]
+        for row in rows:
+            indices += [
+                self.column(('author', row[1])),
+                self.column(('genre', row[2])),
+            ]
+            data += [AUTHOR_WEIGHT, GENRE_WEIGHT]
+            # Tokens unseen when fitted weigh as much as the rarest.
+            weights = {
+                token: math.log(total / max(self.frequency[token], 1)) + 1
+                for token in tokenize(row[3])
+            }
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for token, weight in weights.items():
+                indices.append(self.column(('token', token)))
+                data.append(TITLE_WEIGHT * weight / norm)
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (
+                np.array(data, dtype=np.float32),
+                np.array(indices, dtype=np.int64),
+                np.array(indptr, dtype=np.int64),
+            ),
+            shape=(len(rows), len(self.features)),
+        )
+        norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+        norms[norms == 0] = 1.0
+        return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+def widen(matrix, columns):
+    """Return a CSR matrix with empty columns added up to `columns`."""
+    return sparse.csr_matrix(
+        (matrix.data, matrix.indices, matrix.indptr),
+        shape=(matrix.shape[0], columns),
+    )
+
+
+class BookVectors:
+    """Feature vectors of all books."""
+
+    def __init__(self, ids, available, matrix, vectorizer, shards=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.available = np.asarray(available, dtype=bool)
+        self.matrix = matrix
+        self.vectorizer = vectorizer
+        # Database of each book id, where its neighbors are saved.
+        self.shards = shards or {}
+        self.position = {
+            book_id: i for i, book_id in enumerate(self.ids.tolist())
+        }
+
+    @classmethod
+    def from_rows(cls, rows, shards=None):
+        """Fit a vectorizer to rows and return their vectors."""
+        vectorizer = Vectorizer.fit(rows)
+        return cls(
+            [row[0] for row in rows],
+            [row[4] for row in rows],
+            vectorizer.transform(rows),
+            vectorizer,
+            shards,
+        )
+
+    @classmethod
+    def load(cls, chunk_size=5000):
+        """Build the vectors of every book on every shard."""
+        rows, shards = [], {}
+        for using in shard_aliases():
+            for row in Book.objects.using(using).order_by('id').values_list(
+                *BOOK_FIELDS,
+            ).iterator(chunk_size=chunk_size):
+                rows.append(row)
+                shards[row[0]] = using
+        return cls.from_rows(rows, shards)
+
+    def add(self, rows, shards):
+        """Append the vectors of new books and return their positions."""
+        start = len(self.ids)
+        added = self.vectorizer.transform(rows)
+        columns = len(self.vectorizer.features)
+        self.matrix = sparse.vstack([
+            widen(self.matrix, columns),
+            added,
+        ]).tocsr()
+        self.ids = np.concatenate([
+            self.ids,
+            np.array([row[0] for row in rows], dtype=np.int64),
+        ])
+        self.available = np.concatenate([
+            self.available,
+            np.array([row[4] for row in rows], dtype=bool),
+        ])
+        self.shards.update(shards)
+        for offset, row in enumerate(rows):
+            self.position[row[0]] = start + offset
+        return list(range(start, len(self.ids)))
+
+    def save(self, path):
+        """Write the vectors and their vectorizer to a file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        aliases = sorted(set(self.shards.values()))
+        meta = {
+            'features': list(self.vectorizer.features),
+            'frequency': self.vectorizer.frequency,
+            'total': self.vectorizer.total,
+            'aliases': aliases,
+        }
+        # Written next to the file and moved over it, so a failed run
+        # leaves the previous vectors.
+        partial = path.with_name(f'{path.name}.partial')
+        with open(partial, 'wb') as file:
+            np.savez(
+                file,
+                ids=self.ids,
+                available=self.available,
+                shards=np.array(
+                    [
+                        aliases.index(self.shards[book_id])
+                        for book_id in self.ids.tolist()
+                    ],
+                    dtype=np.int32,
+                ),
+                data=self.matrix.data,
+                indices=self.matrix.indices,
+                indptr=self.matrix.indptr,
+                meta=np.array(json.dumps(meta)),
+            )
+        partial.replace(path)
+
+    @classmethod
+    def read(cls, path):
+        """Return the vectors saved to a file, or None if there are none."""
+        if not path.exists():
+            return None
+        with np.load(path) as saved:
+            meta = json.loads(str(saved['meta']))
+            features = {
+                tuple(feature): column
+                for column, feature in enumerate(meta['features'])
+            }
+            ids = saved['ids']
+            matrix = sparse.csr_matrix(
+                (saved['data'], saved['indices'], saved['indptr']),
+                shape=(len(ids), len(features)),
+            )
+            shards = dict(zip(
+                ids.tolist(),
+                [meta['aliases'][index] for index in saved['shards']],
+            ))
+            return cls(
+                ids,
+                saved['available'],
+                matrix,
+                Vectorizer(features, meta['frequency'], meta['total']),
+                shards,
+            )
+
+
+def top_neighbors(vectors, rows, k, block_size=256):
+    """
+    Yield (book id, [[neighbor id, score], ...]) for the books at the
+    given row positions, against all available books.
+    """
+    candidates = np.flatnonzero(vectors.available)
+    targets = vectors.matrix[candidates].T.tocsc()
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        scores = (vectors.matrix[block] @ targets).toarray()
+        for offset, row in enumerate(block):
+            row_scores = scores[offset]
+            # A book is not its own neighbor.
+            row_scores[candidates == row] = 0
+            count = min(k, np.count_nonzero(row_scores))
+            if not count:
+                yield int(vectors.ids[row]), []
+                continue
+            best = np.argpartition(-row_scores, count - 1)[:count]
+            best = best[np.argsort(-row_scores[best], kind='stable')]
+            neighbor_ids = vectors.ids[candidates[best]]
+            yield int(vectors.ids[row]), [
+                [int(book_id), round(float(score), 4)]
+                for book_id, score in zip(neighbor_ids, row_scores[best])
+            ]
+
+
+def merge_neighbors(current, new, k):
+    """Return the top k of two neighbor lists."""
+    merged = {book_id: score for book_id, score in current}
+    merged.update({book_id: score for book_id, score in new})
+    best = sorted(merged.items(), key=lambda item: -item[1])[:k]
+    return [[book_id, score] for book_id, score in best]
+
+
+def stored_neighbors(book_ids, shards):
+    """Return the saved neighbors of books, read from the shard of each."""
+    by_shard = {}
+    for book_id in book_ids:
+        by_shard.setdefault(shards[book_id], []).append(book_id)
+    stored = {}
+    for using, shard_ids in by_shard.items():
+        stored.update(
+            BookNeighbors.objects.using(using).filter(
+                book_id__in=shard_ids,
+            ).values_list('book_id', 'neighbors')
+        )
+    return stored
+
+
+def save_neighbors(items, shards, batch_size=1000):
+    """
+    Save (book id, neighbors) pairs on the database of each book, given
+    by `shards`, replacing existing rows.
+    """
+    by_shard = {}
+    for book_id, neighbors in items:
+        by_shard.setdefault(shards[book_id], []).append((book_id, neighbors))
+    saved = 0
+    for using, shard_items in by_shard.items():
+        for start in range(0, len(shard_items), batch_size):
+            batch = dict(shard_items[start:start + batch_size])
+            with transaction.atomic(using=using):
+                # Skip books deleted since they were loaded.
+                existing = Book.objects.using(using).filter(
+                    id__in=batch,
+                ).values_list('id', flat=True)
+                BookNeighbors.objects.using(using).filter(
+                    book_id__in=batch,
+                ).delete()
+                BookNeighbors.objects.using(using).bulk_create([
+                    BookNeighbors(book_id=book_id, neighbors=batch[book_id])
+                    for book_id in existing
+                ])
+        saved += len(shard_items)
+    return saved
+
+
+def build_all(k, block_size=256):
+    """
+    Compute the neighbors of every book and save the vectors for later
+    incremental runs. Returns the count saved.
+    """
+    vectors = BookVectors.load()
+    rows = list(range(len(vectors.ids)))
+    saved = save_neighbors(
+        top_neighbors(vectors, rows, k, block_size),
+        vectors.shards,
+    )
+    vectors.save(settings.BOOK_VECTORS_PATH)
+    return saved
+
+
+def new_book_rows(vectors):
+    """Return the rows of books without neighbors, and their shards."""
+    rows, shards = [], {}
+    for using in shard_aliases():
+        for row in Book.objects.using(using).filter(
+            neighbors__isnull=True,
+        ).order_by('id').values_list(*BOOK_FIELDS):
+            if row[0] not in vectors.position:
+                rows.append(row)
+                shards[row[0]] = using
+    return rows, shards
+
+
+def refresh_new(k, block_size=256):
+    """
+    Compute the neighbors of books that have none yet, and add the new
+    available books to the lists of existing books they beat, vectorizing
+    only the new books. Falls back to a full build if no vectors were
+    saved. Returns the count of lists saved.
+    """
+    vectors = BookVectors.read(settings.BOOK_VECTORS_PATH)
+    if vectors is None:
+        return build_all(k, block_size)
+    rows, shards = new_book_rows(vectors)
+    if not rows:
+        return 0
+    new_rows = vectors.add(rows, shards)
+    updates = dict(top_neighbors(vectors, new_rows, k, block_size))
+
+    # Scores of the known books against the new available books only.
+    new_available = [row for row in new_rows if vectors.available[row]]
+    if new_available:
+        targets = vectors.matrix[new_available].T.tocsc()
+        new_ids = vectors.ids[new_available]
+        known_rows = list(range(new_rows[0]))
+        for start in range(0, len(known_rows), block_size):
+            block = known_rows[start:start + block_size]
+            scores = (vectors.matrix[block] @ targets).toarray()
+            matched = {
+                int(vectors.ids[row]): scores[offset]
+                for offset, row in enumerate(block)
+                if scores[offset].any()
+            }
+            stored = stored_neighbors(matched, vectors.shards)
+            for book_id, book_scores in matched.items():
+                current = stored.get(book_id, [])
+                floor = current[-1][1] if len(current) >= k else 0
+                better = [
+                    [int(new_ids[i]), round(float(score), 4)]
+                    for i, score in enumerate(book_scores)
+                    if score > floor
+                ]
+                if better:
+                    updates[book_id] = merge_neighbors(current, better, k)
+    saved = save_neighbors(updates.items(), vectors.shards)
+    vectors.save(settings.BOOK_VECTORS_PATH)
+    return saved
@@ -0,0 +1,128 @@
+"""
+ASGI app streaming newly available books as server-sent events.
+
+Served outside Django's request handling so that each open stream costs a
+queue in the worker's event loop, not a thread.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+
+from book.events import Subscriber, hub
+from user.tokens import read_access_token, revocations
+
+
+def authenticate(headers, query):
+    """
+    Return the user id of the access token in the Authorization header or
+    the `token` query parameter, which browser EventSource has to use.
+    """
+    token = None
+    auth = headers.get(b'authorization', b'').split()
+    if len(auth) == 2 and auth[0].lower() == b'bearer':
+        token = auth[1].decode('latin-1')
+    elif query.get('token'):
+        token = query['token'][0]
+    if token is None:
+        return None
+
+    try:
+        claims = read_access_token(token)
+    except signing.BadSignature:
+        return None
+    if revocations.is_revoked(claims['rid']):
+        return None
+    return claims['uid']
+
+
+def format_event(event):
+    """Return a book event in the event stream format."""
+    data = json.dumps(event, separators=(',', ':'))
+    return f'id: {event["id"]}\nevent: book\ndata: {data}\n\n'.encode()
+
+
+async def send_error(send, status, message):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'detail': message}).encode(),
+    })
+
+
+async def wait_for_disconnect(receive):
+    """Return once the client disconnects, skipping the request body."""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def book_stream(scope, receive, send):
+    """
+    Stream available books of other users as they are created or updated,
+    optionally filtered by `genre` (repeatable) and `location`.
+    """
+    headers = dict(scope['headers'])
+    query = parse_qs(scope['query_string'].decode())
+    user_id = await sync_to_async(authenticate)(headers, query)
+    if user_id is None:
+        await send_error(send, 401, 'Invalid or missing access token.')
+        return
+
+    subscriber = Subscriber(
+        user_id,
+        genres=query.get('genre', []),
+        location=query.get('location', [None])[0],
+        maxsize=settings.BOOK_STREAM_QUEUE_SIZE,
+    )
+    hub.subscribe(subscriber)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'retry: 5000\n\n',
+            'more_body': True,
+        })
+        while not subscriber.overflowed:
+            next_event = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait(
+                {next_event, disconnected},
+                timeout=settings.BOOK_STREAM_HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                next_event.cancel()
+                return
+            if next_event in done:
+                body = format_event(next_event.result())
+            else:
+                next_event.cancel()
+                body = b': ping\n\n'
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+        # Fell too far behind: end the stream so the client reconnects
+        # and catches up from the change feed.
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        hub.unsubscribe(subscriber)
@@ -1,38 +1,16 @@
-from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Author, Genre, Condition, Book
+from core.models import Book
+from core.tests.factories import create_user, create_books
 from book.serializers import BookSerializer
 
 BOOKS_URL = reverse('book:book-list')
 
 
-def create_author(name='Test Author'):
-    return Author.objects.create(name=name)
-
-
-def create_genre(name='Test Genre'):
-    return Genre.objects.create(name=name)
-
-
-def create_condition(name='Test Condition'):
-    return Condition.objects.create(name=name)
-
-
-def create_book(user, author, genre, condition, **params):
-    defaults = {
-        'title': 'Sample book title',
-        'pickup_location': 'Sample pickup location',
-        'is_available': True,
-    }
-    defaults.update(params)
-    return Book.objects.create(owner=user, author=author, genre=genre, condition=condition, **defaults)
-
-
 class PublicBookAPITests(TestCase):
     """Test unauthenticated book API access."""
 
@@ -50,13 +28,7 @@ class PrivateBookAPITests(TestCase):
 
     @classmethod
     def setUpTestData(cls):
-        cls.user = get_user_model().objects.create_user(
-            email='user@example.com',
-            password='testpass123',
-        )
-        cls.author = create_author()
-        cls.genre = create_genre()
-        cls.condition = create_condition()
+        cls.user = create_user()
 
     def setUp(self):
         self.client = APIClient()
@@ -64,8 +36,7 @@ class PrivateBookAPITests(TestCase):
 
     def test_retrieve_books(self):
         """Test retrieving a list of books."""
-        create_book(user=self.user, author=self.author, genre=self.genre, condition=self.condition)
-        create_book(user=self.user, author=self.author, genre=self.genre, condition=self.condition)
+        create_books(self.user, 2)
 
         res = self.client.get(BOOKS_URL)
 
@@ -76,12 +47,9 @@ class PrivateBookAPITests(TestCase):
 
     def test_book_list_limited_to_user(self):
         """Test that only books for the authenticated user are returned."""
-        other_user = get_user_model().objects.create_user(
-            email='other@example.com',
-            password='password123',
-        )
-        create_book(user=other_user, author=self.author, genre=self.genre, condition=self.condition)
-        create_book(user=self.user, author=self.author, genre=self.genre, condition=self.condition)
+        other_user = create_user()
+        create_books(other_user)
+        create_books(self.user)
 
         res = self.client.get(BOOKS_URL)
 
@@ -110,7 +78,7 @@ class PrivateBookAPITests(TestCase):
 
     def test_update_book(self):
         """Test updating a book."""
-        book = create_book(user=self.user, author=self.author, genre=self.genre, condition=self.condition)
+        [book] = create_books(self.user)
         new_title = 'Updated Book Title'
         payload = {
             'title': new_title,
@@ -130,7 +98,7 @@ class PrivateBookAPITests(TestCase):
 
     def test_partial_update_book(self):
         """Test partially updating a book."""
-        book = create_book(user=self.user, author=self.author, genre=self.genre, condition=self.condition)
+        [book] = create_books(self.user)
         new_title = 'Updated Book Title'
         payload = {'title': new_title}
 
@@ -143,7 +111,7 @@ class PrivateBookAPITests(TestCase):
 
     def test_delete_book(self):
         """Test deleting a book."""
-        book = create_book(user=self.user, author=self.author, genre=self.genre, condition=self.condition)
+        [book] = create_books(self.user)
 
         url = reverse('book:book-detail', args=[book.id])
         response = self.client.delete(url)
@@ -0,0 +1,103 @@
+"""
+Tests for archiving unavailable books.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core.models import (
+    Author,
+    Genre,
+    Condition,
+    Book,
+    ArchivedBook,
+    BookChange,
+)
+
+BOOKS_URL = reverse('book:book-list')
+
+
+class ArchiveBooksTests(TestCase):
+    """Test moving books to the archive table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        cls.author = Author.objects.create(name='Test Author')
+        cls.genre = Genre.objects.create(name='Test Genre')
+        cls.condition = Condition.objects.create(name='Test Condition')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.old = self.create_book('Old', is_available=False, age=200)
+        self.recent = self.create_book('Recent', is_available=False, age=1)
+        self.available = self.create_book('Available', age=200)
+
+    def create_book(self, title, is_available=True, age=0):
+        book = Book.objects.create(
+            owner=self.user,
+            title=title,
+            author=self.author,
+            genre=self.genre,
+            condition=self.condition,
+            pickup_location='Library',
+            is_available=is_available,
+        )
+        Book.objects.filter(id=book.id).update(
+            updated_at=timezone.now() - timedelta(days=age),
+        )
+        return book
+
+    def test_archive_old_unavailable_books(self):
+        """Test only books unavailable for long are moved."""
+        call_command('archive_books', batch_size=1, stdout=StringIO())
+
+        self.assertFalse(Book.objects.filter(id=self.old.id).exists())
+        archived = ArchivedBook.objects.get()
+        self.assertEqual(archived.id, self.old.id)
+        self.assertEqual(archived.title, 'Old')
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertTrue(BookChange.objects.filter(
+            book_id=self.old.id,
+            action=BookChange.ARCHIVED,
+        ).exists())
+
+    def test_list_includes_archived_on_request(self):
+        """Test archived books are only listed when asked for."""
+        call_command('archive_books', stdout=StringIO())
+
+        res = self.client.get(BOOKS_URL)
+        self.assertNotIn(self.old.id, [book['id'] for book in res.data])
+
+        res = self.client.get(
+            BOOKS_URL,
+            {'include_archived': 'true', 'fields': 'id,title'},
+        )
+        self.assertEqual(
+            [book['id'] for book in res.data],
+            [self.available.id, self.recent.id, self.old.id],
+        )
+        self.assertEqual(res.data[-1], {'id': self.old.id, 'title': 'Old'})
+
+    def test_update_sets_updated_at(self):
+        """Test changing a book moves its updated_at forward."""
+        url = reverse('book:book-detail', args=[self.old.id])
+
+        self.client.patch(url, {'pickup_location': 'Cafe'}, format='json')
+
+        self.old.refresh_from_db()
+        self.assertGreater(
+            self.old.updated_at,
+            timezone.now() - timedelta(minutes=1),
+        )
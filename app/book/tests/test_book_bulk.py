@@ -0,0 +1,147 @@
+"""
+Tests for bulk book updates and deletes.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Author, Genre, Condition, Book, BookChange
+from book.counters import reconcile
+
+BULK_URL = reverse('book:book-bulk')
+
+
+class BookBulkTests(TestCase):
+    """Test changing many books at once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        cls.other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        cls.author = Author.objects.create(name='Test Author')
+        cls.genre = Genre.objects.create(name='Test Genre')
+        cls.condition = Condition.objects.create(name='Test Condition')
+        cls.books = [cls.create_book(cls.user) for _ in range(3)]
+        cls.other_book = cls.create_book(cls.other)
+        reconcile([cls.user.id, cls.other.id])
+
+    @classmethod
+    def create_book(cls, owner):
+        return Book.objects.create(
+            owner=owner,
+            title='Sample book',
+            author=cls.author,
+            genre=cls.genre,
+            condition=cls.condition,
+            pickup_location='Library',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_update(self):
+        """Test changes are applied to the user's books only."""
+        ids = [book.id for book in self.books[:2]] + [self.other_book.id]
+
+        res = self.client.patch(
+            BULK_URL,
+            {'ids': ids, 'changes': {'is_available': False}},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result['status'] for result in res.data],
+            ['updated', 'updated', 'not_found'],
+        )
+        self.assertEqual(
+            Book.objects.filter(is_available=False).count(),
+            2,
+        )
+        self.assertTrue(
+            Book.objects.get(id=self.other_book.id).is_available,
+        )
+        self.assertEqual(
+            BookChange.objects.filter(action=BookChange.UPDATED).count(),
+            2,
+        )
+
+    def test_bulk_update_single_update_query(self):
+        """Test one UPDATE is run whatever the number of books."""
+        ids = [book.id for book in self.books]
+
+        with self.assertNumQueries(7) as queries:
+            self.client.patch(
+                BULK_URL,
+                {'ids': ids, 'changes': {'pickup_location': 'Cafe'}},
+                format='json',
+            )
+
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            Book.objects.filter(pickup_location='Cafe').count(),
+            3,
+        )
+
+    def test_bulk_update_genre(self):
+        """Test relations are changed by name."""
+        self.client.patch(
+            BULK_URL,
+            {'ids': [self.books[0].id], 'changes': {'genre': {'name': 'New'}}},
+            format='json',
+        )
+
+        book = Book.objects.get(id=self.books[0].id)
+        self.assertEqual(book.genre.name, 'New')
+
+    def test_bulk_update_requires_changes(self):
+        """Test an update without changes is rejected."""
+        res = self.client.patch(
+            BULK_URL,
+            {'ids': [self.books[0].id], 'changes': {}},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_delete(self):
+        """Test the user's books are deleted."""
+        ids = [self.books[0].id, self.other_book.id]
+
+        res = self.client.delete(BULK_URL, {'ids': ids}, format='json')
+
+        self.assertEqual(
+            [result['status'] for result in res.data],
+            ['deleted', 'not_found'],
+        )
+        self.assertFalse(Book.objects.filter(id=self.books[0].id).exists())
+        self.assertTrue(Book.objects.filter(id=self.other_book.id).exists())
+
+    def test_partial_update_writes_changed_fields(self):
+        """Test a PATCH only writes the columns it changes."""
+        url = reverse('book:book-detail', args=[self.books[0].id])
+
+        # The book row, its owner's lock, its change and its owner's counts.
+        with self.assertNumQueries(7) as queries:
+            self.client.patch(url, {'is_available': False}, format='json')
+
+        update = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE')
+        )
+        self.assertIn('is_available', update)
+        self.assertNotIn('title', update)
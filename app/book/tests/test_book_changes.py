@@ -0,0 +1,268 @@
+"""
+Tests for the book change feed.
+"""
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from book import changes as book_changes
+from core.models import (
+    Author,
+    Genre,
+    Condition,
+    Book,
+    BookChange,
+    BookChangeCompaction,
+)
+
+BOOKS_URL = reverse('book:book-list')
+CHANGES_URL = reverse('book:book-changes')
+
+
+def detail_url(book_id):
+    """Create and return a book detail URL."""
+    return reverse('book:book-detail', args=[book_id])
+
+
+def book_payload(**params):
+    """Return the payload for creating a book."""
+    payload = {
+        'title': 'Sample book',
+        'author': {'name': 'Test Author'},
+        'genre': {'name': 'Test Genre'},
+        'condition': {'name': 'Test Condition'},
+        'pickup_location': 'Library',
+        'is_available': True,
+    }
+    payload.update(params)
+    return payload
+
+
+class BookChangesTests(TestCase):
+    """Test reading book changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_changes(self, since):
+        res = self.client.get(CHANGES_URL, {'since': since})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_writes_are_recorded_in_order(self):
+        """Test create, update and delete each append a change."""
+        res = self.client.post(BOOKS_URL, book_payload(), format='json')
+        book_id = res.data['id']
+        self.client.patch(
+            detail_url(book_id),
+            {'is_available': False},
+            format='json',
+        )
+        self.client.delete(detail_url(book_id))
+
+        data = self.get_changes(0)
+
+        self.assertEqual(
+            [(c['action'], c['book_id']) for c in data['changes']],
+            [
+                (BookChange.CREATED, book_id),
+                (BookChange.UPDATED, book_id),
+                (BookChange.DELETED, book_id),
+            ],
+        )
+        self.assertIsNone(data['changes'][-1]['book'])
+        self.assertFalse(data['has_more'])
+
+    def test_changes_written_under_owner_lock(self):
+        """Test writes lock the owner, so changes commit in id order."""
+        with patch.object(
+            book_changes,
+            'lock_owner',
+            wraps=book_changes.lock_owner,
+        ) as patched_lock:
+            self.client.post(BOOKS_URL, book_payload(), format='json')
+
+        patched_lock.assert_called_once_with(self.user.pk, 'default')
+
+    def test_delete_locks_book_before_owner(self):
+        """Test deletes take locks in the order updates do."""
+        book = self.client.post(BOOKS_URL, book_payload(), format='json')
+
+        with patch.object(
+            QuerySet,
+            'select_for_update',
+            autospec=True,
+            side_effect=QuerySet.select_for_update,
+        ) as patched_lock:
+            self.client.delete(detail_url(book.data['id']))
+
+        locked = [call.args[0].model for call in patched_lock.call_args_list]
+        self.assertEqual(locked[:2], [Book, get_user_model()])
+
+    def test_changes_after_cursor(self):
+        """Test only changes after the cursor are returned."""
+        first = self.client.post(BOOKS_URL, book_payload(), format='json')
+        cursor = self.get_changes(0)['cursor']
+        self.client.patch(
+            detail_url(first.data['id']),
+            {'pickup_location': 'Cafe'},
+            format='json',
+        )
+
+        data = self.get_changes(cursor)
+
+        self.assertEqual(len(data['changes']), 1)
+        self.assertEqual(data['changes'][0]['book']['pickup_location'], 'Cafe')
+        self.assertEqual(self.get_changes(data['cursor'])['changes'], [])
+
+    def test_changes_limited_to_user(self):
+        """Test changes of other users' books are not returned."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        BookChange.objects.create(owner=other, book_id=1, action='created')
+
+        self.assertEqual(self.get_changes(0)['changes'], [])
+
+    def test_invalid_cursor(self):
+        """Test a non-integer cursor is rejected."""
+        res = self.client.get(CHANGES_URL, {'since': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CompactBookChangesTests(TestCase):
+    """Test compacting the change feed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        cls.book = Book.objects.create(
+            owner=cls.user,
+            title='Kept book',
+            author=Author.objects.create(name='Test Author'),
+            genre=Genre.objects.create(name='Test Genre'),
+            condition=Condition.objects.create(name='Test Condition'),
+            pickup_location='Library',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_change(self, book_id, action, age=timedelta()):
+        change = BookChange.objects.create(
+            owner=self.user,
+            book_id=book_id,
+            action=action,
+        )
+        BookChange.objects.filter(pk=change.pk).update(
+            created_at=timezone.now() - age,
+        )
+        return change
+
+    def test_superseded_changes_removed(self):
+        """Test only the latest change of each book is kept."""
+        self.create_change(self.book.id, BookChange.CREATED)
+        latest = self.create_change(self.book.id, BookChange.UPDATED)
+
+        call_command('compact_book_changes', stdout=StringIO())
+
+        self.assertEqual(
+            list(BookChange.objects.values_list('id', flat=True)),
+            [latest.id],
+        )
+        res = self.client.get(CHANGES_URL, {'since': 0})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_superseded_changes_selected_once(self):
+        """Test batches delete the changes found by a single query."""
+        for _ in range(3):
+            self.create_change(self.book.id, BookChange.UPDATED)
+
+        with CaptureQueriesContext(connection) as queries:
+            book_changes.compact(timezone.now(), batch_size=1)
+
+        self.assertEqual(BookChange.objects.count(), 1)
+        self.assertEqual(
+            sum('EXISTS' in query['sql'] for query in queries),
+            1,
+        )
+
+    def test_expired_deletions_reject_old_cursors(self):
+        """Test cursors before purged deletions get a 410 with a cursor."""
+        deleted = self.create_change(
+            self.book.id + 1,
+            BookChange.DELETED,
+            age=timedelta(days=60),
+        )
+        kept = self.create_change(self.book.id, BookChange.UPDATED)
+
+        call_command('compact_book_changes', stdout=StringIO())
+
+        self.assertFalse(BookChange.objects.filter(pk=deleted.pk).exists())
+        res = self.client.get(CHANGES_URL, {'since': 0})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        self.assertEqual(res.data['cursor'], kept.id)
+        res = self.client.get(CHANGES_URL, {'since': deleted.id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_purged_deletions_of_other_owner_keep_cursors(self):
+        """Test compacting one owner's deletions leaves others' cursors."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        deleted = BookChange.objects.create(
+            owner=other,
+            book_id=self.book.id + 1,
+            action=BookChange.DELETED,
+        )
+        BookChange.objects.filter(pk=deleted.pk).update(
+            created_at=timezone.now() - timedelta(days=40),
+        )
+
+        book_changes.compact(timezone.now() - timedelta(days=30))
+
+        self.assertFalse(BookChange.objects.filter(pk=deleted.pk).exists())
+        for _ in range(2):
+            res = self.client.get(CHANGES_URL, {'since': 0})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(other)
+        res = self.client.get(CHANGES_URL, {'since': 0})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        self.assertEqual(res.data['cursor'], deleted.id)
+
+    def test_expired_cursor_reaches_purged_sequence(self):
+        """Test the 410 cursor is past purged changes, so it is accepted."""
+        BookChangeCompaction.objects.create(purged_through=100)
+
+        res = self.client.get(CHANGES_URL, {'since': 0})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        self.assertEqual(res.data['cursor'], 100)
+        res = self.client.get(CHANGES_URL, {'since': res.data['cursor']})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
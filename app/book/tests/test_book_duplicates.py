@@ -0,0 +1,134 @@
+"""
+Tests for detecting books listed twice.
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.fingerprints import book_fingerprint, normalize_title
+from core.models import Book
+from core.tests.factories import create_books, create_user
+
+BOOKS_URL = reverse('book:book-list')
+
+
+def book_payload(title='The Hobbit', author='J. R. R. Tolkien'):
+    """Return the payload for creating a book."""
+    return {
+        'title': title,
+        'author': {'name': author},
+        'genre': {'name': 'Fantasy'},
+        'condition': {'name': 'Good'},
+        'pickup_location': 'Library',
+    }
+
+
+class FingerprintTests(TestCase):
+    """Test book fingerprints."""
+
+    def test_normalize_title(self):
+        """Test case, punctuation and spacing are ignored."""
+        self.assertEqual(
+            normalize_title('  The Hobbit:  or, There and Back Again!'),
+            'the hobbit or there and back again',
+        )
+
+    def test_fingerprint_depends_on_author(self):
+        """Test the same title by other authors differs."""
+        self.assertEqual(
+            book_fingerprint('The Hobbit', 1),
+            book_fingerprint('the hobbit.', 1),
+        )
+        self.assertNotEqual(
+            book_fingerprint('The Hobbit', 1),
+            book_fingerprint('The Hobbit', 2),
+        )
+
+    def test_fingerprint_follows_title(self):
+        """Test saving a new title updates the fingerprint."""
+        [book] = create_books(create_user(), title='Old title')
+
+        book.title = 'New title'
+        book.save(update_fields=['title'])
+
+        book.refresh_from_db()
+        self.assertEqual(
+            book.fingerprint,
+            book_fingerprint('New title', book.author_id),
+        )
+
+
+class DuplicateBookApiTests(TestCase):
+    """Test creating a book the user already listed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_duplicate_rejected(self):
+        """Test the same book with another spelling is rejected."""
+        res = self.client.post(BOOKS_URL, book_payload(), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(
+            BOOKS_URL,
+            book_payload(title='the hobbit!'),
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('title', res.data)
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_other_owner_not_duplicate(self):
+        """Test the same book of another user is accepted."""
+        self.client.post(BOOKS_URL, book_payload(), format='json')
+        client = APIClient()
+        client.force_authenticate(create_user())
+
+        res = client.post(BOOKS_URL, book_payload(), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_other_author_not_duplicate(self):
+        """Test the same title by another author is accepted."""
+        self.client.post(BOOKS_URL, book_payload(), format='json')
+
+        res = self.client.post(
+            BOOKS_URL,
+            book_payload(author='Someone Else'),
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+
+class FindDuplicateBooksCommandTests(TestCase):
+    """Test the find_duplicate_books command."""
+
+    def test_backfill_and_report(self):
+        """Test missing fingerprints are filled in and duplicates listed."""
+        user = create_user()
+        books = create_books(user, 2, title='The Hobbit')
+        create_books(user, title='Another book')
+        Book.objects.update(fingerprint='')
+
+        out = StringIO()
+        call_command('find_duplicate_books', batch_size=2, stdout=out)
+
+        self.assertFalse(Book.objects.filter(fingerprint='').exists())
+        self.assertIn('Filled in 3 book fingerprints.', out.getvalue())
+        self.assertIn(
+            f'listed as {books[0].id}, {books[1].id}',
+            out.getvalue(),
+        )
+        self.assertIn('Found 1 duplicated books.', out.getvalue())
@@ -0,0 +1,151 @@
+"""
+Tests for the streaming book export.
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from app.asgi import application
+from core.models import Author, Genre, Condition, Book
+from user.tokens import create_access_token, create_refresh_token
+
+
+def export_url(export_format):
+    """Create and return a book export URL."""
+    return reverse('book:book-export', args=[export_format])
+
+
+def read_streaming(res):
+    """Return the full body of a streaming response as text."""
+    return b''.join(res.streaming_content).decode()
+
+
+class BookExportTests(TestCase):
+    """Test exporting books."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        author = Author.objects.create(name='Test Author')
+        genre = Genre.objects.create(name='Test Genre')
+        condition = Condition.objects.create(name='Test Condition')
+        for title in ['First, book', 'Second book']:
+            Book.objects.create(
+                owner=cls.user,
+                title=title,
+                author=author,
+                genre=genre,
+                condition=condition,
+                pickup_location='Tbilisi',
+            )
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        Book.objects.create(
+            owner=other_user,
+            title='Other book',
+            author=author,
+            genre=genre,
+            condition=condition,
+            pickup_location='Batumi',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_export_auth_required(self):
+        """Test that authentication is required for exports."""
+        res = APIClient().get(export_url('csv'))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_csv(self):
+        """Test exporting the user's books as CSV."""
+        res = self.client.get(export_url('csv'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(read_streaming(res))))
+        self.assertEqual(
+            [row['title'] for row in rows],
+            ['Second book', 'First, book'],
+        )
+        self.assertEqual(rows[0]['author'], 'Test Author')
+        self.assertEqual(rows[0]['is_available'], 'True')
+
+    def test_export_ndjson(self):
+        """Test exporting the user's books as NDJSON."""
+        res = self.client.get(export_url('ndjson'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [
+            json.loads(line)
+            for line in read_streaming(res).splitlines()
+        ]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['title'], 'First, book')
+        self.assertEqual(rows[1]['genre'], 'Test Genre')
+        self.assertIs(rows[1]['is_available'], True)
+
+    def test_export_unknown_format(self):
+        """Test that unsupported export formats are not routed."""
+        res = self.client.get('/api/book/books/export/xml/')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_through_asgi(self):
+        """Test exports stream their rows when served over ASGI."""
+        _, refresh_token = create_refresh_token(self.user)
+        token = create_access_token(refresh_token)
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': export_url('csv'),
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Bearer {token}'.encode()),
+            ],
+        }
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        # Keep the test transaction's connection open, as the test
+        # clients do.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            async_to_sync(application)(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        self.assertEqual(sent[0]['status'], status.HTTP_200_OK)
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(
+            [row['title'] for row in rows],
+            ['Second book', 'First, book'],
+        )
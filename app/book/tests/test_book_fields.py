@@ -0,0 +1,95 @@
+"""
+Tests for sparse fieldsets on the book endpoints.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Author, Genre, Condition, Book
+
+BOOKS_URL = reverse('book:book-list')
+
+
+class SparseFieldsTests(TestCase):
+    """Test requesting a subset of book fields."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        cls.author = Author.objects.create(name='Test Author')
+        cls.genre = Genre.objects.create(name='Test Genre')
+        cls.condition = Condition.objects.create(name='Test Condition')
+        for title in ['First book', 'Second book']:
+            cls.book = Book.objects.create(
+                owner=cls.user,
+                title=title,
+                author=cls.author,
+                genre=cls.genre,
+                condition=cls.condition,
+                pickup_location='Library',
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_default_response_unchanged(self):
+        """Test all fields with nested relations are returned by default."""
+        res = self.client.get(BOOKS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data[0]['author'],
+            {'id': self.author.id, 'name': 'Test Author'},
+        )
+        self.assertIn('pickup_location', res.data[0])
+
+    def test_fields(self):
+        """Test only the requested fields are returned."""
+        res = self.client.get(BOOKS_URL, {'fields': 'id,title,is_available'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data[0],
+            {'id': self.book.id, 'title': 'Second book', 'is_available': True},
+        )
+
+    def test_unexpanded_relations_as_ids(self):
+        """Test relations not expanded are returned as ids without joins."""
+        with self.assertNumQueries(1) as queries:
+            res = self.client.get(
+                BOOKS_URL,
+                {'fields': 'id,author,genre', 'expand': 'genre'},
+            )
+
+        self.assertEqual(res.data[0]['author'], self.author.id)
+        self.assertEqual(res.data[0]['genre']['name'], 'Test Genre')
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('core_genre', sql)
+        self.assertNotIn('core_author', sql)
+        self.assertNotIn('pickup_location', sql)
+
+    def test_retrieve_fields(self):
+        """Test sparse fields apply to a single book."""
+        url = reverse('book:book-detail', args=[self.book.id])
+
+        res = self.client.get(url, {'fields': 'title'})
+
+        self.assertEqual(res.data, {'title': 'Second book'})
+
+    def test_unknown_fields_rejected(self):
+        """Test unknown field and relation names are rejected."""
+        res = self.client.get(
+            BOOKS_URL,
+            {'fields': 'title,secret', 'expand': 'owner'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+        self.assertIn('expand', res.data)
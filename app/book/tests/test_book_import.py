@@ -0,0 +1,171 @@
+"""
+Tests for importing books.
+"""
+import io
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Author, Book, BookChange
+
+IMPORT_URL = reverse('book:book-import')
+
+CSV_CONTENT = (
+    'title,author,genre,condition,pickup_location,is_available\n'
+    'Book one,Author A,Novel,Good,Tbilisi,True\n'
+    'Book two,Author A,Novel,Used,Tbilisi,False\n'
+    ',Author B,Novel,Used,Tbilisi,True\n'
+    'Book three,Author B,Poetry,Good,Batumi,\n'
+)
+
+NDJSON_CONTENT = (
+    '{"title": "Book one", "author": "Author A", "genre": "Novel", '
+    '"condition": "Good", "pickup_location": "Tbilisi"}\n'
+    '\n'
+    'not json\n'
+)
+
+
+class BookImportApiTests(TestCase):
+    """Test importing books through the API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_import_csv(self):
+        """Test importing books from a CSV upload."""
+        Author.objects.create(name='Author A')
+        upload = SimpleUploadedFile('books.csv', CSV_CONTENT.encode())
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 3)
+        self.assertEqual([e['row'] for e in res.data['errors']], [3])
+        books = Book.objects.filter(owner=self.user)
+        self.assertEqual(books.count(), 3)
+        self.assertFalse(books.get(title='Book two').is_available)
+        self.assertTrue(books.get(title='Book three').is_available)
+        self.assertEqual(Author.objects.filter(name='Author A').count(), 1)
+
+    def test_import_records_changes(self):
+        """Test imported books are added to the change feed."""
+        upload = SimpleUploadedFile('books.csv', CSV_CONTENT.encode())
+
+        self.client.post(IMPORT_URL, {'file': upload})
+
+        changes = BookChange.objects.filter(owner=self.user)
+        self.assertEqual(
+            sorted(changes.values_list('book_id', flat=True)),
+            sorted(
+                Book.objects.filter(owner=self.user).values_list(
+                    'id',
+                    flat=True,
+                )
+            ),
+        )
+        self.assertEqual(
+            set(changes.values_list('action', flat=True)),
+            {BookChange.CREATED},
+        )
+
+    def test_import_ndjson(self):
+        """Test importing books from an NDJSON upload."""
+        upload = SimpleUploadedFile('books.ndjson', NDJSON_CONTENT.encode())
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(len(res.data['errors']), 1)
+        book = Book.objects.get(owner=self.user)
+        self.assertEqual(book.author.name, 'Author A')
+
+    def test_import_csv_with_byte_order_mark(self):
+        """Test a BOM at the start of a CSV is not read as a header."""
+        upload = SimpleUploadedFile(
+            'books.csv',
+            CSV_CONTENT.encode('utf-8-sig'),
+        )
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 3)
+        self.assertEqual([e['row'] for e in res.data['errors']], [3])
+
+    def test_import_invalid_encoding(self):
+        """Test a file that is not UTF-8 is rejected."""
+        upload = SimpleUploadedFile(
+            'books.csv',
+            CSV_CONTENT.replace('one', '\xf6ne').encode('latin-1'),
+        )
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('file', res.data)
+        self.assertFalse(Book.objects.exists())
+
+    def test_import_unsupported_file(self):
+        """Test an error is returned for unsupported file types."""
+        upload = SimpleUploadedFile('books.xml', b'<books />')
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Book.objects.exists())
+
+
+class ImportBooksCommandTests(TestCase):
+    """Test the import_books management command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'books.csv')
+        with open(self.path, 'w') as books_file:
+            books_file.write(CSV_CONTENT)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test rows before the checkpoint are not imported again."""
+        checkpoint = os.path.join(self.tmp_dir.name, 'books.checkpoint')
+        with open(checkpoint, 'w') as checkpoint_file:
+            checkpoint_file.write('2')
+
+        call_command(
+            'import_books',
+            self.path,
+            owner=self.user.email,
+            chunk_size=1,
+            checkpoint=checkpoint,
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+        )
+
+        titles = Book.objects.values_list('title', flat=True)
+        self.assertEqual(sorted(titles), ['Book three'])
+        with open(checkpoint) as checkpoint_file:
+            self.assertEqual(checkpoint_file.read(), '4')
@@ -0,0 +1,32 @@
+"""
+Tests for profiling the memory of book lists.
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import ArchivedBook, Book
+
+
+class ProfileBookListTests(TestCase):
+    """Test the profile_book_list command."""
+
+    def test_profile_book_list(self):
+        """Test each serializer path is reported and books rolled back."""
+        out = StringIO()
+
+        call_command(
+            'profile_book_list',
+            books=20,
+            archived=5,
+            repeat=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        for label in ['nested', 'primary keys', 'sparse', 'with archived']:
+            self.assertIn(f'{label}:', output)
+        self.assertIn('Profiled 4 serializer paths.', output)
+        self.assertFalse(Book.objects.exists())
+        self.assertFalse(ArchivedBook.objects.exists())
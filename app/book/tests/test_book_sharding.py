@@ -0,0 +1,194 @@
+"""
+Tests for spreading books over shards by owner.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ArchivedBook, Author, Book, BookChange, BookCount
+from core.sharding import (
+    SHARD_ID_SPAN,
+    reserve_id_range,
+    shard_for_id,
+    shard_for_owner,
+)
+from core.tests.factories import create_user
+
+BOOKS_URL = reverse('book:book-list')
+CHANGES_URL = reverse('book:book-changes')
+SHARDS = ['default', 'book_shard_1']
+
+
+def book_payload(title='Sample book'):
+    """Return the payload for creating a book."""
+    return {
+        'title': title,
+        'author': {'name': 'Test Author'},
+        'genre': {'name': 'Fiction'},
+        'condition': {'name': 'Good'},
+        'pickup_location': 'Library',
+    }
+
+
+def owner_on(shard):
+    """Create and return a user whose books belong on a shard."""
+    while True:
+        user = create_user()
+        if shard_for_owner(user.pk) == shard:
+            return user
+
+
+class ShardPlacementTests(SimpleTestCase):
+    """Test owners are placed by hashing."""
+
+    def test_single_database(self):
+        """Test every owner is on the default database without shards."""
+        with override_settings(BOOK_SHARDS=[]):
+            self.assertEqual(shard_for_owner(1), 'default')
+            self.assertEqual(shard_for_id(2 * SHARD_ID_SPAN), None)
+
+    def test_adding_shard_moves_owners_to_it_only(self):
+        """Test a new shard only takes owners from the existing ones."""
+        with override_settings(BOOK_SHARDS=['a', 'b']):
+            before = {owner: shard_for_owner(owner) for owner in range(500)}
+        with override_settings(BOOK_SHARDS=['a', 'b', 'c']):
+            after = {owner: shard_for_owner(owner) for owner in range(500)}
+
+        moved = [owner for owner in before if before[owner] != after[owner]]
+        self.assertTrue(moved)
+        self.assertTrue(all(after[owner] == 'c' for owner in moved))
+        self.assertEqual(set(before.values()), {'a', 'b'})
+
+    def test_shard_for_id(self):
+        """Test ids map to the shard of their range."""
+        with override_settings(BOOK_SHARDS=['a', 'b']):
+            self.assertEqual(shard_for_id(5), 'a')
+            self.assertEqual(shard_for_id(SHARD_ID_SPAN + 5), 'b')
+
+    def test_book_id_columns_fit_shard_ranges(self):
+        """Test every column holding book ids is as wide as the book id."""
+        book_id_type = Book._meta.pk.rel_db_type(connection)
+        for field in [
+            ArchivedBook._meta.pk,
+            BookChange._meta.get_field('book_id'),
+        ]:
+            with self.subTest(field=field):
+                self.assertEqual(field.db_type(connection), book_id_type)
+
+
+@override_settings(BOOK_SHARDS=SHARDS)
+class ShardedBookApiTests(TestCase):
+    """Test the book API with books spread over two databases."""
+    databases = set(SHARDS)
+
+    def setUp(self):
+        reserve_id_range('book_shard_1')
+        self.user = owner_on('book_shard_1')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_users_replicated(self):
+        """Test users are copied to every shard."""
+        users = get_user_model().objects.using('book_shard_1')
+
+        self.assertTrue(users.filter(pk=self.user.pk).exists())
+
+    def test_books_written_to_owner_shard(self):
+        """Test books, changes and counts are on the owner's shard."""
+        res = self.client.post(BOOKS_URL, book_payload(), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        book = Book.objects.using('book_shard_1').get(owner=self.user)
+        self.assertGreaterEqual(book.id, SHARD_ID_SPAN)
+        self.assertFalse(Book.objects.filter(owner=self.user).exists())
+        self.assertTrue(
+            Author.objects.using('book_shard_1').filter(
+                name='Test Author',
+            ).exists()
+        )
+        self.assertEqual(
+            BookChange.objects.using('book_shard_1').get().book_id,
+            book.id,
+        )
+        self.assertEqual(
+            BookCount.objects.using('book_shard_1').get().total,
+            1,
+        )
+
+    def test_books_read_from_owner_shard(self):
+        """Test reads, updates and deletes go to the owner's shard."""
+        self.client.post(BOOKS_URL, book_payload(), format='json')
+        book_id = Book.objects.using('book_shard_1').get().id
+        url = reverse('book:book-detail', args=[book_id])
+
+        res = self.client.get(BOOKS_URL)
+        self.assertEqual([book['id'] for book in res.data], [book_id])
+
+        res = self.client.patch(url, {'title': 'New title'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Book.objects.using('book_shard_1').exists())
+
+    def test_similar_across_shards(self):
+        """Test similar books are found on every shard."""
+        self.client.post(BOOKS_URL, book_payload(), format='json')
+        other = APIClient()
+        other.force_authenticate(owner_on('default'))
+        other.post(BOOKS_URL, book_payload('Other book'), format='json')
+        book_id = Book.objects.using('book_shard_1').get().id
+
+        res = self.client.get(reverse('book:book-similar', args=[book_id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [book['id'] for book in res.data],
+            [Book.objects.get().id],
+        )
+
+
+@override_settings(BOOK_SHARDS=SHARDS)
+class RebalanceBookShardsCommandTests(TestCase):
+    """Test moving books after the shards changed."""
+    databases = set(SHARDS)
+
+    def test_rebalance(self):
+        """Test an owner's books are moved with their ids."""
+        reserve_id_range('book_shard_1')
+        user = owner_on('book_shard_1')
+        client = APIClient()
+        client.force_authenticate(user)
+        with override_settings(BOOK_SHARDS=[]):
+            client.post(BOOKS_URL, book_payload(), format='json')
+            cursor = client.get(CHANGES_URL).data['cursor']
+        book = Book.objects.get(owner=user)
+
+        out = StringIO()
+        call_command('rebalance_book_shards', stdout=out)
+
+        self.assertIn('Moved 1 books of 1 owners.', out.getvalue())
+        self.assertFalse(Book.objects.filter(owner=user).exists())
+        moved = Book.objects.using('book_shard_1').get(owner=user)
+        self.assertEqual(moved.id, book.id)
+        self.assertEqual(moved.updated_at, book.updated_at)
+        self.assertEqual(
+            BookCount.objects.using('book_shard_1').get(owner=user).total,
+            1,
+        )
+
+        res = client.get(CHANGES_URL, {'since': cursor})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        res = client.get(BOOKS_URL)
+        self.assertEqual([book['id'] for book in res.data], [book.id])
+
+        out = StringIO()
+        call_command('rebalance_book_shards', stdout=out)
+        self.assertIn('Moved 0 books of 0 owners.', out.getvalue())
@@ -0,0 +1,151 @@
+"""
+Tests for similar book recommendations.
+"""
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from book.similarity import BookVectors, Vectorizer
+from core.models import Author, Genre, Condition, Book, BookNeighbors
+
+
+def similar_url(book_id):
+    """Create and return a similar books URL."""
+    return reverse('book:book-similar', args=[book_id])
+
+
+class SimilarBooksTests(TestCase):
+    """Test precomputing and listing similar books."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        cls.donor = get_user_model().objects.create_user(
+            email='donor@example.com',
+            password='testpass123',
+        )
+        cls.tolkien = Author.objects.create(name='Tolkien')
+        cls.austen = Author.objects.create(name='Austen')
+        cls.fantasy = Genre.objects.create(name='Fantasy')
+        cls.romance = Genre.objects.create(name='Romance')
+        cls.condition = Condition.objects.create(name='Good')
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.vectors_path = Path(tmp_dir.name) / 'book_vectors.npz'
+        vectors_settings = override_settings(
+            BOOK_VECTORS_PATH=self.vectors_path,
+        )
+        vectors_settings.enable()
+        self.addCleanup(vectors_settings.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.hobbit = self.create_book('The Hobbit', self.tolkien)
+        self.rings = self.create_book('The Fellowship of the Ring')
+        self.silmarillion = self.create_book('The Silmarillion')
+        self.emma = self.create_book('Emma', self.austen, self.romance)
+
+    def create_book(self, title, author=None, genre=None, **params):
+        defaults = {
+            'owner': self.donor,
+            'author': author or self.tolkien,
+            'genre': genre or self.fantasy,
+            'condition': self.condition,
+            'pickup_location': 'Library',
+        }
+        defaults.update(params)
+        return Book.objects.create(title=title, **defaults)
+
+    def similar_ids(self, book):
+        res = self.client.get(similar_url(book.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in res.data]
+
+    def test_similar_books_ranked(self):
+        """Test books sharing author and genre come first."""
+        self.silmarillion.is_available = False
+        self.silmarillion.save()
+
+        call_command('build_book_neighbors', '--full', stdout=StringIO())
+
+        self.assertEqual(BookNeighbors.objects.count(), 4)
+        ids = self.similar_ids(self.hobbit)
+        self.assertEqual(ids, [self.rings.id])
+
+    def test_own_books_excluded(self):
+        """Test the user's own books are not recommended."""
+        own = self.create_book('The Hobbit Again', owner=self.user)
+        call_command('build_book_neighbors', stdout=StringIO())
+
+        self.assertNotIn(own.id, self.similar_ids(self.hobbit))
+
+    def test_incremental_refresh(self):
+        """Test new books get neighbors and join existing lists."""
+        call_command('build_book_neighbors', stdout=StringIO())
+        computed_at = BookNeighbors.objects.get(book=self.emma).computed_at
+        persuasion = self.create_book('Persuasion', self.austen, self.romance)
+
+        call_command('build_book_neighbors', stdout=StringIO())
+
+        self.assertEqual(self.similar_ids(persuasion), [self.emma.id])
+        self.assertEqual(self.similar_ids(self.emma), [persuasion.id])
+        hobbit = BookNeighbors.objects.get(book=self.hobbit)
+        self.assertNotIn(
+            persuasion.id,
+            [book_id for book_id, _ in hobbit.neighbors],
+        )
+        self.assertGreater(
+            BookNeighbors.objects.get(book=self.emma).computed_at,
+            computed_at,
+        )
+
+    def test_incremental_refresh_vectorizes_new_books(self):
+        """Test incremental runs reuse the saved vectors of known books."""
+        call_command('build_book_neighbors', '--full', stdout=StringIO())
+        self.assertTrue(self.vectors_path.exists())
+        persuasion = self.create_book('Persuasion', self.austen, self.romance)
+
+        with patch.object(
+            Vectorizer,
+            'transform',
+            autospec=True,
+            side_effect=Vectorizer.transform,
+        ) as patched_transform, patch.object(BookVectors, 'load') as load:
+            call_command('build_book_neighbors', stdout=StringIO())
+
+        load.assert_not_called()
+        patched_transform.assert_called_once()
+        rows = patched_transform.call_args[0][1]
+        self.assertEqual([row[0] for row in rows], [persuasion.id])
+        saved = BookVectors.read(self.vectors_path)
+        self.assertIn(persuasion.id, saved.position)
+        self.assertEqual(self.similar_ids(persuasion), [self.emma.id])
+
+    def test_fallback_without_neighbors(self):
+        """Test books of the same author or genre are used until built."""
+        ids = self.similar_ids(self.emma)
+
+        self.assertEqual(ids, [])
+        self.assertEqual(
+            set(self.similar_ids(self.hobbit)),
+            {self.rings.id, self.silmarillion.id},
+        )
+
+    def test_invalid_limit(self):
+        """Test the limit has to be within the stored neighbors."""
+        res = self.client.get(similar_url(self.hobbit.id), {'limit': 500})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,155 @@
+"""
+Tests for the server-sent book event stream.
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from book.events import Subscriber, hub
+from book.sse import book_stream
+from user.tokens import create_access_token, create_refresh_token
+
+EVENT = {
+    'id': 1,
+    'title': 'Sample book',
+    'genre': {'id': 1, 'name': 'Fantasy'},
+    'pickup_location': 'Tbilisi, Vake',
+    'owner_id': 2,
+}
+
+
+def stream_scope(query_string=b'', headers=()):
+    """Return the ASGI scope of a book stream request."""
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': '/api/book/stream/',
+        'query_string': query_string,
+        'headers': list(headers),
+    }
+
+
+class SubscriberTests(SimpleTestCase):
+    """Test filtering and backpressure of subscribers."""
+
+    def test_filters(self):
+        """Test events are matched on genre and location."""
+        self.assertTrue(Subscriber(1).matches(EVENT))
+        self.assertTrue(Subscriber(1, genres=['fantasy']).matches(EVENT))
+        self.assertFalse(Subscriber(1, genres=['Poetry']).matches(EVENT))
+        self.assertTrue(Subscriber(1, location='vake').matches(EVENT))
+        self.assertFalse(Subscriber(1, location='Batumi').matches(EVENT))
+
+    def test_own_books_skipped(self):
+        """Test subscribers are not sent their own books."""
+        self.assertFalse(Subscriber(2).matches(EVENT))
+
+    def test_slow_subscriber_overflows(self):
+        """Test a full queue stops a subscriber instead of blocking."""
+        async def publish():
+            subscriber = Subscriber(1, maxsize=2)
+            for _ in range(3):
+                subscriber.offer(EVENT)
+            return subscriber
+
+        subscriber = asyncio.run(publish())
+
+        self.assertTrue(subscriber.overflowed)
+        self.assertEqual(subscriber.queue.qsize(), 2)
+
+
+class BookStreamTests(TestCase):
+    """Test the book stream ASGI app."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def run_stream(self, scope, event=None, body=(b'',)):
+        """Run a stream, publishing an event, and return what was sent."""
+        sent = []
+        disconnect = asyncio.Event()
+        # The request body comes first, as from an ASGI server.
+        requests = [
+            {
+                'type': 'http.request',
+                'body': chunk,
+                'more_body': index < len(body) - 1,
+            }
+            for index, chunk in enumerate(body)
+        ]
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if message.get('body', b'').startswith(b'retry'):
+                if event is not None:
+                    hub.publish(event)
+                else:
+                    disconnect.set()
+            elif message.get('body', b'').startswith(b'id:'):
+                disconnect.set()
+
+        async_to_sync(book_stream)(scope, receive, send)
+        return sent
+
+    def test_token_required(self):
+        """Test streams need a valid access token."""
+        sent = self.run_stream(stream_scope(b'token=invalid'))
+
+        self.assertEqual(sent[0]['status'], 401)
+
+    def test_stream_sends_matching_events(self):
+        """Test published books are sent as events to subscribers."""
+        _, refresh_token = create_refresh_token(self.user)
+        token = create_access_token(refresh_token)
+        scope = stream_scope(
+            b'genre=Fantasy',
+            [(b'authorization', f'Bearer {token}'.encode())],
+        )
+
+        sent = self.run_stream(scope, EVENT)
+
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertTrue(sent[-1]['body'].startswith(b'id: 1\nevent: book\n'))
+        self.assertEqual(hub.subscribers, set())
+
+    def test_request_body_not_disconnect(self):
+        """Test the stream stays open while the request body is read."""
+        _, refresh_token = create_refresh_token(self.user)
+        token = create_access_token(refresh_token)
+        scope = stream_scope(f'token={token}'.encode())
+
+        sent = self.run_stream(scope, EVENT, body=[b'', b''])
+
+        self.assertTrue(sent[-1]['body'].startswith(b'id: 1\n'))
+
+    def test_created_book_published_on_commit(self):
+        """Test creating an available book publishes it after commit."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = {
+            'title': 'Sample book',
+            'author': {'name': 'Test Author'},
+            'genre': {'name': 'Fantasy'},
+            'condition': {'name': 'Good'},
+            'pickup_location': 'Tbilisi',
+        }
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            client.post(reverse('book:book-list'), payload, format='json')
+
+        self.assertEqual(len(callbacks), 1)
@@ -0,0 +1,129 @@
+"""
+Tests for checking query plans against baselines.
+"""
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Book
+from core.tests.factories import create_books, create_user
+from book.plans import HOT_QUERIES, compare, sample_book, summarize
+
+
+def make_plan(node_type='Index Scan', cost=10.0, index='core_book_owner'):
+    """Return a plan as returned by EXPLAIN (FORMAT JSON)."""
+    return {
+        'Node Type': 'Limit',
+        'Total Cost': cost,
+        'Plans': [{
+            'Node Type': node_type,
+            'Relation Name': 'core_book',
+            'Index Name': index if node_type == 'Index Scan' else None,
+            'Total Cost': cost,
+        }],
+    }
+
+
+class ComparePlansTests(TestCase):
+    """Test plans are compared against their baseline."""
+
+    def test_unchanged(self):
+        """Test small cost changes of the same plan are accepted."""
+        baseline = summarize(make_plan(cost=10.0))
+
+        problems = compare(baseline, summarize(make_plan(cost=12.0)), 0.5)
+
+        self.assertEqual(problems, [])
+
+    def test_node_type_changed(self):
+        """Test a switch to a sequential scan is reported."""
+        baseline = summarize(make_plan())
+
+        problems = compare(
+            baseline,
+            summarize(make_plan(node_type='Seq Scan')),
+            0.5,
+        )
+
+        self.assertEqual(len(problems), 1)
+        self.assertIn('Seq Scan on core_book', problems[0])
+
+    def test_cost_changed(self):
+        """Test a cost change over the threshold is reported."""
+        baseline = summarize(make_plan(cost=10.0))
+
+        problems = compare(baseline, summarize(make_plan(cost=40.0)), 0.5)
+
+        self.assertEqual(
+            problems,
+            ['estimated cost changed from 10.0 to 40.0'],
+        )
+
+
+@patch('book.management.commands.check_query_plans.explain')
+class CheckQueryPlansCommandTests(TestCase):
+    """Test the check_query_plans command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_books(create_user())
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline_dir = Path(directory.name)
+
+    def check(self, **options):
+        out = StringIO()
+        call_command(
+            'check_query_plans',
+            baseline_dir=self.baseline_dir,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_saves_missing_baselines(self, patched_explain):
+        """Test plans without a baseline are saved."""
+        patched_explain.return_value = make_plan()
+
+        self.check()
+
+        for name in HOT_QUERIES:
+            path = self.baseline_dir / f'{name}.json'
+            saved = json.loads(path.read_text())
+            self.assertEqual(saved['total_cost'], 10.0)
+
+    def test_changed_plan_fails(self, patched_explain):
+        """Test a changed plan makes the command fail."""
+        patched_explain.return_value = make_plan()
+        self.check()
+        patched_explain.return_value = make_plan(node_type='Seq Scan')
+
+        with self.assertRaisesMessage(CommandError, 'query plans changed'):
+            self.check()
+
+        self.check(update=True)
+        self.assertIn('unchanged', self.check())
+
+    def test_hot_queries_run(self, patched_explain):
+        """Test the registered queries can be run."""
+        sample = sample_book()
+
+        for build in HOT_QUERIES.values():
+            list(build(sample))
+
+    def test_requires_books(self, patched_explain):
+        """Test the command needs a seeded database."""
+        Book.objects.all().delete()
+
+        with self.assertRaises(CommandError):
+            self.check()
+
+        patched_explain.assert_not_called()
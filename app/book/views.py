@@ -1,23 +1,154 @@
 # views.py
+import heapq
+import io
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (
+    OpenApiParameter,
+    extend_schema,
+    extend_schema_view,
+)
 from rest_framework import viewsets, status
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from core.models import Book
-from book.serializers import BookSerializer, BookDetailSerializer
+from core.models import ArchivedBook, Book, BookChange, BookNeighbors
+from core.sharding import shard_aliases, shard_for_id, shard_for_owner
+from book.changes import (
+    CursorExpired,
+    latest_cursor,
+    purged_through,
+    read_changes,
+    record_changes,
+)
+from book.bulk import bulk_delete_books, bulk_update_books
+from book.counters import apply_deltas, count_deltas
+from book.events import publish_books
+from book.export import CONTENT_TYPES, STREAMERS
+from book.importers import (
+    ENCODING,
+    BookImporter,
+    detect_format,
+    read_rows,
+)
+from book.serializers import (
+    BookSerializer,
+    BookDetailSerializer,
+    BookBulkDeleteSerializer,
+    BookBulkResultSerializer,
+    BookBulkUpdateSerializer,
+    BookChangesSerializer,
+)
+from user.authentication import SignedTokenAuthentication
+
+
+SPARSE_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated fields to return, all by default.',
+    ),
+    OpenApiParameter(
+        'expand',
+        OpenApiTypes.STR,
+        description=(
+            'Comma separated relations returned as objects. When `fields` '
+            'or `expand` is given, other relations are returned as ids.'
+        ),
+    ),
+]
+
 
+TRUE_VALUES = {'1', 'true', 'yes'}
 
+
+def split_param(value):
+    """Return the names in a comma separated query parameter."""
+    return [name for name in value.split(',') if name]
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_PARAMETERS + [
+        OpenApiParameter(
+            'include_archived',
+            OpenApiTypes.BOOL,
+            description='Also list archived, long unavailable books.',
+        ),
+    ]),
+    retrieve=extend_schema(parameters=SPARSE_PARAMETERS),
+)
 class BookViewSet(viewsets.ModelViewSet):
     """View for managing book APIs."""
 
     queryset = Book.objects.all()
     serializer_class = BookDetailSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        SignedTokenAuthentication,
+        TokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
+    throttle_scope = None
 
     def get_queryset(self):
         """Retrieve books for authenticated user."""
-        return self.queryset.filter(owner=self.request.user).order_by('-id')
+        if self.action == 'similar':
+            # Similar books are looked up for any book, not only the user's.
+            return self.queryset.using(self.book_shard(self.kwargs['pk']))
+
+        queryset = self.queryset.using(
+            shard_for_owner(self.request.user.pk),
+        ).filter(owner=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            queryset = self.trim_queryset(queryset)
+        elif self.action in ('update', 'partial_update'):
+            # The response nests the relations.
+            queryset = queryset.select_related('author', 'genre', 'condition')
+        return queryset.order_by('-id')
+
+    def book_shard(self, pk):
+        """
+        Return the shard holding a book of any owner: the shard its id was
+        allocated on, unless the owner was moved since.
+        """
+        shards = shard_aliases()
+        if len(shards) == 1 or not pk.isdigit():
+            return shards[0]
+        hint = shard_for_id(int(pk))
+        for using in sorted(shards, key=lambda alias: alias != hint):
+            if self.queryset.using(using).filter(pk=pk).exists():
+                return using
+        return hint or shards[0]
+
+    def trim_queryset(self, queryset):
+        """Load only the requested fields and expanded relations."""
+        fields, expand = self.get_sparse_fields()
+        return queryset.select_related(*[
+            name for name in self.get_serializer_class().expand_fields
+            if name in fields and name in expand
+        ]).only(*fields)
+
+    def list(self, request, *args, **kwargs):
+        """List books, with archived ones when `include_archived` is set."""
+        if request.query_params.get('include_archived') not in TRUE_VALUES:
+            return super().list(request, *args, **kwargs)
+
+        books = list(self.filter_queryset(self.get_queryset()))
+        archived = self.trim_queryset(
+            ArchivedBook.objects.using(
+                shard_for_owner(request.user.pk),
+            ).filter(owner=request.user),
+        ).order_by('-id')
+        books = heapq.merge(books, archived, key=lambda book: -book.id)
+        serializer = self.get_serializer(books, many=True)
+        return Response(serializer.data)
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -25,16 +156,86 @@ class BookViewSet(viewsets.ModelViewSet):
             return BookSerializer
         return self.serializer_class
 
+    def get_serializer(self, *args, **kwargs):
+        """Return a serializer limited to the requested fields."""
+        if self.action in ('list', 'retrieve'):
+            kwargs['fields'], kwargs['expand'] = self.get_sparse_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def get_sparse_fields(self):
+        """
+        Return the fields and expanded relations requested with the
+        `fields` and `expand` query parameters.
+        """
+        serializer_class = self.get_serializer_class()
+        all_fields = serializer_class.Meta.fields
+        params = self.request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return all_fields, serializer_class.expand_fields
+
+        fields = split_param(params.get('fields', '')) or all_fields
+        expand = split_param(params.get('expand', ''))
+        errors = {}
+        unknown = sorted(set(fields) - set(all_fields))
+        if unknown:
+            errors['fields'] = [f'Unknown fields: {", ".join(unknown)}.']
+        unknown = sorted(set(expand) - set(serializer_class.expand_fields))
+        if unknown:
+            errors['expand'] = [f'Unknown relations: {", ".join(unknown)}.']
+        if errors:
+            raise ValidationError(errors)
+        return fields, expand
+
     def perform_create(self, serializer):
         """Create a new book."""
-        serializer.save(owner=self.request.user)
+        with transaction.atomic(using=shard_for_owner(self.request.user.pk)):
+            book = serializer.save(owner=self.request.user)
+            record_changes(book.owner_id, [book.pk], BookChange.CREATED)
+            apply_deltas(book.owner_id, count_deltas(
+                added=[(book.genre_id, book.is_available)],
+            ))
+            publish_books([book])
+
+    def perform_update(self, serializer):
+        """Update a book."""
+        instance = serializer.instance
+        before = (instance.genre_id, instance.is_available)
+        with transaction.atomic(using=instance._state.db):
+            book = serializer.save()
+            record_changes(book.owner_id, [book.pk], BookChange.UPDATED)
+            apply_deltas(book.owner_id, count_deltas(
+                removed=[before],
+                added=[(book.genre_id, book.is_available)],
+            ))
+            publish_books([book])
+
+    def perform_destroy(self, instance):
+        """Delete a book."""
+        using = instance._state.db
+        with transaction.atomic(using=using):
+            # Lock the book before record_changes locks its owner, in the
+            # order updates take them, so the two cannot deadlock.
+            list(
+                Book.objects.using(using).filter(
+                    pk=instance.pk,
+                ).select_for_update().values_list('pk', flat=True)
+            )
+            record_changes(
+                instance.owner_id,
+                [instance.pk],
+                BookChange.DELETED,
+            )
+            apply_deltas(instance.owner_id, count_deltas(
+                removed=[(instance.genre_id, instance.is_available)],
+            ))
+            instance.delete()
 
     def update(self, request, *args, **kwargs):
         """Handle PUT method."""
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=False)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
@@ -42,7 +243,7 @@ class BookViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
@@ -50,3 +251,219 @@ class BookViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Most books returned, 10 by default.',
+            ),
+        ],
+        responses=BookSerializer(many=True),
+    )
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        List available books of other users similar to a book, from the
+        neighbors precomputed by `manage.py build_book_neighbors`.
+        """
+        book = self.get_object()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = -1
+        if not 0 < limit <= settings.BOOK_NEIGHBORS_K:
+            message = f'Must be between 1 and {settings.BOOK_NEIGHBORS_K}.'
+            return Response(
+                {'limit': [message]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def available(using):
+            return Book.objects.using(using).filter(
+                is_available=True,
+            ).exclude(
+                owner=request.user,
+            ).select_related('author', 'genre', 'condition')
+
+        neighbors = BookNeighbors.objects.using(book._state.db).filter(
+            book=book,
+        ).first()
+        if neighbors is None:
+            # Not computed yet: fall back to the same author or genre.
+            books = list(islice(heapq.merge(
+                *[
+                    available(using).filter(
+                        Q(author_id=book.author_id) |
+                        Q(genre_id=book.genre_id),
+                    ).exclude(id=book.id).order_by('-id')[:limit]
+                    for using in shard_aliases()
+                ],
+                key=lambda other: -other.id,
+            ), limit))
+        else:
+            ids = [book_id for book_id, _ in neighbors.neighbors]
+            found = {}
+            for using in shard_aliases():
+                found.update(available(using).in_bulk(ids))
+            books = [found[i] for i in ids if i in found][:limit]
+        return Response(BookSerializer(books, many=True).data)
+
+    @extend_schema(
+        methods=['PATCH'],
+        request=BookBulkUpdateSerializer,
+        responses=BookBulkResultSerializer(many=True),
+    )
+    @extend_schema(
+        methods=['DELETE'],
+        request=BookBulkDeleteSerializer,
+        responses=BookBulkResultSerializer(many=True),
+    )
+    @action(detail=False, methods=['patch', 'delete'])
+    def bulk(self, request):
+        """Update or delete many of the user's books at once."""
+        if request.method == 'DELETE':
+            serializer = BookBulkDeleteSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            results = bulk_delete_books(
+                request.user,
+                serializer.validated_data['ids'],
+            )
+        else:
+            serializer = BookBulkUpdateSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            results = bulk_update_books(
+                request.user,
+                serializer.validated_data['ids'],
+                serializer.validated_data['changes'],
+            )
+        return Response(BookBulkResultSerializer(results, many=True).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'export_format',
+                OpenApiTypes.STR,
+                OpenApiParameter.PATH,
+                enum=sorted(STREAMERS),
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'export/(?P<export_format>csv|ndjson)',
+    )
+    def export(self, request, export_format=None):
+        """Stream all books of the user as CSV or NDJSON."""
+        stream = STREAMERS[export_format](
+            self.get_queryset(),
+            settings.BOOK_EXPORT_CHUNK_SIZE,
+        )
+        response = StreamingHttpResponse(
+            stream,
+            content_type=CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="books.{export_format}"'
+        )
+        return response
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        url_name='import',
+        parser_classes=[MultiPartParser],
+        throttle_scope='book_import',
+    )
+    def import_books(self, request):
+        """Import books for the user from an uploaded CSV/NDJSON file."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'file': ['No file was submitted.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        file_format = detect_format(upload.name)
+        if file_format is None:
+            return Response(
+                {'file': ['Only .csv and .ndjson files are supported.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding=ENCODING, newline='')
+        importer = BookImporter(
+            owner=request.user,
+            chunk_size=settings.BOOK_IMPORT_CHUNK_SIZE,
+        )
+        try:
+            result = importer.run(read_rows(stream, file_format))
+        except UnicodeDecodeError:
+            # Chunks read before the invalid bytes stay imported.
+            return Response(
+                {
+                    'file': ['The file is not valid UTF-8 text.'],
+                    'created': importer.created,
+                    'last_row': importer.last_row,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(result)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'since',
+                OpenApiTypes.INT,
+                description='Cursor returned by the previous page.',
+            ),
+        ],
+        responses={200: BookChangesSerializer, 410: None},
+    )
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        List changes of the user's books after a cursor, oldest first.
+
+        Created and updated changes both carry the current book. A 410
+        response means changes after the cursor were compacted away; the
+        client fetches the full list again and continues from the
+        `cursor` in the 410 response.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            return Response(
+                {'since': ['A valid integer is required.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            changes, books, has_more = read_changes(
+                request.user,
+                since,
+                settings.BOOK_CHANGES_PAGE_SIZE,
+            )
+        except CursorExpired:
+            return Response(
+                {
+                    'detail': 'Cursor has expired, fetch all books again.',
+                    'cursor': max(
+                        latest_cursor(request.user),
+                        purged_through(request.user),
+                    ),
+                },
+                status=status.HTTP_410_GONE,
+            )
+
+        serializer = BookChangesSerializer(
+            {
+                'changes': changes,
+                'cursor': changes[-1].id if changes else since,
+                'has_more': has_more,
+            },
+            context={'books': books},
+        )
+        return Response(serializer.data)
@@ -1,18 +1,46 @@
 """
 Django admin customization.
 """
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 
 from core import models
 
 
+class EstimatedCountPaginator(Paginator):
+    """Paginator using the planner row estimate for big unfiltered tables."""
+
+    @cached_property
+    def count(self):
+        """Return the estimated row count when an exact one is costly."""
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            estimate = int(row[0]) if row else 0
+            if estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
 class UserAdmin(BaseUserAdmin):
     """Define the admin pages for users."""
     ordering = ['id']
     list_display = ['email', 'name']
+    search_fields = ['=email', '^name']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         (_('Personal Info'), {'fields': ('name',)}),
@@ -45,5 +73,34 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class LookupAdmin(admin.ModelAdmin):
+    """Define the admin pages for book lookup tables."""
+    ordering = ['name']
+    search_fields = ['^name']
+
+
+class BookAdmin(admin.ModelAdmin):
+    """Define the admin pages for books."""
+    ordering = ['-id']
+    list_display = [
+        'title',
+        'author',
+        'genre',
+        'condition',
+        'owner',
+        'is_available',
+    ]
+    list_filter = ['is_available']
+    list_select_related = ['author', 'genre', 'condition', 'owner']
+    search_fields = ['^title', '=owner__email']
+    autocomplete_fields = ['author', 'genre', 'condition']
+    raw_id_fields = ['owner']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Book)
+admin.site.register(models.Author, LookupAdmin)
+admin.site.register(models.Genre, LookupAdmin)
+admin.site.register(models.Condition, LookupAdmin)
+admin.site.register(models.Book, BookAdmin)
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import sharding
+
+        for label in sharding.REPLICATED_MODELS:
+            model = self.apps.get_model(label)
+            post_save.connect(sharding.replicate_saved, sender=model)
+            post_delete.connect(sharding.replicate_deleted, sender=model)
+        post_migrate.connect(sharding.reserve_id_ranges, sender=self)
@@ -0,0 +1,64 @@
+"""
+ASGI handler that iterates streaming responses off the event loop.
+
+Django 3.2 iterates a streaming response on the event loop, so a
+generator querying the database as it goes, like the book export,
+raises SynchronousOnlyOperation. This handler takes each part from the
+thread sync views run in instead.
+"""
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler as BaseASGIHandler
+
+# Returned by next() once a streaming response is exhausted.
+DONE = object()
+
+
+def response_headers(response):
+    """Return the headers and cookies of a response as ASGI headers."""
+    headers = []
+    for header, value in response.items():
+        if isinstance(header, str):
+            header = header.encode('ascii')
+        if isinstance(value, str):
+            value = value.encode('latin1')
+        headers.append((bytes(header), bytes(value)))
+    for cookie in response.cookies.values():
+        headers.append(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+        )
+    return headers
+
+
+class ASGIHandler(BaseASGIHandler):
+    """Django's ASGI handler, streaming responses from a sync thread."""
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers(response),
+        })
+        parts = iter(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        while True:
+            part = await next_part(parts, DONE)
+            if part is DONE:
+                break
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application():
+    """Set up Django and return its ASGI application."""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
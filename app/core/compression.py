@@ -0,0 +1,65 @@
+"""
+Gzip and brotli compression of responses and static files.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def gzip_compress(content, level):
+    # mtime=0 keeps the output, and so ETags and caches, stable.
+    return gzip.compress(content, compresslevel=level, mtime=0)
+
+
+def brotli_compress(content, level):
+    return brotli.compress(content, quality=level)
+
+
+# Encodings in order of preference, with the file extension used for
+# precompressed static files.
+ENCODINGS = [
+    ('br', '.br', brotli_compress),
+    ('gzip', '.gz', gzip_compress),
+] if brotli else [
+    ('gzip', '.gz', gzip_compress),
+]
+
+
+def encoding_qualities(header):
+    """Return the quality of each coding listed in an Accept-Encoding."""
+    qualities = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.strip().lower()] = quality
+    return qualities
+
+
+def accepted_encodings(header):
+    """Return the content codings accepted by an Accept-Encoding header."""
+    return {
+        coding
+        for coding, quality in encoding_qualities(header).items()
+        if quality > 0
+    }
+
+
+def choose_encoding(header):
+    """Return the preferred (coding, compress) for an Accept-Encoding."""
+    qualities = encoding_qualities(header)
+    for coding, _, compress in ENCODINGS:
+        # A listed coding's quality takes precedence over the wildcard's.
+        if qualities.get(coding, qualities.get('*', 0)) > 0:
+            return coding, compress
+    return None, None
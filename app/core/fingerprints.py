@@ -0,0 +1,18 @@
+"""
+Fingerprints telling apart listings of the same book.
+"""
+import hashlib
+import re
+
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+
+def normalize_title(title):
+    """Return a title casefolded, without punctuation or extra spaces."""
+    return ' '.join(PUNCTUATION_RE.sub(' ', title.casefold()).split())
+
+
+def book_fingerprint(title, author_id):
+    """Return the fingerprint of a book by its title and author."""
+    key = f'{author_id}:{normalize_title(title)}'
+    return hashlib.sha1(key.encode()).hexdigest()
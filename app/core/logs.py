@@ -0,0 +1,77 @@
+"""
+Structured, non-blocking logging.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class QueueStreamHandler(logging.handlers.QueueHandler):
+    """
+    Hand formatted records to a background thread writing to a stream,
+    dropping them rather than blocking when the queue is full.
+
+    Threads are not copied into forked processes, like the workers of the
+    gunicorn master that configured logging, so each process starts its
+    own queue and thread on its first record.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.stream_handler = logging.StreamHandler(stream)
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.listener = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+        self.start()
+        atexit.register(self.close)
+
+    def start(self):
+        """Start the background thread of this process."""
+        with self.start_lock:
+            if self.pid == os.getpid():
+                return
+            # Records queued before a fork are written by the parent.
+            self.queue = queue.Queue(self.maxsize)
+            self.listener = logging.handlers.QueueListener(
+                self.queue,
+                self.stream_handler,
+            )
+            self.listener.start()
+            self.pid = os.getpid()
+
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Write out the queued records and stop the background thread."""
+        if self.listener is not None and self.pid == os.getpid():
+            self.listener.stop()
+        self.listener = None
+        super().close()
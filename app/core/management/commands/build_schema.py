@@ -0,0 +1,31 @@
+"""
+Django command to prebuild the OpenAPI schema.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.schema import generate_schema, write_prebuilt
+
+
+class Command(BaseCommand):
+    """Django command to write the OpenAPI schema to disk."""
+    help = 'Prebuild the OpenAPI schema served by /api/schema/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            type=Path,
+            default=settings.SCHEMA_PREBUILT_DIR,
+            help='Directory the schema files are written to.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stdout.write('Building OpenAPI schema...')
+        paths = write_prebuilt(options['output_dir'], generate_schema())
+        for path in paths:
+            self.stdout.write(f'Wrote {path}')
+
+        self.stdout.write(self.style.SUCCESS('Schema built!'))
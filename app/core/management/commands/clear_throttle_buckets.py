@@ -0,0 +1,23 @@
+"""
+Django command to delete unused throttle buckets from the database.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.throttling import DatabaseStore, longest_rate_period
+
+
+class Command(BaseCommand):
+    """Django command to expire DatabaseStore throttle buckets."""
+    help = (
+        'Delete the throttle buckets of DatabaseStore not used for longer '
+        'than the longest throttle rate period, by when they are full.'
+    )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        deleted = DatabaseStore.expire(time.time() - longest_rate_period())
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} throttle buckets.'
+        ))
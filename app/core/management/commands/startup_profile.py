@@ -0,0 +1,94 @@
+"""
+Django command to report where process startup time goes.
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+SETUP_CODE = (
+    'import django; django.setup(); '
+    'from django.core import checks; checks.run_checks()'
+)
+URLS_CODE = (
+    '; from django.urls import get_resolver; get_resolver().url_patterns'
+)
+
+
+def parse_importtime(output):
+    """Return (module, self microseconds) pairs from -X importtime output."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue
+        modules.append((name.strip(), int(self_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    """Django command to profile startup of each process role."""
+    help = 'Measure import time of a fresh process for each process role.'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--roles',
+            nargs='+',
+            default=['api', 'worker', 'migrate'],
+            help='Process roles to profile.',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of packages listed per role.',
+        )
+        parser.add_argument(
+            '--load-urls',
+            action='store_true',
+            help='Also load the URLconf, as the first request would.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        code = SETUP_CODE + (URLS_CODE if options['load_urls'] else '')
+        for role in options['roles']:
+            elapsed, modules = self.profile(role, code)
+            by_package = defaultdict(int)
+            for name, self_us in modules:
+                by_package[name.split('.')[0]] += self_us
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{role}: {elapsed * 1000:.0f} ms wall, '
+                f'{sum(by_package.values()) / 1000:.0f} ms importing '
+                f'{len(modules)} modules'
+            ))
+            top = sorted(by_package.items(), key=lambda item: -item[1])
+            for package, self_us in top[:options['top']]:
+                self.stdout.write(f'  {self_us / 1000:8.1f} ms  {package}')
+
+    def profile(self, role, code):
+        """Start a process for a role and return its wall time and imports."""
+        env = dict(os.environ, DJANGO_PROCESS_ROLE=role)
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(
+                f'Profiling role {role} failed:\n{result.stderr[-2000:]}'
+            )
+        return elapsed, parse_importtime(result.stderr)
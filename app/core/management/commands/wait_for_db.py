@@ -1,27 +1,117 @@
 """
 Django command to wait for the database to be available.
 """
+import random
 import time
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+
+# Key of the PostgreSQL advisory lock held while migrating, so that only
+# one of several starting replicas runs migrations.
+MIGRATION_LOCK_ID = 4242001
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to wait for.',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to wait before giving up.',
+        )
+        parser.add_argument(
+            '--initial-delay',
+            type=float,
+            default=0.1,
+            help='Upper bound of the first wait between attempts.',
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=5,
+            help='Upper bound of any wait between attempts.',
+        )
+        parser.add_argument(
+            '--migrate',
+            action='store_true',
+            help='Apply migrations once available, one replica at a time.',
+        )
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
+        database = options['database']
         self.stdout.write('Waiting for database...')
-        db_up = False
-        while db_up is False:
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+        while True:
             try:
-                self.check(databases=['default'])
-                db_up = True
+                self.probe(database)
+                break
             except (Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                connections[database].close()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database unavailable after {options["timeout"]}s.'
+                    )
+                # Full jitter keeps starting replicas from retrying in step.
+                wait = min(random.uniform(0, delay), remaining)
+                self.stdout.write(
+                    f'Database unavailable, waiting {wait:.2f} seconds...'
+                )
+                time.sleep(wait)
+                delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+        if options['migrate']:
+            self.migrate(database)
+
+    def probe(self, database):
+        """Run the cheapest possible query against the database."""
+        with connections[database].cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def migrate(self, database):
+        """Apply migrations while holding the migration lock."""
+        connection = connections[database]
+        if connection.vendor != 'postgresql':
+            call_command('migrate', database=database, interactive=False)
+            return
+
+        with connection.cursor() as cursor:
+            self.stdout.write('Waiting for migration lock...')
+            cursor.execute('SELECT pg_advisory_lock(%s)', [MIGRATION_LOCK_ID])
+            try:
+                if self.has_pending_migrations(connection):
+                    call_command(
+                        'migrate',
+                        database=database,
+                        interactive=False,
+                    )
+                else:
+                    self.stdout.write('Schema is up to date.')
+            finally:
+                cursor.execute(
+                    'SELECT pg_advisory_unlock(%s)',
+                    [MIGRATION_LOCK_ID],
+                )
+
+    def has_pending_migrations(self, connection):
+        """Return whether any migration is still to be applied."""
+        executor = MigrationExecutor(connection)
+        targets = executor.loader.graph.leaf_nodes()
+        return bool(executor.migration_plan(targets))
@@ -0,0 +1,148 @@
+"""
+Memory use of sampled requests, traced with tracemalloc.
+
+Stats are kept per process, so each worker reports its own requests.
+"""
+import linecache
+import resource
+import sys
+import threading
+import tracemalloc
+
+# Allocations by the profiler itself, left out of the reported sites.
+IGNORED_FILES = [
+    tracemalloc.__file__,
+    linecache.__file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+]
+# Sites kept per route between requests, more than any report lists.
+KEPT_SITES = 100
+
+
+class RouteMemory:
+    """Peak and retained memory of the sampled requests to one route."""
+
+    def __init__(self):
+        self.requests = 0
+        self.peak_max = 0
+        self.peak_total = 0
+        self.retained_total = 0
+        self.sites = {}
+
+    def add(self, peak, retained, sites):
+        self.requests += 1
+        self.peak_max = max(self.peak_max, peak)
+        self.peak_total += peak
+        self.retained_total += retained
+        for site, size in sites:
+            self.sites[site] = self.sites.get(site, 0) + size
+        if len(self.sites) > KEPT_SITES:
+            self.sites = dict(self.top_sites(KEPT_SITES))
+
+    def top_sites(self, limit):
+        return sorted(
+            self.sites.items(),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:limit]
+
+    def as_dict(self, limit):
+        return {
+            'requests': self.requests,
+            'peak_bytes_max': self.peak_max,
+            'peak_bytes_mean': self.peak_total // self.requests,
+            'retained_bytes_mean': self.retained_total // self.requests,
+            'top_sites': [
+                {'site': site, 'retained_bytes': size}
+                for site, size in self.top_sites(limit)
+            ],
+        }
+
+
+_routes = {}
+_routes_lock = threading.Lock()
+# tracemalloc traces the whole process, so one request is traced at a time.
+_trace_lock = threading.Lock()
+
+
+class RequestTrace:
+    """Trace the memory allocated while handling one request."""
+
+    def __init__(self):
+        self.started = False
+        self.before = None
+        self.baseline = 0
+
+    def start(self):
+        """Start tracing, or return False if another request is traced."""
+        if not _trace_lock.acquire(blocking=False):
+            return False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started = True
+        self.before = self.snapshot()
+        tracemalloc.reset_peak()
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        return True
+
+    def stop(self):
+        """
+        Stop tracing and return the peak bytes allocated during the
+        request and the sites of the allocations it left behind.
+        """
+        try:
+            peak = tracemalloc.get_traced_memory()[1]
+            sites = [
+                (f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                 stat.size_diff)
+                for stat in self.snapshot().compare_to(self.before, 'lineno')
+                if stat.size_diff > 0
+            ]
+        finally:
+            if self.started:
+                tracemalloc.stop()
+            self.before = None
+            _trace_lock.release()
+        return max(peak - self.baseline, 0), sites
+
+    @staticmethod
+    def snapshot():
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, filename) for filename in IGNORED_FILES
+        ])
+
+
+def record(route, peak, sites):
+    """Add a traced request to the stats of its route."""
+    retained = sum(size for _, size in sites)
+    with _routes_lock:
+        _routes.setdefault(route, RouteMemory()).add(peak, retained, sites)
+
+
+def max_rss_bytes():
+    """Return the largest resident set size the process reached."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def stats(limit=10):
+    """Return the memory stats of this process and its traced routes."""
+    with _routes_lock:
+        routes = {
+            route: memory.as_dict(limit)
+            for route, memory in sorted(_routes.items())
+        }
+    return {
+        'max_rss_bytes': max_rss_bytes(),
+        'tracing': tracemalloc.is_tracing(),
+        'routes': routes,
+    }
+
+
+def reset():
+    """Forget the stats of traced requests."""
+    with _routes_lock:
+        _routes.clear()
@@ -0,0 +1,221 @@
+"""
+Middleware shared by all apps.
+"""
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.db import connections
+from django.middleware import csrf
+from django.utils.cache import patch_vary_headers
+
+from core import memory
+from core.compression import choose_encoding
+
+
+logger = logging.getLogger('access')
+
+
+class QueryStats:
+    """Database execute wrapper counting queries and their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class AccessLogMiddleware:
+    """Log one structured line per request, sampled per route."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        latency = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.view_name if match else None
+        sample_rate = settings.ACCESS_LOG_SAMPLE_RATES.get(route, 1.0)
+        if response.status_code < 500 and random.random() >= sample_rate:
+            return response
+
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user and user.is_authenticated else None
+        size = None if response.streaming else len(response.content)
+        logger.info(
+            '%s %s %s',
+            request.method,
+            request.path,
+            response.status_code,
+            extra={'fields': {
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'user_id': user_id,
+                'status': response.status_code,
+                'latency_ms': round(latency * 1000, 3),
+                'db_queries': stats.count,
+                'db_time_ms': round(stats.duration * 1000, 3),
+                'response_bytes': size,
+                'memory_peak_bytes': getattr(
+                    request,
+                    'memory_peak_bytes',
+                    None,
+                ),
+                'sample_rate': sample_rate,
+            }},
+        )
+        return response
+
+
+class MemoryProfileMiddleware:
+    """
+    Trace the memory allocated by a sample of requests with tracemalloc.
+
+    Each route (by URL name) is sampled at its MEMORY_PROFILE_SAMPLE_RATES
+    rate, or at MEMORY_PROFILE_SAMPLE_RATE, and its peak memory and the
+    sites of the memory it left allocated are added to the stats of the
+    process. Tracing starts once the URL is resolved and stops when the
+    response is built, so the body of streaming responses is not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            trace = getattr(request, '_memory_trace', None)
+            if trace is not None:
+                peak, sites = trace.stop()
+                memory.record(request.resolver_match.view_name, peak, sites)
+                request.memory_peak_bytes = peak
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sample_rate = settings.MEMORY_PROFILE_SAMPLE_RATES.get(
+            request.resolver_match.view_name,
+            settings.MEMORY_PROFILE_SAMPLE_RATE,
+        )
+        if sample_rate and random.random() < sample_rate:
+            trace = memory.RequestTrace()
+            if trace.start():
+                request._memory_trace = trace
+        return None
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, as accepted by the client.
+
+    Only responses of at least COMPRESSION_MIN_SIZE bytes with a content
+    type in COMPRESSION_CONTENT_TYPES are compressed. Streaming responses,
+    like exports and event streams, and responses already encoded, like
+    the prebuilt schema, are left alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming or
+            response.has_header('Content-Encoding') or
+            len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type.strip() not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding, compress = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+        )
+        if coding is None:
+            return response
+        compressed = compress(
+            response.content,
+            settings.COMPRESSION_LEVELS[coding],
+        )
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = coding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # The compressed body is no longer byte for byte the same.
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+def is_sessionless(request):
+    """Return whether a request is to a token authenticated API route."""
+    return request.path_info.startswith(
+        tuple(settings.SESSIONLESS_PATH_PREFIXES)
+    )
+
+
+class SessionlessPathMixin:
+    """Skip the middleware for requests under SESSIONLESS_PATH_PREFIXES."""
+
+    def __call__(self, request):
+        if is_sessionless(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(
+    SessionlessPathMixin,
+    sessions_middleware.SessionMiddleware,
+):
+    pass
+
+
+class CsrfViewMiddleware(SessionlessPathMixin, csrf.CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_sessionless(request):
+            return None
+        return super().process_view(
+            request,
+            callback,
+            callback_args,
+            callback_kwargs,
+        )
+
+
+class AuthenticationMiddleware(
+    SessionlessPathMixin,
+    auth_middleware.AuthenticationMiddleware,
+):
+    pass
+
+
+class MessageMiddleware(
+    SessionlessPathMixin,
+    messages_middleware.MessageMiddleware,
+):
+    pass
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-19 01:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_refreshtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookChangeCompaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purged_through', models.BigIntegerField()),
+                ('compacted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BookChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('book_id', models.IntegerField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='book_changes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='bookchange',
+            index=models.Index(fields=['owner', 'id'], name='core_bookch_owner_i_81ba71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookchange',
+            index=models.Index(fields=['book_id', 'id'], name='core_bookch_book_id_9509d9_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2.25 on 2026-10-19 01:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_bookchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBook',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('pickup_location', models.CharField(max_length=255)),
+                ('is_available', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['title'],
+            },
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='bookchange',
+            name='action',
+            field=models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('archived', 'Archived')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('is_available', False)), fields=['updated_at'], name='book_unavailable_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedbook',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.author'),
+        ),
+        migrations.AddField(
+            model_name='archivedbook',
+            name='condition',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.condition'),
+        ),
+        migrations.AddField(
+            model_name='archivedbook',
+            name='genre',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.genre'),
+        ),
+        migrations.AddField(
+            model_name='archivedbook',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-19 01:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_archivedbook'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookNeighbors',
+            fields=[
+                ('book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='neighbors', serialize=False, to='core.book')),
+                ('neighbors', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
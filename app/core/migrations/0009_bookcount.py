@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_bookneighbors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('available', models.IntegerField(default=0)),
+                ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.genre')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='book_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='bookcount',
+            constraint=models.UniqueConstraint(fields=('owner', 'genre'), name='unique_book_count_owner_genre'),
+        ),
+    ]
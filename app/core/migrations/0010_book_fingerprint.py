@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-19 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_bookcount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['owner', 'fingerprint'], name='book_owner_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 01:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_book_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedbook',
+            name='id',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+    ]
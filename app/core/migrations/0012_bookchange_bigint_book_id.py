@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_archivedbook_bigint_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bookchange',
+            name='book_id',
+            field=models.BigIntegerField(),
+        ),
+    ]
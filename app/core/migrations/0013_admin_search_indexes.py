@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+# Admin searches use istartswith and iexact, which PostgreSQL runs as
+# UPPER(column) LIKE / = UPPER(%s). The column indexes cannot serve those,
+# so index the expressions, with text_pattern_ops for prefix matches.
+# They replace the plain index on book titles, which nothing else uses.
+SEARCH_INDEXES = [
+    ('core_book_title_upper_like', 'core_book', 'title', True),
+    ('core_user_email_upper', 'core_user', 'email', False),
+    ('core_user_name_upper_like', 'core_user', 'name', True),
+    ('core_author_name_upper_like', 'core_author', 'name', True),
+    ('core_genre_name_upper_like', 'core_genre', 'name', True),
+    ('core_condition_name_upper_like', 'core_condition', 'name', True),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column, prefix in SEARCH_INDEXES:
+        opclass = ' text_pattern_ops' if prefix else ''
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} '
+            f'ON {table} ((UPPER({column}::text)){opclass})'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, *_ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_bookchange_bigint_book_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+        migrations.AlterField(
+            model_name='book',
+            name='title',
+            field=models.CharField(max_length=255),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-19 02:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookchangecompaction',
+            name='owner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='book_change_compactions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -6,6 +6,8 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 
+from core.fingerprints import book_fingerprint
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -41,21 +43,21 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
 class Author(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
 
     def __str__(self):
         return self.name
 
 
 class Genre(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
 
     def __str__(self):
         return self.name
 
 
 class Condition(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
 
     def __str__(self):
         return self.name
@@ -63,15 +65,158 @@ class Condition(models.Model):
 
 class Book(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Searched through the UPPER(title) index of migration 0013.
     title = models.CharField(max_length=255)
     author = models.ForeignKey(Author, on_delete=models.CASCADE)
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
     condition = models.ForeignKey(Condition, on_delete=models.CASCADE)
     pickup_location = models.CharField(max_length=255)
     is_available = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Same for listings of the same book, see core.fingerprints.
+    fingerprint = models.CharField(max_length=40, blank=True, default='')
+
+    class Meta:
+        ordering = ['title']
+        indexes = [
+            models.Index(
+                fields=['owner', 'fingerprint'],
+                name='book_owner_fingerprint_idx',
+            ),
+            # Finds books to archive without scanning available ones.
+            models.Index(
+                fields=['updated_at'],
+                name='book_unavailable_updated_idx',
+                condition=models.Q(is_available=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title} by {self.author}'
+
+    def save(self, *args, update_fields=None, **kwargs):
+        """Save the book, keeping its fingerprint up to date."""
+        self.fingerprint = book_fingerprint(self.title, self.author_id)
+        if update_fields is not None and {'title', 'author'} & set(
+            update_fields,
+        ):
+            update_fields = [*update_fields, 'fingerprint']
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class ArchivedBook(models.Model):
+    """Unavailable book moved out of the book table, keeping its id."""
+    id = models.BigIntegerField(primary_key=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    title = models.CharField(max_length=255)
+    author = models.ForeignKey(Author, on_delete=models.CASCADE)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+    condition = models.ForeignKey(Condition, on_delete=models.CASCADE)
+    pickup_location = models.CharField(max_length=255)
+    is_available = models.BooleanField(default=False)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['title']
 
     def __str__(self):
         return f'{self.title} by {self.author}'
+
+
+class ThrottleBucket(models.Model):
+    """Token bucket state for request throttling."""
+    key = models.CharField(max_length=255, unique=True)
+    tokens = models.FloatField()
+    updated = models.FloatField()
+
+
+class RefreshToken(models.Model):
+    """Revocable token exchanged for short lived signed access tokens."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='refresh_tokens',
+    )
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+
+class BookChange(models.Model):
+    """Append-only record of a book being created, updated or deleted."""
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ARCHIVED = 'archived'
+    ACTIONS = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+        (ARCHIVED, 'Archived'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='book_changes',
+        db_index=False,
+    )
+    book_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'id']),
+            models.Index(fields=['book_id', 'id']),
+        ]
+
+
+class BookChangeCompaction(models.Model):
+    """Highest change sequence of an owner removed by a compaction run."""
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='book_change_compactions',
+        null=True,
+    )
+    purged_through = models.BigIntegerField()
+    compacted_at = models.DateTimeField(auto_now_add=True)
+
+
+class BookNeighbors(models.Model):
+    """Most similar available books of a book, as [id, score] pairs."""
+    book = models.OneToOneField(
+        Book,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='neighbors',
+    )
+    neighbors = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+
+class BookCount(models.Model):
+    """Maintained count of an owner's books, and available ones, per genre."""
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='book_counts',
+    )
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+    total = models.IntegerField(default=0)
+    available = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'genre'],
+                name='unique_book_count_owner_genre',
+            ),
+        ]
@@ -0,0 +1,160 @@
+"""
+Precomputed and cached OpenAPI schema.
+"""
+import gzip
+import hashlib
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+
+SchemaDocument = namedtuple(
+    'SchemaDocument',
+    ['content', 'compressed', 'etag'],
+)
+
+SCHEMA_FILES = {
+    'yaml': ('schema.yaml', OpenApiYamlRenderer),
+    'json': ('schema.json', OpenApiJsonRenderer),
+}
+
+RENDERER_FORMATS = {
+    'openapi': 'yaml',
+    'yaml': 'yaml',
+    'openapi-json': 'json',
+    'json': 'json',
+}
+
+_documents = {}
+_lock = threading.Lock()
+
+
+def generate_schema():
+    """Walk the API and return the OpenAPI schema."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def make_document(content, compressed=None):
+    """Return a SchemaDocument for already rendered schema content."""
+    if compressed is None:
+        compressed = gzip.compress(content)
+    return SchemaDocument(
+        content=content,
+        compressed=compressed,
+        etag='"%s"' % hashlib.sha256(content).hexdigest(),
+    )
+
+
+def render_documents(schema):
+    """Render a schema into a SchemaDocument for every format."""
+    documents = {}
+    for schema_format, (_, renderer_class) in SCHEMA_FILES.items():
+        content = renderer_class().render(schema, renderer_context={})
+        documents[schema_format] = make_document(content)
+    return documents
+
+
+def write_prebuilt(directory, schema):
+    """Render a schema and write it, plain and gzipped, to a directory."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for schema_format, document in render_documents(schema).items():
+        filename, _ = SCHEMA_FILES[schema_format]
+        path = directory / filename
+        path.write_bytes(document.content)
+        path.with_name(f'{filename}.gz').write_bytes(document.compressed)
+        paths.append(path)
+    return paths
+
+
+def read_prebuilt(schema_format):
+    """Return the prebuilt SchemaDocument for a format, if there is one."""
+    filename, _ = SCHEMA_FILES[schema_format]
+    path = settings.SCHEMA_PREBUILT_DIR / filename
+    if not path.exists():
+        return None
+
+    gz_path = path.with_name(f'{filename}.gz')
+    compressed = gz_path.read_bytes() if gz_path.exists() else None
+    return make_document(path.read_bytes(), compressed)
+
+
+def schema_language(lang):
+    """
+    Return the language of LANGUAGES a `lang` parameter asks for, or None
+    for the default language and unknown values, which share a document.
+    """
+    if not lang or not settings.USE_I18N:
+        return None
+    try:
+        lang = translation.get_supported_language_variant(lang)
+    except LookupError:
+        return None
+    return None if lang == settings.LANGUAGE_CODE else lang
+
+
+def get_document(schema_format, lang=None):
+    """
+    Return the SchemaDocument for a format in a language of LANGUAGES,
+    building it only once.
+    """
+    key = (schema_format, lang)
+    document = _documents.get(key)
+    if document is not None:
+        return document
+
+    with _lock:
+        if key not in _documents:
+            document = None if lang else read_prebuilt(schema_format)
+            if document is not None:
+                _documents[key] = document
+            else:
+                with translation.override(lang):
+                    built_documents = render_documents(generate_schema())
+                for built_format, built in built_documents.items():
+                    _documents.setdefault((built_format, lang), built)
+        return _documents[key]
+
+
+def clear_cache():
+    """Forget all memoized schema documents."""
+    with _lock:
+        _documents.clear()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """Serve the prebuilt or memoized OpenAPI schema."""
+
+    def _get_schema_response(self, request):
+        schema_format = RENDERER_FORMATS[request.accepted_renderer.format]
+        lang = schema_language(request.GET.get('lang'))
+        document = get_document(schema_format, lang)
+
+        response = get_conditional_response(request, etag=document.etag)
+        if response is None:
+            content_type = request.accepted_renderer.media_type
+            accepts_gzip = 'gzip' in request.META.get(
+                'HTTP_ACCEPT_ENCODING', ''
+            )
+            if accepts_gzip:
+                response = HttpResponse(
+                    document.compressed,
+                    content_type=content_type,
+                )
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(
+                    document.content,
+                    content_type=content_type,
+                )
+        response['ETag'] = document.etag
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+        return response
@@ -0,0 +1,218 @@
+"""
+Placement of each owner's books on one of the BOOK_SHARDS databases.
+
+An owner's books, archived books, change feed, counters and neighbor
+lists live together on one shard, chosen by rendezvous hashing of the
+owner id, so a write touches a single database and adding a shard only
+moves the owners that hash to it. Users and the author, genre and
+condition lookups are written to the default database and copied to
+every other shard, so foreign keys hold on each of them.
+
+Each shard allocates ids from its own range, by its position in
+BOOK_SHARDS, so book ids are unique across shards and keep their value
+when `manage.py rebalance_book_shards` moves an owner.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SHARD_ID_SPAN = 2 ** 44
+
+SHARDED_MODELS = {
+    'core.book',
+    'core.archivedbook',
+    'core.bookchange',
+    'core.bookcount',
+    'core.bookneighbors',
+}
+REPLICATED_MODELS = {
+    'core.user',
+    'core.author',
+    'core.genre',
+    'core.condition',
+}
+# Tables whose ids are allocated from the range of their shard.
+RANGED_TABLES = ['core_book', 'core_bookchange']
+
+
+def shard_aliases():
+    """Return the databases holding books, in id range order."""
+    return list(settings.BOOK_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def replica_aliases():
+    """Return the shards replicated models are copied to."""
+    return [alias for alias in shard_aliases() if alias != DEFAULT_DB_ALIAS]
+
+
+def _weight(alias, owner_id):
+    digest = hashlib.blake2b(
+        f'{alias}:{owner_id}'.encode(),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def shard_for_owner(owner_id):
+    """Return the database of an owner's books."""
+    shards = shard_aliases()
+    if len(shards) == 1:
+        return shards[0]
+    return max(shards, key=lambda alias: _weight(alias, owner_id))
+
+
+def shard_for_id(object_id):
+    """
+    Return the database a book or change id was allocated on, or None if
+    its shard was removed from BOOK_SHARDS.
+    """
+    shards = shard_aliases()
+    index = object_id // SHARD_ID_SPAN
+    return shards[index] if index < len(shards) else None
+
+
+def reserve_id_range(using):
+    """
+    Point the id sequences of a shard back into its range, if they are
+    not in it yet or were moved out by inserting moved rows with their ids.
+    """
+    if using not in shard_aliases():
+        return
+    start = shard_aliases().index(using) * SHARD_ID_SPAN
+    end = start + SHARD_ID_SPAN
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for table in RANGED_TABLES:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT pg_get_serial_sequence(%s, 'id')",
+                    [table],
+                )
+                sequence = cursor.fetchone()[0]
+                cursor.execute(f'SELECT last_value FROM {sequence}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute(
+                    'SELECT seq FROM sqlite_sequence WHERE name = %s',
+                    [table],
+                )
+            else:
+                continue
+            row = cursor.fetchone()
+            current = row[0] if row else 0
+            if start <= current < end:
+                continue
+
+            cursor.execute(
+                f'SELECT MAX(id) FROM {table} WHERE id >= %s AND id < %s',
+                [start, end],
+            )
+            value = cursor.fetchone()[0] or start
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT setval(%s, %s, %s)',
+                    [sequence, max(value, 1), value > 0],
+                )
+            else:
+                cursor.execute(
+                    'DELETE FROM sqlite_sequence WHERE name = %s',
+                    [table],
+                )
+                cursor.execute(
+                    'INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                    [table, value],
+                )
+
+
+def _values(model, obj):
+    return {
+        field.attname: getattr(obj, field.attname)
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+    }
+
+
+def replicate(model, objs):
+    """Copy rows of a replicated model to every other shard."""
+    for alias in replica_aliases():
+        for obj in objs:
+            model._base_manager.using(alias).update_or_create(
+                pk=obj.pk,
+                defaults=_values(model, obj),
+            )
+
+
+def ensure_replicated(model, ids, using):
+    """
+    Copy rows of a replicated model missing from a shard. Called in write
+    transactions on the shard, so rows are there for the foreign keys even
+    if their copy was rolled back with an earlier write, or they were
+    created without signals by bulk_create.
+    """
+    if using == DEFAULT_DB_ALIAS:
+        return
+    ids = set(ids)
+    present = model._base_manager.using(using).filter(
+        pk__in=ids,
+    ).values_list('pk', flat=True)
+    missing = ids - set(present)
+    if missing:
+        model._base_manager.using(using).bulk_create([
+            model(pk=obj.pk, **_values(model, obj))
+            for obj in model._base_manager.using(DEFAULT_DB_ALIAS).filter(
+                pk__in=missing,
+            )
+        ])
+
+
+def replicate_saved(sender, instance, using, raw=False, **kwargs):
+    """Copy a saved replicated row to the shards."""
+    if using == DEFAULT_DB_ALIAS and not raw:
+        replicate(sender, [instance])
+
+
+def replicate_deleted(sender, instance, using, **kwargs):
+    """Delete a replicated row, and what depends on it, from the shards."""
+    if using == DEFAULT_DB_ALIAS:
+        for alias in replica_aliases():
+            sender._base_manager.using(alias).filter(pk=instance.pk).delete()
+
+
+def reserve_id_ranges(using, **kwargs):
+    """Reserve the id range of a shard once it is migrated."""
+    reserve_id_range(using)
+
+
+class ShardRouter:
+    """
+    Route rows of sharded models to the shard of their owner, and writes
+    of replicated models to the default database.
+
+    Querysets carry no owner, so owner scoped queries pick their shard
+    with `.using(shard_for_owner(owner_id))`.
+    """
+
+    def db_for_read(self, model, **hints):
+        return self.db_for_instance(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        if model._meta.label_lower in REPLICATED_MODELS:
+            return DEFAULT_DB_ALIAS
+        return self.db_for_instance(model, hints.get('instance'))
+
+    def db_for_instance(self, model, instance):
+        label = model._meta.label_lower
+        if label not in SHARDED_MODELS or not isinstance(instance, model):
+            return None
+        if instance._state.db:
+            return instance._state.db
+        owner_id = getattr(instance, 'owner_id', None)
+        if owner_id is not None:
+            return shard_for_owner(owner_id)
+        return shard_for_id(instance.pk) if instance.pk else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        labels = SHARDED_MODELS | REPLICATED_MODELS
+        if {obj1._meta.label_lower, obj2._meta.label_lower} <= labels:
+            return True
+        return None
@@ -0,0 +1,63 @@
+"""
+Static files storage writing precompressed copies on collectstatic.
+"""
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.core.files.base import ContentFile
+
+from core.compression import ENCODINGS
+
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.html', '.js', '.json', '.map', '.svg', '.txt', '.xml',
+}
+# Static files are compressed once, so use the slowest, smallest levels.
+STATIC_COMPRESSION_LEVELS = {
+    'br': 11,
+    'gzip': 9,
+}
+
+
+class PrecompressedStaticFilesStorage(StaticFilesStorage):
+    """Save a compressed copy next to each collected compressible file."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        for name in paths:
+            _, extension = os.path.splitext(name)
+            if extension.lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            if self.size(name) < settings.COMPRESSION_MIN_SIZE:
+                continue
+            outdated = [
+                (coding, suffix, compress)
+                for coding, suffix, compress in ENCODINGS
+                if self.is_outdated(name, name + suffix)
+            ]
+            if not outdated:
+                continue
+
+            with self.open(name) as original:
+                content = original.read()
+            for coding, suffix, compress in outdated:
+                compressed = compress(
+                    content,
+                    STATIC_COMPRESSION_LEVELS[coding],
+                )
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                # Kept even when not smaller, so the file is not compressed
+                # again on every run; servers may still pick the original.
+                self.save(name + suffix, ContentFile(compressed))
+            yield name, name, True
+
+    def is_outdated(self, name, compressed_name):
+        """Return whether a compressed copy is missing or older."""
+        return (
+            not self.exists(compressed_name) or
+            self.get_modified_time(compressed_name) <
+            self.get_modified_time(name)
+        )
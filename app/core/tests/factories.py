@@ -0,0 +1,74 @@
+"""
+Helpers creating test data, many rows per query.
+
+Books are inserted with bulk_create, which skips the book change feed and
+the owner counters; tests of those go through the API instead.
+"""
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from core.fingerprints import book_fingerprint
+from core.models import Author, Genre, Condition, Book
+
+
+DEFAULT_PASSWORD = 'testpass123'
+
+_sequence = count(1)
+
+
+def _bulk_create(model, objs, **filters):
+    """Insert objs and return them with their primary keys set."""
+    created = model.objects.bulk_create(objs)
+    if created and created[0].pk is None:
+        # Backends without INSERT ... RETURNING leave the keys unset, read
+        # the rows back instead.
+        rows = model.objects.filter(**filters).order_by('-pk')[:len(objs)]
+        created = list(rows)[::-1]
+    return created
+
+
+def create_user(**params):
+    """Create and return a user with a unique email."""
+    params.setdefault('email', f'user{next(_sequence)}@example.com')
+    params.setdefault('password', DEFAULT_PASSWORD)
+    return get_user_model().objects.create_user(**params)
+
+
+def create_users(number, password=DEFAULT_PASSWORD, **params):
+    """Create users with one INSERT, hashing their shared password once."""
+    password = make_password(password)
+    users = [
+        get_user_model()(
+            email=f'user{next(_sequence)}@example.com',
+            password=password,
+            **params,
+        )
+        for _ in range(number)
+    ]
+    return _bulk_create(get_user_model(), users)
+
+
+def create_books(owner, number=1, **params):
+    """
+    Create books of an owner with one INSERT. Author, genre and condition
+    are given by name and created when missing.
+    """
+    lookups = {
+        'author': (Author, 'Test Author'),
+        'genre': (Genre, 'Test Genre'),
+        'condition': (Condition, 'Test Condition'),
+    }
+    for field, (model, name) in lookups.items():
+        value = params.get(field, name)
+        if isinstance(value, str):
+            params[field], _ = model.objects.get_or_create(name=value)
+    params.setdefault('title', 'Sample book title')
+    params.setdefault('pickup_location', 'Sample pickup location')
+    params['fingerprint'] = book_fingerprint(
+        params['title'],
+        params['author'].id,
+    )
+    books = [Book(owner=owner, **params) for _ in range(number)]
+    return _bulk_create(Book, books, owner=owner)
@@ -0,0 +1,15 @@
+"""
+Test runner running the suite in parallel by default.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner, default_test_processes
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    """Test runner defaulting --parallel to the TEST_PARALLEL setting."""
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parallel = getattr(settings, 'TEST_PARALLEL', 1)
+        parser.set_defaults(parallel=parallel or default_test_processes())
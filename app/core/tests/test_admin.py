@@ -1,10 +1,18 @@
 """
 Tests for the Django admin modifications.
 """
-from django.test import TestCase
+from importlib import import_module
+
+from django.contrib import admin
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.admin import EstimatedCountPaginator
+from core.models import Author, Genre, Condition, Book
 
 
 class AdminSiteTests(TestCase):
@@ -45,3 +53,75 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def test_books_list_query_count(self):
+        """Test the book list does not query per row."""
+        author = Author.objects.create(name='Test Author')
+        genre = Genre.objects.create(name='Test Genre')
+        condition = Condition.objects.create(name='Test Condition')
+        url = reverse('admin:core_book_changelist')
+
+        def add_book(title):
+            Book.objects.create(
+                owner=self.user,
+                title=title,
+                author=author,
+                genre=genre,
+                condition=condition,
+                pickup_location='Tbilisi',
+            )
+
+        add_book('First book')
+        with CaptureQueriesContext(connection) as one_book:
+            res = self.client.get(url)
+        self.assertContains(res, 'First book')
+
+        for number in range(5):
+            add_book(f'Book {number}')
+        with CaptureQueriesContext(connection) as many_books:
+            self.client.get(url)
+        self.assertEqual(len(many_books), len(one_book))
+
+    def test_edit_book_page_uses_autocomplete(self):
+        """Test the book edit page does not render every lookup option."""
+        url = reverse('admin:core_book_add')
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'admin-autocomplete')
+
+    def test_estimated_count_paginator_exact_for_small_tables(self):
+        """Test the paginator falls back to an exact count."""
+        users = get_user_model().objects.order_by('id')
+        paginator = EstimatedCountPaginator(users, 100)
+
+        self.assertEqual(paginator.count, 2)
+
+
+class AdminSearchIndexTests(SimpleTestCase):
+    """Test admin searches are served by expression indexes."""
+
+    def test_search_fields_indexed(self):
+        """Test each case-insensitive search has an UPPER() index."""
+        migration = import_module('core.migrations.0013_admin_search_indexes')
+        indexes = {
+            (table, column, prefix)
+            for _, table, column, prefix in migration.SEARCH_INDEXES
+        }
+        for model, model_admin in admin.site._registry.items():
+            if model._meta.app_label != 'core':
+                continue
+            for search_field in model_admin.search_fields:
+                with self.subTest(model=model, field=search_field):
+                    path = search_field.lstrip('^=').split('__')
+                    searched = model
+                    for name in path[:-1]:
+                        searched = searched._meta.get_field(name).related_model
+                    self.assertIn(
+                        (
+                            searched._meta.db_table,
+                            searched._meta.get_field(path[-1]).column,
+                            search_field.startswith('^'),
+                        ),
+                        indexes,
+                    )
@@ -1,34 +1,92 @@
 """
 Test custom Django management commands.
 """
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 
+from core.management.commands.startup_profile import parse_importtime
 
-@patch('core.management.commands.wait_for_db.Command.check')
+
+@patch('core.management.commands.wait_for_db.Command.probe')
 class CommandTests(SimpleTestCase):
     """Test commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe):
         """Test waiting for database if database ready."""
-        patched_check.return_value = True
+        patched_probe.return_value = None
 
-        call_command('wait_for_db')
+        call_command('wait_for_db', stdout=StringIO())
 
-        patched_check.assert_called_once_with(databases=['default'])
+        patched_probe.assert_called_once_with('default')
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_probe):
         """Test waiting for database when getting OperationalError."""
-        patched_check.side_effect = [Psycopg2OpError] * 2 + \
-            [OperationalError] * 3 + [True]
+        patched_probe.side_effect = [Psycopg2OpError] * 2 + \
+            [OperationalError] * 3 + [None]
+
+        call_command('wait_for_db', stdout=StringIO())
+
+        self.assertEqual(patched_probe.call_count, 6)
+        patched_probe.assert_called_with('default')
+
+    @patch('random.uniform', side_effect=lambda low, high: high)
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, _, patched_probe):
+        """Test the wait between attempts doubles up to the maximum."""
+        patched_probe.side_effect = [OperationalError] * 5 + [None]
+
+        call_command(
+            'wait_for_db',
+            initial_delay=1,
+            max_delay=4,
+            stdout=StringIO(),
+        )
+
+        waits = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(waits, [1, 2, 4, 4, 4])
+
+    @patch('time.sleep')
+    def test_wait_for_db_timeout(self, patched_sleep, patched_probe):
+        """Test an error is raised once the timeout has passed."""
+        patched_probe.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+        patched_sleep.assert_not_called()
+
+    @patch('core.management.commands.wait_for_db.call_command')
+    def test_wait_for_db_migrate(self, patched_call_command, patched_probe):
+        """Test migrations are applied when requested."""
+        call_command('wait_for_db', migrate=True, stdout=StringIO())
+
+        patched_call_command.assert_called_once_with(
+            'migrate',
+            database='default',
+            interactive=False,
+        )
+
+
+class StartupProfileTests(SimpleTestCase):
+    """Test the startup profile command."""
+
+    def test_parse_importtime(self):
+        """Test -X importtime output is parsed into self times."""
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     django.utils\n'
+            'import time:       300 |        420 |   django\n'
+            'Traceback: unrelated line\n'
+        )
 
-        call_command('wait_for_db')
+        modules = parse_importtime(output)
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
+        self.assertEqual(modules, [('django.utils', 120), ('django', 300)])
@@ -0,0 +1,148 @@
+"""
+Tests for response compression and precompressed static files.
+"""
+import gzip
+import tempfile
+
+import brotli
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.compression import accepted_encodings, choose_encoding
+from core.middleware import CompressionMiddleware
+from core.models import Author, Genre, Condition, Book
+from core.storage import PrecompressedStaticFilesStorage
+
+BODY = b'{"title": "Sample book"}' * 100
+
+
+def compress_response(response, accept_encoding='gzip, br'):
+    """Return a response passed through the compression middleware."""
+    request = RequestFactory().get(
+        '/',
+        HTTP_ACCEPT_ENCODING=accept_encoding,
+    )
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test the compression middleware."""
+
+    def test_accepted_encodings(self):
+        """Test codings with a zero quality are not accepted."""
+        self.assertEqual(
+            accepted_encodings('gzip;q=0.5, br;q=0, deflate'),
+            {'gzip', 'deflate'},
+        )
+
+    def test_wildcard_does_not_override_refused_coding(self):
+        """Test `*` only accepts codings that are not listed."""
+        self.assertEqual(choose_encoding('br;q=0, *')[0], 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0, *')[0], 'br')
+        self.assertEqual(choose_encoding('br;q=0, gzip;q=0, *'), (None, None))
+        self.assertEqual(choose_encoding('*;q=0'), (None, None))
+
+    def test_brotli_preferred(self):
+        """Test brotli is used when the client accepts it."""
+        res = compress_response(
+            HttpResponse(BODY, content_type='application/json'),
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(res.content), BODY)
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+
+    def test_gzip(self):
+        """Test gzip is used when brotli is not accepted."""
+        res = compress_response(
+            HttpResponse(BODY, content_type='application/json'),
+            accept_encoding='gzip',
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), BODY)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+
+    def test_small_response_not_compressed(self):
+        """Test responses under the minimum size are sent as is."""
+        res = compress_response(
+            HttpResponse(b'{}', content_type='application/json'),
+        )
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_content_type_not_allowed(self):
+        """Test content types outside the allowlist are sent as is."""
+        res = compress_response(HttpResponse(BODY, content_type='image/png'))
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_streaming_not_compressed(self):
+        """Test streaming responses are sent as is."""
+        res = compress_response(
+            StreamingHttpResponse([BODY], content_type='text/csv'),
+        )
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+
+class CompressedBookListTests(TestCase):
+    """Test compression of API responses."""
+
+    def test_book_list_compressed(self):
+        """Test a large book list is sent compressed."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        author = Author.objects.create(name='Test Author')
+        genre = Genre.objects.create(name='Test Genre')
+        condition = Condition.objects.create(name='Test Condition')
+        Book.objects.bulk_create([
+            Book(
+                owner=user,
+                title=f'Book {number}',
+                author=author,
+                genre=genre,
+                condition=condition,
+                pickup_location='Library',
+            )
+            for number in range(20)
+        ])
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(reverse('book:book-list'), HTTP_ACCEPT_ENCODING='br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+
+
+class PrecompressedStorageTests(SimpleTestCase):
+    """Test precompressing collected static files."""
+
+    def test_post_process_writes_compressed_copies(self):
+        """Test compressible files get .gz and .br copies."""
+        with tempfile.TemporaryDirectory() as location:
+            storage = PrecompressedStaticFilesStorage(location=location)
+            css = b'body { margin: 0; }\n' * 100
+            storage.save('app.css', ContentFile(css))
+            storage.save('logo.png', ContentFile(b'\x89PNG' * 500))
+
+            processed = list(storage.post_process(['app.css', 'logo.png']))
+
+            self.assertEqual(processed, [('app.css', 'app.css', True)])
+            with storage.open('app.css.gz') as compressed:
+                self.assertEqual(gzip.decompress(compressed.read()), css)
+            with storage.open('app.css.br') as compressed:
+                self.assertEqual(brotli.decompress(compressed.read()), css)
+            self.assertFalse(storage.exists('logo.png.gz'))
+            self.assertEqual(
+                list(storage.post_process(['app.css'])),
+                [],
+            )
@@ -0,0 +1,166 @@
+"""
+Tests for the shared middleware.
+"""
+import json
+import logging
+import os
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import memory
+from core.logs import JsonFormatter, QueueStreamHandler
+
+HEALTHZ_URL = reverse('health:healthz')
+STATUS_URL = reverse('health:status')
+BOOKS_URL = reverse('book:book-list')
+ADMIN_LOGIN_URL = reverse('admin:login')
+
+
+class AccessLogMiddlewareTests(TestCase):
+    """Test the structured access log."""
+
+    def test_request_logged(self):
+        """Test one structured line is logged per request."""
+        with self.assertLogs('access', level='INFO') as logs:
+            self.client.get(STATUS_URL)
+
+        self.assertEqual(len(logs.records), 1)
+        fields = logs.records[0].fields
+        self.assertEqual(fields['route'], 'health:status')
+        self.assertEqual(fields['status'], 403)
+        self.assertIsNone(fields['user_id'])
+        self.assertGreater(fields['response_bytes'], 0)
+        self.assertGreaterEqual(fields['db_queries'], 0)
+
+    @override_settings(ACCESS_LOG_SAMPLE_RATES={'health:healthz': 0.5})
+    def test_request_sampled(self):
+        """Test requests to sampled routes are logged at their rate."""
+        with self.assertLogs('access', level='INFO') as logs:
+            with patch('random.random', side_effect=[0.7, 0.2]):
+                self.client.get(HEALTHZ_URL)
+                self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].fields['sample_rate'], 0.5)
+
+
+class MemoryProfileMiddlewareTests(TestCase):
+    """Test the tracing of sampled requests with tracemalloc."""
+
+    def setUp(self):
+        memory.reset()
+
+    def tearDown(self):
+        memory.reset()
+
+    def test_request_not_traced_by_default(self):
+        """Test no request is traced unless a sample rate is set."""
+        self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(memory.stats()['routes'], {})
+
+    @override_settings(MEMORY_PROFILE_SAMPLE_RATES={'health:status': 1.0})
+    def test_sampled_request_traced(self):
+        """Test sampled requests add their peak memory to their route."""
+        with self.assertLogs('access', level='INFO') as logs:
+            self.client.get(STATUS_URL)
+            self.client.get(ADMIN_LOGIN_URL)
+
+        stats = memory.stats()
+        self.assertFalse(stats['tracing'])
+        self.assertEqual(list(stats['routes']), ['health:status'])
+        route = stats['routes']['health:status']
+        self.assertEqual(route['requests'], 1)
+        self.assertGreater(route['peak_bytes_max'], 0)
+        fields = [record.fields for record in logs.records]
+        self.assertEqual(
+            fields[0]['memory_peak_bytes'],
+            route['peak_bytes_max'],
+        )
+        self.assertIsNone(fields[1]['memory_peak_bytes'])
+
+    @override_settings(MEMORY_PROFILE_SAMPLE_RATE=1.0)
+    def test_one_request_traced_at_a_time(self):
+        """Test requests are not traced while another request is."""
+        trace = memory.RequestTrace()
+        self.assertTrue(trace.start())
+        try:
+            self.client.get(HEALTHZ_URL)
+        finally:
+            trace.stop()
+
+        self.assertEqual(memory.stats()['routes'], {})
+
+
+class QueueStreamHandlerTests(TestCase):
+    """Test the non-blocking log handler."""
+
+    def test_full_queue_drops_records(self):
+        """Test records are dropped instead of blocking on a full queue."""
+        handler = QueueStreamHandler(maxsize=1)
+        handler.close()
+        handler.setFormatter(JsonFormatter())
+        record = logging.makeLogRecord({'msg': 'hello', 'fields': {'a': 1}})
+
+        handler.handle(record)
+        handler.handle(record)
+
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(
+            json.loads(handler.queue.get_nowait().msg)['a'],
+            1,
+        )
+
+    @skipUnless(hasattr(os, 'fork'), 'Needs os.fork.')
+    def test_forked_process_starts_own_thread(self):
+        """Test records are written in processes forked after setup."""
+        read_fd, write_fd = os.pipe()
+        stream = os.fdopen(write_fd, 'w')
+        handler = QueueStreamHandler(stream)
+        handler.setFormatter(JsonFormatter())
+        record = logging.makeLogRecord({'msg': 'hello', 'fields': {'a': 1}})
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                handler.handle(record)
+                handler.close()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        handler.close()
+        stream.close()
+        with os.fdopen(read_fd) as pipe:
+            line = pipe.readline()
+
+        self.assertEqual(json.loads(line)['a'], 1)
+
+
+class SessionlessPathTests(TestCase):
+    """Test the session middleware stack is skipped for API routes."""
+
+    def test_api_route_skips_session_middleware(self):
+        """Test API requests get no session, user or CSRF handling."""
+        res = self.client.get(BOOKS_URL)
+
+        self.assertFalse(hasattr(res.wsgi_request, 'session'))
+        self.assertNotIn('csrftoken', res.cookies)
+
+    def test_admin_keeps_session_middleware(self):
+        """Test admin requests still use sessions and CSRF."""
+        res = self.client.get(ADMIN_LOGIN_URL)
+
+        self.assertTrue(hasattr(res.wsgi_request, 'session'))
+        self.assertTrue(hasattr(res.wsgi_request, 'user'))
+        self.assertIn('csrftoken', res.cookies)
+
+    def test_admin_post_requires_csrf(self):
+        """Test CSRF is still enforced outside the API."""
+        client = self.client_class(enforce_csrf_checks=True)
+
+        res = client.post(ADMIN_LOGIN_URL, {})
+
+        self.assertEqual(res.status_code, 403)
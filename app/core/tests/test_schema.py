@@ -0,0 +1,91 @@
+"""
+Tests for the cached OpenAPI schema.
+"""
+import gzip
+import io
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class CachedSchemaTests(SimpleTestCase):
+    """Test serving the cached schema."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.schema_dir = Path(self.tmp_dir.name)
+        schema.clear_cache()
+
+    def tearDown(self):
+        schema.clear_cache()
+        self.tmp_dir.cleanup()
+
+    def test_schema_generated_once(self):
+        """Test the schema is generated on demand and memoized."""
+        with override_settings(SCHEMA_PREBUILT_DIR=self.schema_dir):
+            res1 = self.client.get(SCHEMA_URL)
+            res2 = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res1.status_code, 200)
+        self.assertIn(b'openapi:', res1.content)
+        self.assertEqual(res2.status_code, 200)
+        self.assertIn(b'"openapi"', res2.content)
+        self.assertEqual(len(schema._documents), 2)
+
+    @override_settings(LANGUAGES=[('en-us', 'English'), ('ka', 'Georgian')])
+    def test_schema_languages(self):
+        """Test only languages of LANGUAGES get their own document."""
+        with override_settings(SCHEMA_PREBUILT_DIR=self.schema_dir):
+            for lang in ['ka', 'en-us', 'xx', 'yy', '']:
+                res = self.client.get(SCHEMA_URL, {'lang': lang})
+                self.assertEqual(res.status_code, 200)
+
+        self.assertEqual(
+            sorted(lang or '' for _, lang in schema._documents),
+            ['', '', 'ka', 'ka'],
+        )
+
+    def test_schema_served_from_prebuilt_file(self):
+        """Test the schema written by build_schema is served."""
+        call_command(
+            'build_schema',
+            output_dir=self.schema_dir,
+            stdout=io.StringIO(),
+        )
+        path = self.schema_dir / 'schema.yaml'
+        path.write_bytes(path.read_bytes() + b'# prebuilt\n')
+
+        with override_settings(SCHEMA_PREBUILT_DIR=self.schema_dir):
+            res = self.client.get(SCHEMA_URL)
+
+        self.assertTrue(res.content.endswith(b'# prebuilt\n'))
+        self.assertTrue((self.schema_dir / 'schema.json.gz').exists())
+
+    def test_schema_etag_not_modified(self):
+        """Test a matching If-None-Match returns 304."""
+        with override_settings(SCHEMA_PREBUILT_DIR=self.schema_dir):
+            res1 = self.client.get(SCHEMA_URL)
+            res2 = self.client.get(
+                SCHEMA_URL,
+                HTTP_IF_NONE_MATCH=res1['ETag'],
+            )
+
+        self.assertEqual(res2.status_code, 304)
+        self.assertEqual(res2.content, b'')
+
+    def test_schema_gzip(self):
+        """Test the schema is sent gzipped when the client accepts it."""
+        with override_settings(SCHEMA_PREBUILT_DIR=self.schema_dir):
+            plain = self.client.get(SCHEMA_URL)
+            res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertIn('Accept-Encoding', res['Vary'])
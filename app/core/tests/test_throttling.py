@@ -0,0 +1,135 @@
+"""
+Tests for request throttling.
+"""
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ThrottleBucket
+from core.throttling import CacheStore, DatabaseStore, LocalMemoryStore
+
+TOKEN_URL = reverse('user:token')
+
+
+class LocalMemoryStoreTests(SimpleTestCase):
+    """Test the token bucket arithmetic."""
+
+    def test_bucket_empties_and_refills(self):
+        """Test a bucket allows `capacity` calls then refills over time."""
+        store = LocalMemoryStore()
+
+        results = [store.consume('key', 2, 1.0, 100.0) for _ in range(3)]
+
+        self.assertEqual(results[:2], [(True, None), (True, None)])
+        self.assertEqual(results[2], (False, 1.0))
+        self.assertEqual(store.consume('key', 2, 1.0, 100.5), (False, 0.5))
+        self.assertEqual(store.consume('key', 2, 1.0, 101.0), (True, None))
+
+    def test_buckets_are_bounded(self):
+        """Test the least recently used buckets are evicted."""
+        store = LocalMemoryStore(max_entries=2)
+
+        for key in ['a', 'b', 'c']:
+            store.consume(key, 1, 1.0, 100.0)
+
+        self.assertEqual(list(store.buckets), ['b', 'c'])
+
+
+class CacheStoreTests(SimpleTestCase):
+    """Test the cache backed store."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_consume(self):
+        """Test buckets are shared through the cache."""
+        self.assertTrue(CacheStore().consume('key', 1, 1.0, 100.0)[0])
+        self.assertFalse(CacheStore().consume('key', 1, 1.0, 100.0)[0])
+
+    def test_locked_bucket_refused(self):
+        """Test a bucket locked by another request is not read unlocked."""
+        cache.add('key:lock', True)
+
+        with patch('time.sleep'):
+            allowed, wait = CacheStore().consume('key', 5, 1.0, 100.0)
+
+        self.assertFalse(allowed)
+        self.assertEqual(wait, CacheStore.lock_timeout)
+        self.assertIsNone(cache.get('key'))
+
+    def test_lock_released(self):
+        """Test the bucket lock is released after each request."""
+        CacheStore().consume('key', 5, 1.0, 100.0)
+
+        self.assertIsNone(cache.get('key:lock'))
+
+
+class DatabaseStoreTests(TestCase):
+    """Test the database backed store."""
+
+    def test_consume(self):
+        """Test bucket state is kept in a single row."""
+        store = DatabaseStore()
+
+        self.assertTrue(store.consume('key', 1, 0.5, 100.0)[0])
+        self.assertEqual(store.consume('key', 1, 0.5, 100.0), (False, 2.0))
+        self.assertEqual(ThrottleBucket.objects.count(), 1)
+
+    def test_clear_expired_buckets(self):
+        """Test buckets unused for the longest rate period are deleted."""
+        now = time.time()
+        ThrottleBucket.objects.create(key='old', tokens=0, updated=now - 7200)
+        ThrottleBucket.objects.create(key='new', tokens=0, updated=now - 60)
+        out = StringIO()
+
+        call_command('clear_throttle_buckets', stdout=out)
+
+        self.assertEqual(
+            list(ThrottleBucket.objects.values_list('key', flat=True)),
+            ['new'],
+        )
+        self.assertIn('Deleted 1 throttle buckets.', out.getvalue())
+
+
+class ThrottledApiTests(TestCase):
+    """Test throttling of the API."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_token_endpoint_throttled_per_ip(self):
+        """Test too many token requests from one IP are rejected."""
+        rates = {'user': '100/min', 'token': '2/min'}
+        payload = {'email': 'test@example.com', 'password': 'badpass'}
+
+        with override_settings(REST_FRAMEWORK={
+            'DEFAULT_THROTTLE_CLASSES': [
+                'core.throttling.ScopedBucketThrottle',
+            ],
+            'DEFAULT_THROTTLE_RATES': rates,
+        }):
+            codes = [
+                self.client.post(TOKEN_URL, payload).status_code
+                for _ in range(3)
+            ]
+            other_ip = self.client.post(
+                TOKEN_URL,
+                payload,
+                REMOTE_ADDR='10.0.0.2',
+            )
+
+        self.assertEqual(codes[:2], [status.HTTP_400_BAD_REQUEST] * 2)
+        self.assertEqual(codes[2], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(other_ip.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,224 @@
+"""
+Token bucket request throttling with pluggable state stores.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.models import ThrottleBucket
+
+
+def refill(tokens, updated, now, capacity, refill_rate):
+    """Return the tokens in a bucket after refilling it up to now."""
+    elapsed = max(now - updated, 0)
+    return min(capacity, tokens + elapsed * refill_rate)
+
+
+def take(tokens, refill_rate):
+    """Take one token and return (allowed, tokens left, seconds to wait)."""
+    if tokens >= 1:
+        return True, tokens - 1, None
+    return False, tokens, (1 - tokens) / refill_rate
+
+
+class BaseThrottleStore:
+    """Keep token bucket state, one constant-size entry per key."""
+
+    def consume(self, key, capacity, refill_rate, now):
+        """Take a token from a bucket and return (allowed, wait)."""
+        raise NotImplementedError('.consume() must be overridden')
+
+
+class LocalMemoryStore(BaseThrottleStore):
+    """Buckets held in the memory of the current process."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now):
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = refill(tokens, updated, now, capacity, refill_rate)
+            allowed, tokens, wait = take(tokens, refill_rate)
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_entries:
+                self.buckets.popitem(last=False)
+        return allowed, wait
+
+
+class CacheStore(BaseThrottleStore):
+    """
+    Buckets held in the default Django cache, updated under a lock taken
+    with the atomic cache.add.
+
+    Limits are only shared between workers when the cache is, like
+    memcached or Redis; the local memory cache keeps one per process.
+    """
+    lock_timeout = 1
+    lock_attempts = 50
+    lock_delay = 0.002
+
+    def consume(self, key, capacity, refill_rate, now):
+        lock_key = f'{key}:lock'
+        for _ in range(self.lock_attempts):
+            if cache.add(lock_key, True, self.lock_timeout):
+                break
+            time.sleep(self.lock_delay)
+        else:
+            # Refuse rather than let a burst through an unlocked bucket.
+            return False, self.lock_timeout
+
+        try:
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens = refill(tokens, updated, now, capacity, refill_rate)
+            allowed, tokens, wait = take(tokens, refill_rate)
+            cache.set(key, (tokens, now), capacity / refill_rate)
+        finally:
+            cache.delete(lock_key)
+        return allowed, wait
+
+
+class DatabaseStore(BaseThrottleStore):
+    """Buckets held in the database, updated under a row lock."""
+
+    def consume(self, key, capacity, refill_rate, now):
+        with transaction.atomic():
+            buckets = ThrottleBucket.objects.select_for_update()
+            bucket, _ = buckets.get_or_create(
+                key=key,
+                defaults={'tokens': capacity, 'updated': now},
+            )
+            tokens = refill(
+                bucket.tokens,
+                bucket.updated,
+                now,
+                capacity,
+                refill_rate,
+            )
+            allowed, bucket.tokens, wait = take(tokens, refill_rate)
+            bucket.updated = now
+            bucket.save(update_fields=['tokens', 'updated'])
+        return allowed, wait
+
+    @staticmethod
+    def expire(updated_before):
+        """
+        Delete the buckets not used since `updated_before`, which must be
+        at least the longest rate period ago so that they refilled, and
+        return how many were deleted.
+        """
+        return ThrottleBucket.objects.filter(
+            updated__lt=updated_before,
+        ).delete()[0]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store():
+    """Return the configured throttle store instance."""
+    path = settings.THROTTLE_STORE
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, import_string(path)())
+    return store
+
+
+def longest_rate_period():
+    """Return the seconds of the longest period of the throttle rates."""
+    return max(
+        (
+            ScopedBucketThrottle().parse_rate(rate)[1]
+            for rate in api_settings.DEFAULT_THROTTLE_RATES.values()
+            if rate
+        ),
+        default=0,
+    )
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Limit requests with a token bucket of `rate` tokens refilled evenly
+    over the rate period.
+    """
+
+    def get_rate(self):
+        """Return the rate of the scope from the current settings."""
+        if not getattr(self, 'scope', None):
+            raise ImproperlyConfigured(
+                f'You must set either `.scope` or `.rate` for '
+                f'"{self.__class__.__name__}" throttle'
+            )
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'No default throttle rate set for "{self.scope}" scope'
+            )
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self.retry_after = get_store().consume(
+            self.key,
+            self.num_requests,
+            self.num_requests / self.duration,
+            self.timer(),
+        )
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    """Throttle authenticated users by id and anonymous users by IP."""
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class ScopedBucketThrottle(TokenBucketThrottle):
+    """Throttle views with a `throttle_scope` per client IP."""
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        # The scope, and so the rate, is only known once the view is.
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
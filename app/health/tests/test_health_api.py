@@ -0,0 +1,163 @@
+"""
+Tests for the health check endpoints.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import memory
+from health import views
+
+HEALTHZ_URL = reverse('health:healthz')
+READYZ_URL = reverse('health:readyz')
+STATUS_URL = reverse('health:status')
+MEMORY_URL = reverse('health:memory')
+
+
+class HealthCheckTests(TestCase):
+    """Test the liveness and readiness probes."""
+
+    def setUp(self):
+        views.reset_readiness()
+
+    def tearDown(self):
+        views.reset_readiness()
+
+    def test_healthz_without_database(self):
+        """Test the liveness probe does not query the database."""
+        with self.assertNumQueries(0):
+            res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readyz_result_cached(self):
+        """Test the readiness probe reuses a recent database check."""
+        with patch.object(views, 'ping_database') as patched_ping:
+            res1 = self.client.get(READYZ_URL)
+            res2 = self.client.get(READYZ_URL)
+
+        self.assertEqual(res1.status_code, status.HTTP_200_OK)
+        self.assertEqual(res2.status_code, status.HTTP_200_OK)
+        patched_ping.assert_called_once()
+
+    def test_readyz_database_unavailable(self):
+        """Test the readiness probe fails when the database is down."""
+        with patch.object(
+            views,
+            'ping_database',
+            side_effect=OperationalError,
+        ):
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class PingDatabaseTests(TransactionTestCase):
+    """Test the database ping of the readiness probe."""
+
+    def test_ping_in_transaction(self):
+        """Test the ping runs in a transaction, as SET LOCAL needs."""
+        in_atomic_block = {}
+
+        def record(execute, sql, params, many, context):
+            in_atomic_block[sql] = connection.in_atomic_block
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            views.ping_database()
+
+        self.assertTrue(in_atomic_block['SELECT 1'])
+
+
+class StatusApiTests(TestCase):
+    """Test the detailed status page."""
+    # The page reports on every configured database.
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_status_requires_admin(self):
+        """Test regular users cannot see the status page."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(STATUS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_status_for_admin(self):
+        """Test admins see database latency and migration state."""
+        admin = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(STATUS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        database = res.data['databases']['default']
+        self.assertIn('latency_ms', database)
+        self.assertEqual(database['migrations']['pending'], [])
+        self.assertGreater(database['migrations']['applied'], 0)
+
+
+@override_settings(MEMORY_PROFILE_SAMPLE_RATES={'health:healthz': 1.0})
+class MemoryApiTests(TestCase):
+    """Test the memory stats page."""
+
+    def setUp(self):
+        memory.reset()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+
+    def tearDown(self):
+        memory.reset()
+
+    def test_memory_requires_admin(self):
+        """Test regular users cannot see the memory stats."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(MEMORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_memory_for_admin(self):
+        """Test admins see the traced routes of the process."""
+        self.client.get(HEALTHZ_URL)
+        self.client.force_authenticate(self.admin)
+
+        res = self.client.get(MEMORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(res.data['max_rss_bytes'], 0)
+        self.assertEqual(res.data['routes']['health:healthz']['requests'], 1)
+
+    def test_memory_reset(self):
+        """Test admins can clear the stats of the process."""
+        self.client.get(HEALTHZ_URL)
+        self.client.force_authenticate(self.admin)
+
+        res = self.client.delete(MEMORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(memory.stats()['routes'], {})
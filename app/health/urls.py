@@ -0,0 +1,16 @@
+"""
+URL mappings for the health checks.
+"""
+from django.urls import path
+
+from health import views
+
+
+app_name = 'health'
+
+urlpatterns = [
+    path('healthz', views.healthz, name='healthz'),
+    path('readyz', views.readyz, name='readyz'),
+    path('status/', views.StatusView.as_view(), name='status'),
+    path('status/memory/', views.MemoryView.as_view(), name='memory'),
+]
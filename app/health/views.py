@@ -0,0 +1,150 @@
+"""
+Views for the health checks.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import DatabaseError
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import authentication, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from app.startup import timings
+from core import memory
+
+
+_readiness = {'checked_at': None, 'ok': False}
+_readiness_lock = threading.Lock()
+
+
+def ping_database(alias=DEFAULT_DB_ALIAS):
+    """Run SELECT 1 with a short timeout and return the latency in ms."""
+    connection = connections[alias]
+    started = time.perf_counter()
+    with transaction.atomic(using=alias):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SET LOCAL statement_timeout = %s',
+                    [settings.HEALTH_CHECK_TIMEOUT_MS],
+                )
+            cursor.execute('SELECT 1')
+    return (time.perf_counter() - started) * 1000
+
+
+def database_ready():
+    """Return whether the database answers, re-checking at most so often."""
+    now = time.monotonic()
+    with _readiness_lock:
+        checked_at = _readiness['checked_at']
+        if (
+            checked_at is None or
+            now - checked_at >= settings.READINESS_CACHE_SECONDS
+        ):
+            try:
+                ping_database()
+                _readiness['ok'] = True
+            except DatabaseError:
+                _readiness['ok'] = False
+            _readiness['checked_at'] = now
+        return _readiness['ok']
+
+
+def reset_readiness():
+    """Forget the cached readiness result."""
+    with _readiness_lock:
+        _readiness['checked_at'] = None
+
+
+@never_cache
+def healthz(request):
+    """Report that the process is up, without touching the database."""
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def readyz(request):
+    """Report whether the process can serve requests."""
+    if database_ready():
+        return JsonResponse({'status': 'ok'})
+    return JsonResponse({'status': 'unavailable'}, status=503)
+
+
+class StatusView(APIView):
+    """Detailed status of the process and its database, for admins."""
+    authentication_classes = [
+        authentication.SessionAuthentication,
+        authentication.TokenAuthentication,
+    ]
+    permission_classes = [permissions.IsAdminUser]
+    throttle_classes = []
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        return Response({
+            'startup_seconds': timings,
+            'databases': {
+                alias: self.database_status(alias)
+                for alias in settings.DATABASES
+            },
+        })
+
+    def database_status(self, alias):
+        """Return latency, connection and migration state of a database."""
+        connection = connections[alias]
+        status = {
+            'vendor': connection.vendor,
+            'connection': {
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+                'open': connection.connection is not None,
+            },
+        }
+        try:
+            status['latency_ms'] = round(ping_database(alias), 3)
+            executor = MigrationExecutor(connection)
+            plan = executor.migration_plan(
+                executor.loader.graph.leaf_nodes()
+            )
+        except DatabaseError as error:
+            status['error'] = str(error)
+            return status
+
+        if connection.close_at is not None:
+            status['connection']['expires_in_seconds'] = round(
+                connection.close_at - time.monotonic(), 3
+            )
+        status['migrations'] = {
+            'applied': len(executor.loader.applied_migrations),
+            'pending': [
+                f'{migration.app_label}.{migration.name}'
+                for migration, _ in plan
+            ],
+        }
+        return status
+
+
+class MemoryView(APIView):
+    """Memory stats of the process answering, for admins."""
+    authentication_classes = [
+        authentication.SessionAuthentication,
+        authentication.TokenAuthentication,
+    ]
+    permission_classes = [permissions.IsAdminUser]
+    throttle_classes = []
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+        return Response(dict(memory.stats(), pid=os.getpid()))
+
+    @extend_schema(responses={204: None})
+    def delete(self, request):
+        memory.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
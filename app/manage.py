@@ -3,10 +3,22 @@
 import os
 import sys
 
+# Commands that only touch the database schema, run with the lighter
+# 'migrate' process role unless DJANGO_PROCESS_ROLE says otherwise.
+MIGRATE_COMMANDS = {'wait_for_db', 'migrate', 'showmigrations'}
+
+# Commands run with the test settings unless DJANGO_SETTINGS_MODULE says
+# otherwise.
+TEST_COMMANDS = {'test'}
+
 
 def main():
     """Run administrative tasks."""
+    if len(sys.argv) > 1 and sys.argv[1] in TEST_COMMANDS:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings_test')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    if len(sys.argv) > 1 and sys.argv[1] in MIGRATE_COMMANDS:
+        os.environ.setdefault('DJANGO_PROCESS_ROLE', 'migrate')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -0,0 +1,67 @@
+"""
+Authentication with signed access tokens.
+"""
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils.translation import gettext_lazy as _
+
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from rest_framework import authentication, exceptions
+
+from user.tokens import read_access_token, revocations
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticate `Authorization: Bearer <access token>` requests from the
+    signed token claims alone, without querying the user.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header.')
+            )
+
+        try:
+            claims = read_access_token(auth[1].decode())
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if revocations.is_revoked(claims['rid']):
+            raise exceptions.AuthenticationFailed(_('Token has been revoked.'))
+
+        return self.get_user(claims), claims
+
+    def get_user(self, claims):
+        """Return a user instance built from token claims."""
+        user = get_user_model()(
+            pk=claims['uid'],
+            email=claims['email'],
+            is_staff=claims['staff'],
+            is_active=True,
+        )
+        user._state.adding = False
+        return user
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    """Describe SignedTokenAuthentication in the API schema."""
+    target_class = 'user.authentication.SignedTokenAuthentication'
+    name = 'signedTokenAuth'
+
+    def get_security_definition(self, auto_schema):
+        return {
+            'type': 'http',
+            'scheme': 'bearer',
+            'description': 'Access token from /api/user/token/pair/.',
+        }
@@ -0,0 +1,76 @@
+"""
+Django command to compare the cost of the token authentication schemes.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+from user.authentication import SignedTokenAuthentication
+from user.tokens import create_access_token, create_refresh_token
+
+
+class Command(BaseCommand):
+    """Django command to benchmark request authentication."""
+    help = (
+        'Time authenticating requests with DRF tokens and with signed '
+        'access tokens. Test data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=5000,
+            help='Number of timed authentications per scheme.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email='bench-auth@example.com',
+            )
+            token = Token.objects.create(user=user)
+            _, refresh_token = create_refresh_token(user)
+            schemes = [
+                ('TokenAuthentication', TokenAuthentication(),
+                 f'Token {token.key}'),
+                ('SignedTokenAuthentication', SignedTokenAuthentication(),
+                 f'Bearer {create_access_token(refresh_token)}'),
+            ]
+            for name, backend, header in schemes:
+                seconds, queries = self.bench(
+                    backend,
+                    header,
+                    options['requests'],
+                )
+                self.stdout.write(
+                    f'{name:>26}: {seconds * 1e6:8.1f} us/request, '
+                    f'{queries} queries/request'
+                )
+            transaction.set_rollback(True)
+
+    def bench(self, backend, header, requests):
+        """Return seconds and queries per authentication."""
+        factory = RequestFactory()
+
+        def authenticate():
+            request = Request(factory.get('/', HTTP_AUTHORIZATION=header))
+            return backend.authenticate(request)
+
+        authenticate()
+        with CaptureQueriesContext(connection) as queries:
+            authenticate()
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            authenticate()
+        elapsed = time.perf_counter() - started
+        return elapsed / requests, len(queries)
@@ -9,6 +9,8 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from user.tokens import get_refresh_token
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the user object."""
@@ -57,3 +59,33 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for a refresh token."""
+    refresh = serializers.CharField(trim_whitespace=False)
+
+    def validate(self, attrs):
+        """Validate the refresh token is active."""
+        token = get_refresh_token(attrs['refresh'])
+        if token is None:
+            msg = _('Invalid or expired refresh token.')
+            raise serializers.ValidationError(msg, code='authorization')
+
+        attrs['token'] = token
+        return attrs
+
+
+class GenreStatsSerializer(serializers.Serializer):
+    """Serializer for the book counts of one genre."""
+    id = serializers.IntegerField(source='genre.id')
+    name = serializers.CharField(source='genre.name')
+    total = serializers.IntegerField()
+    available = serializers.IntegerField()
+
+
+class UserStatsSerializer(serializers.Serializer):
+    """Serializer for the book counts of a user."""
+    total = serializers.IntegerField()
+    available = serializers.IntegerField()
+    genres = GenreStatsSerializer(many=True)
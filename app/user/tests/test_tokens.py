@@ -0,0 +1,137 @@
+"""
+Tests for signed access tokens and refresh tokens.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import RefreshToken
+from user.tokens import revocations
+
+TOKEN_PAIR_URL = reverse('user:token-pair')
+TOKEN_REFRESH_URL = reverse('user:token-refresh')
+TOKEN_REVOKE_URL = reverse('user:token-revoke')
+BOOKS_URL = reverse('book:book-list')
+
+
+class TokenLifecycleTests(TestCase):
+    """Test issuing, using and revoking tokens."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        revocations.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        # Leave the token throttle buckets empty for other tests.
+        cache.clear()
+
+    def create_pair(self):
+        res = self.client.post(TOKEN_PAIR_URL, {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data
+
+    def test_create_token_pair(self):
+        """Test valid credentials give an access and a refresh token."""
+        data = self.create_pair()
+
+        self.assertIn('access', data)
+        self.assertIn('refresh', data)
+        token = RefreshToken.objects.get(user=self.user)
+        self.assertNotEqual(token.key_hash, data['refresh'])
+
+    def test_create_token_pair_bad_credentials(self):
+        """Test no tokens are issued for invalid credentials."""
+        res = self.client.post(TOKEN_PAIR_URL, {
+            'email': 'test@example.com',
+            'password': 'wrong',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RefreshToken.objects.exists())
+
+    def test_access_token_authenticates_without_user_query(self):
+        """Test book requests authenticate from the token alone."""
+        data = self.create_pair()
+        revocations.reload()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {data["access"]}')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(BOOKS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_expired_access_token_rejected(self):
+        """Test access tokens stop working once expired."""
+        data = self.create_pair()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {data["access"]}')
+
+        with override_settings(ACCESS_TOKEN_LIFETIME=timedelta(seconds=-1)):
+            res = self.client.get(BOOKS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_access_token(self):
+        """Test a refresh token gives a new working access token."""
+        data = self.create_pair()
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'refresh': data['refresh']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        access = res.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(
+            self.client.get(BOOKS_URL).status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_revoke_token(self):
+        """Test revoking invalidates the refresh and access tokens."""
+        data = self.create_pair()
+
+        res = self.client.post(TOKEN_REVOKE_URL, {'refresh': data['refresh']})
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        refresh = self.client.post(
+            TOKEN_REFRESH_URL,
+            {'refresh': data['refresh']},
+        )
+        self.assertEqual(refresh.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {data["access"]}')
+        self.assertEqual(
+            self.client.get(BOOKS_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_revocation_seen_by_other_processes(self):
+        """Test revocations are picked up when the list is reloaded."""
+        data = self.create_pair()
+        token = RefreshToken.objects.get(user=self.user)
+        self.assertFalse(revocations.is_revoked(token.pk))
+
+        RefreshToken.objects.filter(pk=token.pk).update(
+            revoked_at=token.created_at,
+        )
+        revocations.reload()
+
+        self.assertTrue(revocations.is_revoked(token.pk))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {data["access"]}')
+        self.assertEqual(
+            self.client.get(BOOKS_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
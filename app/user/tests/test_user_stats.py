@@ -0,0 +1,168 @@
+"""
+Tests for the user book stats API.
+"""
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from book import counters
+from core.models import Author, Genre, Condition, Book, BookCount
+
+
+STATS_URL = reverse('user:me-stats')
+BOOKS_URL = reverse('book:book-list')
+BULK_URL = reverse('book:book-bulk')
+
+
+def book_payload(title, genre='Fiction', is_available=True):
+    """Return the payload for creating a book."""
+    return {
+        'title': title,
+        'author': {'name': 'Test Author'},
+        'genre': {'name': genre},
+        'condition': {'name': 'Good'},
+        'pickup_location': 'Library',
+        'is_available': is_available,
+    }
+
+
+class UserStatsApiTests(TestCase):
+    """Test the book counts of the authenticated user."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_book(self, **params):
+        title = f'Sample book {Book.objects.count()}'
+        payload = book_payload(title, **params)
+        res = self.client.post(BOOKS_URL, payload, format='json')
+        return res.data['id']
+
+    def stats(self):
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_auth_required(self):
+        """Test authentication is required for the stats."""
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_follow_book_writes(self):
+        """Test creating, updating and deleting books updates the stats."""
+        first = self.create_book()
+        self.create_book(is_available=False)
+        self.create_book(genre='Poetry')
+
+        stats = self.stats()
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(stats['available'], 2)
+        self.assertEqual(
+            [(g['name'], g['total'], g['available']) for g in stats['genres']],
+            [('Fiction', 2, 1), ('Poetry', 1, 1)],
+        )
+
+        url = reverse('book:book-detail', args=[first])
+        self.client.patch(url, {'genre': {'name': 'Poetry'}}, format='json')
+        self.client.patch(url, {'is_available': False}, format='json')
+        stats = self.stats()
+        self.assertEqual(stats['available'], 1)
+        self.assertEqual(
+            [(g['name'], g['total'], g['available']) for g in stats['genres']],
+            [('Fiction', 1, 0), ('Poetry', 2, 1)],
+        )
+
+        self.client.delete(url)
+        stats = self.stats()
+        self.assertEqual((stats['total'], stats['available']), (2, 1))
+
+    def test_stats_follow_bulk_writes(self):
+        """Test bulk updates and deletes update the stats."""
+        ids = [self.create_book() for _ in range(3)]
+
+        self.client.patch(
+            BULK_URL,
+            {'ids': ids[:2], 'changes': {'is_available': False}},
+            format='json',
+        )
+        stats = self.stats()
+        self.assertEqual((stats['total'], stats['available']), (3, 1))
+
+        self.client.delete(BULK_URL, {'ids': ids[1:]}, format='json')
+        stats = self.stats()
+        self.assertEqual((stats['total'], stats['available']), (1, 0))
+
+
+class ReconcileBookCountsTests(TestCase):
+    """Test fixing book counts that drifted."""
+
+    def test_reconcile_fixes_drift(self):
+        """Test counts are recomputed from the books."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        genre = Genre.objects.create(name='Fiction')
+        stale = Genre.objects.create(name='Poetry')
+        for is_available in (True, False):
+            Book.objects.create(
+                owner=user,
+                title='Sample book',
+                author=Author.objects.create(name='Test Author'),
+                genre=genre,
+                condition=Condition.objects.create(name='Good'),
+                pickup_location='Library',
+                is_available=is_available,
+            )
+        BookCount.objects.create(owner=user, genre=stale, total=4, available=1)
+        out = StringIO()
+
+        call_command('reconcile_book_counts', batch_size=1, stdout=out)
+
+        counts = {
+            count.genre_id: (count.total, count.available)
+            for count in BookCount.objects.filter(owner=user)
+        }
+        self.assertEqual(counts, {genre.id: (2, 1), stale.id: (0, 0)})
+        self.assertIn('Fixed 2 book counts.', out.getvalue())
+
+    def test_reconcile_count_added_concurrently(self):
+        """Test a count added after the stored counts were read is fixed."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        genre = Genre.objects.create(name='Fiction')
+        Book.objects.create(
+            owner=user,
+            title='Sample book',
+            author=Author.objects.create(name='Test Author'),
+            genre=genre,
+            condition=Condition.objects.create(name='Good'),
+            pickup_location='Library',
+        )
+        actual_counts = counters.actual_counts
+
+        def add_count(owner_ids, using):
+            # As apply_deltas would for a book created meanwhile.
+            BookCount.objects.create(owner=user, genre=genre, total=2)
+            return actual_counts(owner_ids, using)
+
+        with patch.object(counters, 'actual_counts', side_effect=add_count):
+            counters.reconcile_shard([user.pk], 'default')
+
+        count = BookCount.objects.get(owner=user)
+        self.assertEqual((count.total, count.available), (1, 1))
@@ -0,0 +1,124 @@
+"""
+Signed, expiring access tokens and revocable refresh tokens.
+"""
+import hashlib
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from core.models import RefreshToken
+
+
+ACCESS_TOKEN_SALT = 'user.tokens.access'
+
+
+def hash_key(key):
+    """Return the stored hash of a refresh token key."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def create_refresh_token(user):
+    """Create a refresh token for a user and return (key, token)."""
+    key = secrets.token_urlsafe(32)
+    token = RefreshToken.objects.create(
+        user=user,
+        key_hash=hash_key(key),
+        expires_at=timezone.now() + settings.REFRESH_TOKEN_LIFETIME,
+    )
+    return key, token
+
+
+def get_refresh_token(key):
+    """Return the valid refresh token with a key, or None."""
+    return RefreshToken.objects.select_related('user').filter(
+        key_hash=hash_key(key),
+        revoked_at__isnull=True,
+        expires_at__gt=timezone.now(),
+        user__is_active=True,
+    ).first()
+
+
+def create_access_token(refresh_token):
+    """Return a signed access token issued from a refresh token."""
+    user = refresh_token.user
+    return signing.dumps(
+        {
+            'uid': user.pk,
+            'rid': refresh_token.pk,
+            'email': user.email,
+            'staff': user.is_staff,
+        },
+        salt=ACCESS_TOKEN_SALT,
+    )
+
+
+def read_access_token(token):
+    """
+    Return the claims of an access token.
+
+    Raises signing.SignatureExpired for expired tokens and
+    signing.BadSignature for any other invalid token.
+    """
+    return signing.loads(
+        token,
+        salt=ACCESS_TOKEN_SALT,
+        max_age=settings.ACCESS_TOKEN_LIFETIME,
+    )
+
+
+class RevocationList:
+    """
+    Refresh tokens revoked recently enough for access tokens issued from
+    them to still be unexpired, reloaded from the database at most every
+    TOKEN_REVOCATION_CACHE_SECONDS.
+    """
+
+    def __init__(self):
+        self.ids = frozenset()
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def is_revoked(self, refresh_token_id):
+        """Return whether a refresh token has been revoked."""
+        now = time.monotonic()
+        if (
+            self.loaded_at is None or
+            now - self.loaded_at >= settings.TOKEN_REVOCATION_CACHE_SECONDS
+        ):
+            self.reload(now)
+        return refresh_token_id in self.ids
+
+    def reload(self, now=None):
+        """Load the recently revoked refresh token ids."""
+        since = timezone.now() - settings.ACCESS_TOKEN_LIFETIME
+        ids = RefreshToken.objects.filter(
+            revoked_at__gte=since,
+        ).values_list('pk', flat=True)
+        with self.lock:
+            self.ids = frozenset(ids)
+            self.loaded_at = time.monotonic() if now is None else now
+
+    def add(self, refresh_token_id):
+        """Record a revocation made by this process."""
+        with self.lock:
+            self.ids = self.ids | {refresh_token_id}
+
+    def clear(self):
+        """Forget the loaded revocations."""
+        with self.lock:
+            self.ids = frozenset()
+            self.loaded_at = None
+
+
+revocations = RevocationList()
+
+
+def revoke_refresh_token(refresh_token):
+    """Revoke a refresh token and the access tokens issued from it."""
+    refresh_token.revoked_at = timezone.now()
+    refresh_token.save(update_fields=['revoked_at'])
+    revocations.add(refresh_token.pk)
@@ -1,25 +1,43 @@
 """
 Views for the user API.
 """
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, authentication, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from core.models import BookCount
+from core.sharding import shard_for_owner
+from user.authentication import SignedTokenAuthentication
 
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
+    RefreshTokenSerializer,
+    UserStatsSerializer,
+)
+from user.tokens import (
+    create_access_token,
+    create_refresh_token,
+    revoke_refresh_token,
 )
 
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer
+    throttle_scope = 'create'
 
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = 'token'
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -31,3 +49,79 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         """Retrieve and return the authenticated user."""
         return self.request.user
+
+
+class UserStatsView(APIView):
+    """Book counts of the authenticated user, from maintained counters."""
+    authentication_classes = [
+        SignedTokenAuthentication,
+        authentication.TokenAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(responses=UserStatsSerializer)
+    def get(self, request):
+        counts = BookCount.objects.using(
+            shard_for_owner(request.user.pk),
+        ).filter(
+            owner=request.user,
+            total__gt=0,
+        ).select_related('genre').order_by('genre__name')
+        stats = {
+            'total': sum(count.total for count in counts),
+            'available': sum(count.available for count in counts),
+            'genres': counts,
+        }
+        return Response(UserStatsSerializer(stats).data)
+
+
+def access_token_data(refresh_token):
+    """Return the response data for a new access token."""
+    return {
+        'access': create_access_token(refresh_token),
+        'expires_in': int(settings.ACCESS_TOKEN_LIFETIME.total_seconds()),
+    }
+
+
+class CreateTokenPairView(generics.GenericAPIView):
+    """Create a signed access token and a refresh token for user."""
+    serializer_class = AuthTokenSerializer
+    authentication_classes = []
+    throttle_scope = 'token'
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key, refresh_token = create_refresh_token(
+            serializer.validated_data['user']
+        )
+        data = access_token_data(refresh_token)
+        data['refresh'] = key
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class RefreshAccessTokenView(generics.GenericAPIView):
+    """Create a new access token from a refresh token."""
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+    throttle_scope = 'token'
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            access_token_data(serializer.validated_data['token'])
+        )
+
+
+class RevokeTokenView(generics.GenericAPIView):
+    """Revoke a refresh token and the access tokens issued from it."""
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+    throttle_scope = 'token'
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke_refresh_token(serializer.validated_data['token'])
+        return Response(status=status.HTTP_204_NO_CONTENT)